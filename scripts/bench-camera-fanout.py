@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""Measure MJPEG fan-out of CameraWorkerManager against the fake camera worker."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _worker_health(manager, device_id: str) -> dict:
+    return next(item for item in manager.get_health()["workers"] if item["deviceId"] == device_id)
+
+
+async def _viewer(queue: asyncio.Queue, stop_at: float, latencies: list[float], counts: list[int], index: int) -> None:
+    while True:
+        timeout = stop_at - time.time()
+        if timeout <= 0:
+            return
+        try:
+            frame = await asyncio.wait_for(queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return
+        if frame is None:
+            return
+        frame.multipart_chunk()
+        counts[index] += 1
+        if frame.captured_at is not None:
+            latencies.append((time.time() - frame.captured_at) * 1000)
+
+
+async def run_case(manager, device_id: str, viewers: int, duration: float) -> dict:
+    queues = [await manager.subscribe(device_id) for _ in range(viewers)]
+    # Let the worker apply the preview settings before measuring.
+    await asyncio.sleep(0.5)
+    for queue in queues:
+        while not queue.empty():
+            queue.get_nowait()
+    latencies: list[float] = []
+    counts = [0] * viewers
+    dropped_before = _worker_health(manager, device_id)["subscriberDropped"]
+    tracemalloc.reset_peak()
+    rss_before = _rss_kb()
+    started = time.time()
+    cpu_started = time.process_time()
+    await asyncio.gather(
+        *(_viewer(queue, started + duration, latencies, counts, index) for index, queue in enumerate(queues))
+    )
+    elapsed = time.time() - started
+    cpu = time.process_time() - cpu_started
+    _, peak = tracemalloc.get_traced_memory()
+    dropped = _worker_health(manager, device_id)["subscriberDropped"] - dropped_before
+    for queue in queues:
+        await manager.unsubscribe(device_id, queue)
+    latencies.sort()
+    delivered = sum(counts)
+    return {
+        "viewers": viewers,
+        "framesPerViewer": round(statistics.mean(counts), 1),
+        "deliveredPerSec": round(delivered / elapsed, 1),
+        "latencyMsP50": round(latencies[len(latencies) // 2], 2) if latencies else None,
+        "latencyMsP99": round(latencies[int(len(latencies) * 0.99)], 2) if latencies else None,
+        "cpuPct": round(cpu / elapsed * 100, 1),
+        "pyPeakKb": peak // 1024,
+        "rssKb": _rss_kb(),
+        "rssDeltaKb": _rss_kb() - rss_before,
+        "subscriberDropped": dropped,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    from app.camera_worker_manager import get_local_camera_worker_manager
+
+    manager = get_local_camera_worker_manager()
+    device_id = "bench-device"
+    tracemalloc.start()
+    results = []
+    try:
+        for viewers in args.viewers:
+            result = await run_case(manager, device_id, viewers, args.duration)
+            results.append(result)
+            print(json.dumps(result), flush=True)
+    finally:
+        manager.reset_runtime()
+        await asyncio.sleep(0.2)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 10, 50, 100, 200],
+                        help="Subscriber counts per device to measure.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per case.")
+    parser.add_argument("--fps", type=float, default=30, help="Initial fake worker frame rate; preview settings from the backend cap it at LIVE_MAX_FPS.")
+    parser.add_argument("--width", type=int, default=1280, help="Fake worker frame width.")
+    parser.add_argument("--height", type=int, default=720, help="Fake worker frame height.")
+    parser.add_argument("--pad-kb", type=float, default=80, help="Extra bytes per frame to mimic real JPEG sizes.")
+    parser.add_argument("--json", help="Optional path for the collected results.")
+    args = parser.parse_args()
+
+    # The backend reads these at import time, so set them before importing app.
+    os.environ["CAMERA_WORKER_PATH"] = str(ROOT / "scripts" / "fake-camera-worker.py")
+    os.environ.setdefault("CAMERA_WORKER_IDLE_LINGER_SEC", "30")
+    os.environ["FAKE_CAMERA_FPS"] = str(args.fps)
+    os.environ["FAKE_CAMERA_WIDTH"] = str(args.width)
+    os.environ["FAKE_CAMERA_HEIGHT"] = str(args.height)
+    os.environ["FAKE_CAMERA_PAD_KB"] = str(args.pad_kb)
+    sys.path.insert(0, str(ROOT / "sensorhub-backend"))
+    asyncio.run(main_async(args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Measure CSV export throughput: dict-per-row path against the tuple-based path.
+
+Builds a throwaway database with one large setup (the backend database is not touched),
+encodes its readings with both pipelines and prints rows per second as JSON lines.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _fill(db, setup_id: str, rows: int, interval_ms: int) -> None:
+    start = int(time.time() * 1000) - rows * interval_ms
+    batch = 100_000
+    for offset in range(0, rows, batch):
+        values = [
+            (
+                setup_id,
+                "N0001",
+                start + index * interval_ms,
+                6.5 + (index % 100) / 100,
+                1.2 + (index % 37) / 50,
+                21.0 + (index % 13) / 10,
+                '["ok"]',
+            )
+            for index in range(offset, min(rows, offset + batch))
+        ]
+        with db._get_conn() as conn:
+            conn.executemany(
+                "INSERT INTO readings (setup_id, node_id, ts, ph, ec, temp, status_json) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+
+
+def _run(name: str, chunks, rows: int) -> dict:
+    digest = hashlib.sha256()
+    size = 0
+    started = time.perf_counter()
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    return {
+        "path": name,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rowsPerSec": int(rows / elapsed) if elapsed else 0,
+        "mb": round(size / 1_000_000, 1),
+        "sha256": digest.hexdigest()[:16],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Readings in the benchmark setup.")
+    parser.add_argument("--interval-ms", type=int, default=1000, help="Spacing of the generated readings.")
+    parser.add_argument("--columns", default=None, help="Export columns, comma-separated (default: all).")
+    parser.add_argument("--repeat", type=int, default=2, help="Runs per path; the fastest is reported.")
+    parser.add_argument("--zip", action="store_true", help="Also time the complete ZIP export.")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT / "sensorhub-backend"))
+    from app import db
+    from app.exports import build_export_request, encode_readings, encode_setup_readings, iter_export_zip, iter_setup_readings
+
+    with tempfile.TemporaryDirectory(prefix="sensorhub-bench-") as temp_dir:
+        db.DB_PATH = Path(temp_dir) / "bench.db"
+        db.init_db()
+        setup_id = db.create_setup("bench")["setup_id"]
+        started = time.perf_counter()
+        _fill(db, setup_id, args.rows, args.interval_ms)
+        print(json.dumps({"filled": args.rows, "seconds": round(time.perf_counter() - started, 1)}), flush=True)
+
+        request = build_export_request([setup_id], columns=args.columns)
+        paths = {
+            "dict": lambda: encode_readings(iter_setup_readings(setup_id, request), request.columns, request.fmt),
+            "tuple": lambda: encode_setup_readings(setup_id, request),
+        }
+        if args.zip:
+            paths["zip"] = lambda: iter_export_zip(request)
+        results = {}
+        for name, build in paths.items():
+            runs = [_run(name, build(), args.rows) for _ in range(max(1, args.repeat))]
+            results[name] = min(runs, key=lambda run: run["seconds"])
+            print(json.dumps(results[name]), flush=True)
+        if results["dict"]["sha256"] != results["tuple"]["sha256"]:
+            print(json.dumps({"error": "dict and tuple output differ"}), flush=True)
+            return 1
+        speedup = results["dict"]["seconds"] / results["tuple"]["seconds"]
+        print(json.dumps({"speedup": round(speedup, 2)}), flush=True)
+        db.close_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""Stand-in for CameraWorker.exe speaking the same --list / --watch / --device protocol.
+
+Point the backend at it with CAMERA_WORKER_PATH=scripts/fake-camera-worker.py. The
+backend only passes --list, --watch or --device, so every option can also be set via env.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+MAGIC = b"FRAM"
+VERSION = 1
+# Base FRAM header plus the u32 id of the applied control settings.
+HEADER = struct.Struct("<4sHHQQHHII")
+MIME = b"image/jpeg"
+COMMENT_CHUNK = 65533
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _segment(marker: int, body: bytes) -> bytes:
+    return struct.pack(">BBH", 0xFF, marker, len(body) + 2) + body
+
+
+def _entropy_data(blocks: int, level: int) -> bytes:
+    # One luminance component, AC always EOB. The first block sets the DC level,
+    # all following blocks repeat it with a zero difference.
+    value = level - 128
+    category = abs(value).bit_length()
+    if value < 0:
+        value += (1 << category) - 1
+    first = format(category, "04b") + (format(value, f"0{category}b") if category else "") + "0"
+    bits = first + "00000" * (blocks - 1)
+    bits += "1" * (-len(bits) % 8)
+    data = int(bits, 2).to_bytes(len(bits) // 8, "big")
+    return data.replace(b"\xff", b"\xff\x00")
+
+
+def build_jpeg(width: int, height: int, level: int, pad_bytes: int = 0) -> bytes:
+    """Valid baseline grayscale JPEG of uniform brightness, optionally padded by COM segments."""
+    quant = bytes([8] + [1] * 63)
+    dc_table = bytes([0, 0, 0, 9] + [0] * 12) + bytes(range(9))
+    ac_table = bytes([1] + [0] * 15) + b"\x00"
+    parts = [
+        b"\xff\xd8",
+        _segment(0xDB, b"\x00" + quant),
+        _segment(0xC0, struct.pack(">BHHB", 8, height, width, 1) + b"\x01\x11\x00"),
+        _segment(0xC4, b"\x00" + dc_table),
+        _segment(0xC4, b"\x10" + ac_table),
+    ]
+    while pad_bytes > 0:
+        chunk = min(pad_bytes, COMMENT_CHUNK)
+        parts.append(_segment(0xFE, b"\x00" * chunk))
+        pad_bytes -= chunk
+    blocks = ((width + 7) // 8) * ((height + 7) // 8)
+    parts.append(_segment(0xDA, b"\x01\x01\x00\x00\x3f\x00"))
+    parts.append(_entropy_data(blocks, level))
+    parts.append(b"\xff\xd9")
+    return b"".join(parts)
+
+
+class Control:
+    """Settings written by the backend as JSON lines on stdin."""
+    def __init__(self, fps: float, width: int, quality: float) -> None:
+        self.config_id = 0
+        self.fps = fps
+        self.width = width
+        self.quality = quality
+
+    def read_forever(self) -> None:
+        for line in sys.stdin:
+            try:
+                data = json.loads(line)
+                self.fps = float(data.get("fps") or self.fps)
+                self.width = int(data.get("width") or 0)
+                self.quality = float(data.get("quality") or self.quality)
+                self.config_id = int(data["id"])
+            except (ValueError, KeyError, TypeError) as exc:
+                print(f"control error: {exc}", file=sys.stderr, flush=True)
+
+
+def _device_list(count: int) -> list[dict]:
+    return [
+        {
+            "device_id": f"\\\\?\\fake#camera#{index}",
+            "friendly_name": f"Fake Camera {index}",
+            "port_id": f"PCIROOT(0)#PCI(1400)#USBROOT(0)#USB({index + 1})",
+            "instance_id": f"USB\\VID_FA4E&PID_{index:04X}\\{index}",
+        }
+        for index in range(count)
+    ]
+
+
+def list_devices(count: int) -> None:
+    print(json.dumps(_device_list(count)), flush=True)
+
+
+def watch_devices(count: int, hotplug_sec: float) -> int:
+    """Print a snapshot now and after every simulated hotplug; stop when stdin closes."""
+    closed = threading.Event()
+
+    def wait_for_stdin_close() -> None:
+        sys.stdin.read()
+        closed.set()
+
+    threading.Thread(target=wait_for_stdin_close, daemon=True).start()
+    present = count
+    list_devices(present)
+    while not closed.wait(hotplug_sec or None):
+        present = count - 1 if present == count else count
+        list_devices(present)
+    return 0
+
+
+def stream_device(device_id: str, args: argparse.Namespace) -> int:
+    if args.init_fail:
+        print("init failed: fake init failure", file=sys.stderr, flush=True)
+        return 0
+    control = Control(args.fps, 0, args.quality)
+    threading.Thread(target=control.read_forever, daemon=True).start()
+    output = sys.stdout.buffer
+    device_bytes = device_id.encode("utf-8")
+    sequence = 0
+    frames = 0
+    # Like the real worker: the camera delivers at its native rate and a frame is accepted
+    # once the minimum interval since the last accepted frame has passed.
+    tick = 1 / max(args.source_fps, 0.1)
+    next_tick = time.monotonic()
+    last_frame = None
+    while True:
+        next_tick += tick
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.monotonic()
+        now = time.monotonic()
+        if control.fps > 0 and last_frame is not None and now - last_frame < 1 / control.fps:
+            continue
+        last_frame = now
+        captured_ms = int(time.time() * 1000)
+        if args.fail_after and frames >= args.fail_after:
+            print("worker fatal: fake failure", file=sys.stderr, flush=True)
+            return 3
+        if args.stall_every and frames and frames % args.stall_every == 0:
+            time.sleep(args.stall_ms / 1000)
+        if args.drop_every and frames and frames % args.drop_every == 0:
+            sequence += 1
+        width, height = args.width, args.height
+        if control.width and control.width < width:
+            height = height * control.width // width
+            width = control.width
+        pad = int(args.pad_kb * 1024 * control.quality)
+        payload = build_jpeg(width, height, level=frames % 256, pad_bytes=pad)
+        magic = b"XXXX" if args.corrupt_after and frames >= args.corrupt_after else MAGIC
+        header = HEADER.pack(
+            magic,
+            VERSION,
+            HEADER.size,
+            sequence,
+            captured_ms,
+            len(device_bytes),
+            len(MIME),
+            len(payload),
+            control.config_id,
+        )
+        try:
+            output.write(header + device_bytes + MIME + payload)
+            output.flush()
+        except (BrokenPipeError, OSError):
+            return 0
+        sequence += 1
+        frames += 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fake SensorHub camera worker.")
+    parser.add_argument("--list", action="store_true", help="Print the device list as JSON.")
+    parser.add_argument("--watch", action="store_true", help="Print the device list whenever it changes.")
+    parser.add_argument("--device", help="Stream FRAM frames for this device id.")
+    parser.add_argument("--devices", type=int, default=_env_int("FAKE_CAMERA_DEVICES", 1),
+                        help="Number of listed devices (env: FAKE_CAMERA_DEVICES).")
+    parser.add_argument("--hotplug-sec", type=float, default=_env_float("FAKE_CAMERA_HOTPLUG_SEC", 0),
+                        help="In --watch mode, unplug and replug the last device at this interval (env: FAKE_CAMERA_HOTPLUG_SEC).")
+    parser.add_argument("--fps", type=float, default=_env_float("FAKE_CAMERA_FPS", 30),
+                        help="Frame rate cap until the backend sends settings (env: FAKE_CAMERA_FPS).")
+    parser.add_argument("--source-fps", type=float, default=_env_float("FAKE_CAMERA_SOURCE_FPS", 30),
+                        help="Native camera frame rate the cap is applied to (env: FAKE_CAMERA_SOURCE_FPS).")
+    parser.add_argument("--width", type=int, default=_env_int("FAKE_CAMERA_WIDTH", 1280),
+                        help="Native frame width (env: FAKE_CAMERA_WIDTH).")
+    parser.add_argument("--height", type=int, default=_env_int("FAKE_CAMERA_HEIGHT", 720),
+                        help="Native frame height (env: FAKE_CAMERA_HEIGHT).")
+    parser.add_argument("--quality", type=float, default=0.92, help=argparse.SUPPRESS)
+    parser.add_argument("--pad-kb", type=float, default=_env_float("FAKE_CAMERA_PAD_KB", 0),
+                        help="Extra COM bytes per frame at full quality to mimic real JPEG sizes (env: FAKE_CAMERA_PAD_KB).")
+    parser.add_argument("--fail-after", type=int, default=_env_int("FAKE_CAMERA_FAIL_AFTER", 0),
+                        help="Exit with an error after N frames (env: FAKE_CAMERA_FAIL_AFTER).")
+    parser.add_argument("--drop-every", type=int, default=_env_int("FAKE_CAMERA_DROP_EVERY", 0),
+                        help="Skip one sequence number every N frames (env: FAKE_CAMERA_DROP_EVERY).")
+    parser.add_argument("--stall-every", type=int, default=_env_int("FAKE_CAMERA_STALL_EVERY", 0),
+                        help="Pause every N frames (env: FAKE_CAMERA_STALL_EVERY).")
+    parser.add_argument("--stall-ms", type=float, default=_env_float("FAKE_CAMERA_STALL_MS", 500),
+                        help="Pause length in ms (env: FAKE_CAMERA_STALL_MS).")
+    parser.add_argument("--corrupt-after", type=int, default=_env_int("FAKE_CAMERA_CORRUPT_AFTER", 0),
+                        help="Send a bad FRAM magic after N frames (env: FAKE_CAMERA_CORRUPT_AFTER).")
+    parser.add_argument("--init-fail", action="store_true", default=bool(os.getenv("FAKE_CAMERA_INIT_FAIL")),
+                        help="Fail like a camera that cannot be opened (env: FAKE_CAMERA_INIT_FAIL).")
+    args = parser.parse_args()
+
+    if args.list:
+        list_devices(args.devices)
+        return 0
+    if args.watch:
+        return watch_devices(args.devices, args.hotplug_sec)
+    if not args.device:
+        print("Usage: fake-camera-worker.py --list | --watch | --device <symbolic_link>", file=sys.stderr)
+        return 2
+    return stream_device(args.device, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""Move photos from data/photos/<setup>/<file> into the <setup>/<yyyy>/<mm>/<dd>/ layout.
+
+Runs against the live data directory while the backend is up: photos are moved in
+small batches with a pause in between, and old URLs keep resolving during and after
+the migration.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, default=500, help="Photos moved per batch.")
+    parser.add_argument("--pause-sec", type=float, default=0.5, help="Pause between batches.")
+    parser.add_argument("--dry-run", action="store_true", help="Only count photos still in the flat layout.")
+    args = parser.parse_args()
+
+    # Uses the same data directory and database as the backend.
+    sys.path.insert(0, str(ROOT / "sensorhub-backend"))
+    from app.db import init_db
+    from app.photo_index import migrate_flat_photos
+
+    init_db()
+    total = 0
+    while True:
+        result = migrate_flat_photos(batch_size=args.batch, dry_run=args.dry_run)
+        total += result["moved"]
+        print(json.dumps({**result, "total": total}), flush=True)
+        if args.dry_run or not result["remaining"]:
+            return 0
+        time.sleep(args.pause_sec)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+"""Re-index data/photos: add photos copied in by hand and drop rows whose file is gone.
+
+The backend reconciles the photos table only on its first start (see
+data/photo-index.done); run this after changing the photo folders outside the backend.
+It scans every setup folder, so expect it to take a while on large installations.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    # Uses the same data directory and database as the backend.
+    sys.path.insert(0, str(ROOT / "sensorhub-backend"))
+    from app.db import init_db
+    from app.photo_index import reconcile_photo_index
+
+    init_db()
+    print(json.dumps(reconcile_photo_index()), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Optional
+
+from fastapi import HTTPException
+
+from .camera_devices import reset_runtime as reset_camera_runtime
+from .camera_streaming import reset_runtime as reset_camera_streaming
+from .camera_worker_manager import (
+    CAMERA_DEMAND_TOPIC,
+    PROFILE_CAPTURE,
+    PROFILE_PREVIEW,
+    camera_frames_topic,
+    encode_relay_frame,
+    get_local_camera_worker_manager,
+)
+from .config import CAMERA_DEMAND_LEASE_SEC, log_event
+from .nodes import reset_runtime as reset_node_runtime
+from .pubsub import get_pubsub
+
+CONTROL_TOPIC = "control"
+
+
+def publish_control(command: str) -> None:
+    get_pubsub().publish(CONTROL_TOPIC, json.dumps({"t": command}).encode("utf-8"))
+
+
+async def control_loop() -> None:
+    """Apply runtime commands sent by API workers to the acquisition owner."""
+    pubsub = get_pubsub()
+    queue = pubsub.subscribe(CONTROL_TOPIC)
+    try:
+        while True:
+            raw = await queue.get()
+            try:
+                command = json.loads(raw).get("t")
+            except ValueError:
+                continue
+            if command == "reset":
+                reset_node_runtime()
+                reset_camera_runtime()
+                reset_camera_streaming()
+                log_event("acquisition.reset")
+    finally:
+        pubsub.unsubscribe(CONTROL_TOPIC, queue)
+
+
+async def camera_demand_loop() -> None:
+    """Run local camera workers while any API worker holds a frame lease for the device."""
+    pubsub = get_pubsub()
+    queue = pubsub.subscribe(CAMERA_DEMAND_TOPIC)
+    leases: dict[str, dict[str, tuple[float, bool]]] = {}
+    relays: dict[str, tuple[str, asyncio.Task[None]]] = {}
+    sweep_sec = CAMERA_DEMAND_LEASE_SEC / 3
+    try:
+        while True:
+            raw: Optional[bytes] = None
+            try:
+                raw = await asyncio.wait_for(queue.get(), timeout=sweep_sec)
+            except asyncio.TimeoutError:
+                pass
+            now = time.time()
+            if raw:
+                try:
+                    data = json.loads(raw)
+                    device_id = data["deviceId"]
+                    client = data["client"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if data.get("active"):
+                    leases.setdefault(device_id, {})[client] = (
+                        now + CAMERA_DEMAND_LEASE_SEC,
+                        bool(data.get("capture")),
+                    )
+                else:
+                    leases.get(device_id, {}).pop(client, None)
+            for device_id in list(leases.keys()):
+                clients = leases[device_id]
+                for client, (expires_at, _) in list(clients.items()):
+                    if expires_at < now:
+                        clients.pop(client)
+                if not clients:
+                    leases.pop(device_id)
+            for device_id in list(relays.keys()):
+                if device_id not in leases:
+                    relays.pop(device_id)[1].cancel()
+            for device_id, clients in leases.items():
+                capture = any(wants_capture for _, wants_capture in clients.values())
+                profile = PROFILE_CAPTURE if capture else PROFILE_PREVIEW
+                current = relays.get(device_id)
+                if current and not current[1].done():
+                    if current[0] == profile:
+                        continue
+                    current[1].cancel()
+                relays[device_id] = (profile, asyncio.create_task(_relay_frames(device_id, profile)))
+    finally:
+        for _, relay in relays.values():
+            relay.cancel()
+        pubsub.unsubscribe(CAMERA_DEMAND_TOPIC, queue)
+
+
+async def _relay_frames(device_id: str, profile: str) -> None:
+    manager = get_local_camera_worker_manager()
+    pubsub = get_pubsub()
+    topic = camera_frames_topic(device_id)
+    try:
+        frames = await manager.subscribe(device_id, profile=profile)
+    except HTTPException as exc:
+        log_event("acquisition.camera_unavailable", device_id=device_id, error=exc.detail)
+        pubsub.publish(topic, b"")
+        return
+    try:
+        while True:
+            frame = await frames.get()
+            if frame is None:
+                pubsub.publish(topic, b"")
+                return
+            pubsub.publish(topic, encode_relay_frame(frame))
+    finally:
+        await manager.unsubscribe(device_id, frames)
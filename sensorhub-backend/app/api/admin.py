@@ -6,13 +6,18 @@ from fastapi import APIRouter, Header, HTTPException
 
 import shutil
 
-from ..config import ADMIN_RESET_TOKEN, PHOTOS_DIR, ensure_dirs, log_event
+from ..acquisition import publish_control
+from ..config import ADMIN_RESET_TOKEN, PHOTOS_DIR, SENSORHUB_ROLE, ensure_dirs, log_event
 from ..db import reset_db_contents
 from ..camera_devices import list_camera_devices, reset_runtime as reset_camera_runtime
 from ..camera_streaming import reset_runtime as reset_camera_streaming
 from ..camera_worker_manager import get_camera_worker_manager
+from ..export_jobs import get_export_jobs
 from ..nodes import reset_runtime as reset_node_runtime
-from ..realtime_updates import broadcast_system_reset
+from ..photo_derivatives import get_photo_derivatives
+from ..photo_writer import get_photo_writer
+from ..pubsub import get_pubsub, is_acquisition_owner
+from ..realtime_updates import broadcast_system_reset, get_live_health
 from ..db import list_setups
 
 router = APIRouter(prefix="/admin")
@@ -30,8 +35,11 @@ async def reset_db(token: str | None = Header(None, alias="X-Reset-Token")) -> d
     reset_node_runtime()
     reset_camera_runtime()
     reset_camera_streaming()
+    if not is_acquisition_owner():
+        publish_control("reset")
     if PHOTOS_DIR.exists():
         shutil.rmtree(PHOTOS_DIR, ignore_errors=True)
+    get_export_jobs().clear_cache()
     ensure_dirs()
     log_event("db.reset")
     await broadcast_system_reset("db-reset")
@@ -46,6 +54,11 @@ async def get_health() -> dict:
         "ok": True,
         "ts": int(time.time() * 1000),
         "workers": worker_health,
+        "live": get_live_health(),
+        "role": SENSORHUB_ROLE,
+        "pubsub": get_pubsub().get_health(),
+        "photos": {**get_photo_writer().get_health(), "derivatives": get_photo_derivatives().get_health()},
+        "exports": get_export_jobs().get_health(),
         "setups": {"count": len(list_setups())},
         "cameras": {"count": len(list_camera_devices())},
     }
@@ -18,6 +18,7 @@ from ..db import (
 )
 from ..models import NodeCommandRequest, NodeUpdate
 from ..nodes import get_node_client, list_serial_ports, remove_node_client
+from ..pubsub import is_acquisition_owner
 from .setups import delete_setup_assets
 
 router = APIRouter(prefix="/nodes")
@@ -78,6 +79,8 @@ def delete_node_route(uid: str) -> dict:
 
 @router.post("/{uid}/command")
 def post_node_command(uid: str, payload: NodeCommandRequest) -> dict:
+    if not is_acquisition_owner():
+        raise HTTPException(status_code=409, detail="node commands are only available on the owner process")
     client = get_node_client(uid)
     if not client:
         raise HTTPException(status_code=503, detail="node offline")
@@ -1,34 +1,47 @@
 from __future__ import annotations
 
-import re
-import shutil
 import time
-import tempfile
-import zipfile
-from pathlib import Path
+from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 
 from ..camera_streaming import capture_photo_now, stop_workers_for_device
-from ..config import DEFAULT_PHOTO_INTERVAL_MINUTES, DEFAULT_VALUE_INTERVAL_MINUTES, PHOTOS_DIR
+from ..config import (
+    DEFAULT_PHOTO_INTERVAL_MINUTES,
+    DEFAULT_VALUE_INTERVAL_MINUTES,
+    PHOTO_DERIVATIVE_SIZES,
+    PHOTOS_DIR,
+)
 from ..db import (
+    count_photos,
     create_setup,
+    delete_photos_by_setup,
     delete_setup,
     delete_readings_by_setup,
     get_camera,
+    get_photo,
     get_setup,
     insert_reading,
-    iter_readings,
+    list_photos,
     list_readings,
     list_setups,
     update_setup,
 )
-from ..models import SetupCreate, SetupUpdate
+from ..export_jobs import get_export_jobs
+from ..exports import (
+    ExportRequest,
+    build_delta_export,
+    build_export_request,
+    iter_delta_zip,
+    iter_export_zip,
+)
+from ..models import ExportJobCreate, SetupCreate, SetupUpdate
 from ..nodes import fetch_setup_reading
+from ..photo_derivatives import get_photo_derivatives
+from ..photo_index import photo_url, remove_photo_folder
+from ..timelapse import TIMELAPSE_MAX_FPS, stream_timelapse
 from ..utils.paths import resolve_under, validate_identifier
-from ..utils.csv_export import write_csv_to_zip_stream
-from ..utils.datetime_utils import iter_readings_with_iso
 
 router = APIRouter()
 
@@ -140,82 +153,158 @@ async def capture_photo(setup_id: str) -> dict:
 
 
 @router.get("/setups/{setup_id}/history")
-def get_history(setup_id: str, limit: int = 200) -> dict:
+def get_history(
+    setup_id: str,
+    limit: int = 200,
+    photoLimit: int = Query(default=200, ge=0, le=5000),
+    photoOffset: int = Query(default=0, ge=0),
+    from_ts: Optional[int] = Query(default=None, alias="from"),
+    to_ts: Optional[int] = Query(default=None, alias="to"),
+) -> dict:
     setup = get_setup(setup_id)
     if not setup:
         raise HTTPException(status_code=404, detail="setup not found")
-    readings = list_readings(setup_id, limit=limit)
-    photos = _list_photos(setup_id, setup.get("camera_id"))
+    readings = list_readings(setup_id, limit=limit, since=from_ts, until=to_ts)
+    # photoLimit=0 is the explicit opt-in for every photo in the range.
+    rows = list_photos(setup_id, limit=photoLimit or None, offset=photoOffset, since=from_ts, until=to_ts)
+    photos = [
+        {
+            "id": row["id"],
+            "setup_id": row["setup_id"],
+            "camera_id": row.get("camera_id") or "",
+            "ts": row["ts"],
+            "path": photo_url(row["path"]),
+            "size_bytes": row.get("size_bytes"),
+        }
+        for row in reversed(rows)
+    ]
     return {"readings": readings, "photos": photos}
 
 
+@router.get("/setups/{setup_id}/photos/{photo_id}")
+async def get_photo_file(setup_id: str, photo_id: int, size: str = "full") -> FileResponse:
+    if size != "full" and size not in PHOTO_DERIVATIVE_SIZES:
+        raise HTTPException(status_code=400, detail="invalid size")
+    photo = get_photo(photo_id)
+    if not photo or photo["setup_id"] != setup_id:
+        raise HTTPException(status_code=404, detail="photo not found")
+    path = resolve_under(PHOTOS_DIR, photo["path"])
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="photo not found")
+    if size != "full":
+        path = await get_photo_derivatives().get(path, size)
+    # Photos never change once written, derivatives only appear.
+    return FileResponse(path, media_type="image/jpeg", headers={"Cache-Control": "public, max-age=86400"})
+
+
+@router.get("/setups/{setup_id}/timelapse")
+async def get_timelapse(
+    setup_id: str,
+    fps: float = Query(default=10, gt=0, le=TIMELAPSE_MAX_FPS),
+    stride: int = Query(default=1, ge=1),
+    format: str = "mjpeg",
+    from_ts: Optional[int] = Query(default=None, alias="from"),
+    to_ts: Optional[int] = Query(default=None, alias="to"),
+) -> StreamingResponse:
+    return await stream_timelapse(setup_id, fps, stride=stride, fmt=format, since=from_ts, until=to_ts)
+
+
 @router.get("/export/all")
-def export_all(background_tasks: BackgroundTasks) -> FileResponse:
-    setups = list_setups()
-
-    temp = tempfile.NamedTemporaryFile(delete=False, suffix=".zip")
-    temp_path = Path(temp.name)
-    temp.close()
-
-    with zipfile.ZipFile(temp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for setup in setups:
-            setup_id = setup["setup_id"]
-            setup_name = setup.get("name") or setup_id
-            readings = iter_readings_with_iso(iter_readings(setup_id))
-            write_csv_to_zip_stream(
-                zf,
-                f"setups/{setup_id}/readings.csv",
-                readings,
-                ["id", "setup_id", "node_id", "ts_iso", "ph", "ec", "temp", "status_json"],
-            )
-            zf.writestr(f"setups/{setup_id}/meta.txt", f"name={setup_name}\n")
-
-    background_tasks.add_task(temp_path.unlink, missing_ok=True)
-    return FileResponse(
-        temp_path,
-        filename="sensorhub-export.zip",
+def export_all() -> StreamingResponse:
+    return _export_response(build_export_request([]))
+
+
+@router.get("/export")
+def export_readings(
+    setupId: list[str] = Query(default=[]),
+    from_ts: Optional[int] = Query(default=None, alias="from"),
+    to_ts: Optional[int] = Query(default=None, alias="to"),
+    columns: Optional[str] = None,
+    every: Optional[int] = Query(default=None, ge=1000),
+    format: str = "csv",
+) -> StreamingResponse:
+    request = build_export_request(
+        setupId, since=from_ts, until=to_ts, columns=columns, every_ms=every, fmt=format
+    )
+    return _export_response(request)
+
+
+@router.get("/export/delta")
+def export_delta(
+    setupId: list[str] = Query(default=[]),
+    watermark: Optional[str] = None,
+    columns: Optional[str] = None,
+    format: str = "csv",
+    photoFiles: bool = True,
+) -> StreamingResponse:
+    delta = build_delta_export(setupId, watermark, columns=columns, fmt=format, photo_files=photoFiles)
+    return StreamingResponse(
+        iter_delta_zip(delta),
         media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="sensorhub-delta.zip"',
+            "X-Export-Watermark": delta.watermark,
+        },
     )
 
 
+@router.post("/export/jobs")
+async def post_export_job(payload: ExportJobCreate) -> dict:
+    request = build_export_request(
+        payload.setupIds,
+        since=payload.from_,
+        until=payload.to,
+        columns=payload.columns,
+        every_ms=payload.every,
+        fmt=payload.format,
+    )
+    return await get_export_jobs().submit(request)
+
+
+@router.get("/export/jobs")
+def get_export_job_list() -> list[dict]:
+    return get_export_jobs().list_jobs()
+
+
+@router.get("/export/jobs/{job_id}")
+def get_export_job(job_id: str) -> dict:
+    return _require_export_job(job_id)
+
+
+@router.get("/export/jobs/{job_id}/download")
+def download_export_job(job_id: str) -> FileResponse:
+    job = _require_export_job(job_id)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"export job {job['status']}")
+    artifact = get_export_jobs().artifact_for(job)
+    if not artifact:
+        raise HTTPException(status_code=410, detail="export artifact expired")
+    return FileResponse(artifact, media_type="application/zip", filename="sensorhub-export.zip")
+
+
 def delete_setup_assets(setup_id: str) -> int:
     delete_readings_by_setup(setup_id)
     safe_setup_id = validate_identifier(setup_id, "setup_id")
+    deleted = count_photos(safe_setup_id)
+    delete_photos_by_setup(safe_setup_id)
     photos_dir = resolve_under(PHOTOS_DIR, safe_setup_id)
-    deleted = 0
     if photos_dir.exists():
-        deleted = sum(1 for entry in photos_dir.iterdir() if entry.is_file())
-        shutil.rmtree(photos_dir, ignore_errors=True)
+        remove_photo_folder(safe_setup_id, photos_dir)
     return deleted
 
 
-def _list_photos(setup_id: str, camera_id: str | None) -> list[dict]:
-    safe_setup_id = validate_identifier(setup_id, "setup_id")
-    folder = resolve_under(PHOTOS_DIR, safe_setup_id)
-    if not folder.exists():
-        return []
-    pattern_new = re.compile(
-        rf"^{re.escape(safe_setup_id)}_\d{{4}}-\d{{2}}-\d{{2}}_\d{{2}}-\d{{2}}-\d{{2}}\.jpg$",
-        re.IGNORECASE,
+def _export_response(request: ExportRequest) -> StreamingResponse:
+    # Streamed as it is compressed: no temporary file, and the first bytes go out
+    # before later setups are read.
+    return StreamingResponse(
+        iter_export_zip(request),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="sensorhub-export.zip"'},
     )
-    photos: list[dict] = []
-    for entry in folder.iterdir():
-        if not entry.is_file():
-            continue
-        match = pattern_new.match(entry.name)
-        if not match:
-            continue
-        try:
-            ts = int(entry.stat().st_mtime * 1000)
-        except OSError:
-            ts = 0
-        photos.append(
-            {
-                "id": ts,
-                "setup_id": safe_setup_id,
-                "camera_id": camera_id or "",
-                "ts": ts,
-                "path": f"/data/photos/{safe_setup_id}/{entry.name}",
-            }
-        )
-    return sorted(photos, key=lambda item: item["ts"])
+
+
+def _require_export_job(job_id: str) -> dict:
+    job = get_export_jobs().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="export job not found")
+    return job
@@ -18,10 +18,14 @@ from .config import (
 )
 from .db import list_cameras, mark_cameras_offline, upsert_camera
 from .realtime_updates import LiveManager
-from .scheduler import run_periodic
+from .worker_stderr import WorkerStderr
 
 CAMERA_CACHE: dict[str, dict[str, Any]] = {}
 LIVE_MANAGER: Optional[LiveManager] = None
+WATCH_OUTPUT_LIMIT = 1024 * 1024
+# Backoff between --watch attempts; --list polling covers the time in between.
+WATCH_RETRY_MIN_SEC = 30
+WATCH_RETRY_MAX_SEC = 600
 
 
 def register_live_manager(manager: LiveManager) -> None:
@@ -49,11 +53,61 @@ async def broadcast_camera_devices() -> None:
 
 
 async def camera_discovery_loop() -> None:
-    last_payload: Optional[str] = None
-
-    async def work() -> None:
-        nonlocal last_payload
-        devices = await asyncio.to_thread(_scan_camera_devices)
+    """Keep the camera table in sync with the devices reported by the worker.
+
+    A long-lived ``--watch`` worker prints a device snapshot only when devices change.
+    While watching is unavailable the worker is polled with ``--list`` every
+    CAMERA_SCAN_INTERVAL_SEC, and ``--watch`` is retried with a growing backoff.
+    """
+    sync = _DeviceSync()
+    retry_sec = WATCH_RETRY_MIN_SEC
+    while True:
+        command = _resolve_worker_command()
+        watched = False
+        if command:
+            try:
+                watched = await _watch_camera_devices(command, sync)
+            except Exception as exc:
+                log_event("loop.error", loop="camera_watch", error=str(exc))
+        if watched:
+            retry_sec = WATCH_RETRY_MIN_SEC
+            await asyncio.sleep(max(1, POLL_INTERVALS.camera_scan_sec))
+            continue
+        log_event("cameras.watch_unavailable", retry_sec=retry_sec)
+        await _poll_camera_devices(sync, retry_sec)
+        retry_sec = min(retry_sec * 2, WATCH_RETRY_MAX_SEC)
+
+
+async def _poll_camera_devices(sync: _DeviceSync, duration_sec: float) -> None:
+    """Scan with ``--list`` every CAMERA_SCAN_INTERVAL_SEC for about ``duration_sec``."""
+    deadline = time.monotonic() + duration_sec
+    while True:
+        try:
+            devices = await asyncio.to_thread(_scan_camera_devices_worker)
+            await sync.apply(devices)
+        except Exception as exc:
+            log_event("loop.error", loop="camera_discovery", error=str(exc))
+        interval = max(1, float(POLL_INTERVALS.camera_scan_sec))
+        if time.monotonic() + interval > deadline:
+            return
+        await asyncio.sleep(interval)
+
+
+class _DeviceSync:
+    """Writes device snapshots to the DB, cache and live clients only when something changed."""
+    def __init__(self) -> None:
+        self._last_key: Optional[str] = None
+        self._last_payload: Optional[str] = None
+        self.devices: list[dict[str, Any]] = []
+
+    async def apply(self, devices: list[dict[str, Any]]) -> None:
+        key = json.dumps(devices, sort_keys=True)
+        # Resets and deleted rows diverge from the snapshot without a device change.
+        if key == self._last_key and not _needs_resync(devices):
+            return
+        self._last_key = key
+        self.devices = devices
+        _log_scan_result(devices)
         active_ids: set[str] = set()
         for device in devices:
             active_ids.add(device["camera_id"])
@@ -71,16 +125,83 @@ async def camera_discovery_loop() -> None:
         if LIVE_MANAGER:
             payload = {"t": "cameraDevices", "devices": list_camera_devices()}
             payload_json = json.dumps(payload, sort_keys=True)
-            if payload_json != last_payload:
+            if payload_json != self._last_payload:
                 await LIVE_MANAGER.broadcast_all(payload)
-                last_payload = payload_json
+                self._last_payload = payload_json
 
-    await run_periodic(
-        "camera_discovery",
-        lambda: POLL_INTERVALS.camera_scan_sec,
-        work,
-        min_sleep_sec=1,
-    )
+
+async def _watch_camera_devices(command: list[str], sync: _DeviceSync) -> bool:
+    """Follow ``--watch`` snapshots; False if the worker does not support watching."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            "--watch",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=WATCH_OUTPUT_LIMIT,
+        )
+    except Exception as exc:
+        log_event("cameras.worker_failed", error=str(exc))
+        return False
+    log_event("cameras.watch_started", path=command[0])
+    stderr = WorkerStderr("cameras.watch_stderr")
+    stderr.start(process.stderr)
+    snapshots = 0
+    try:
+        while True:
+            try:
+                line: Optional[bytes] = await asyncio.wait_for(
+                    process.stdout.readline(),
+                    timeout=max(1, POLL_INTERVALS.camera_scan_sec),
+                )
+            except asyncio.TimeoutError:
+                line = None
+            except (ValueError, asyncio.LimitOverrunError) as exc:
+                # Line over WATCH_OUTPUT_LIMIT: the reader drops it and stays usable.
+                log_event("loop.error", loop="camera_watch", error=str(exc))
+                continue
+            if line == b"":
+                break
+            try:
+                if line is None:
+                    if snapshots:
+                        await sync.apply(sync.devices)
+                    continue
+                devices = _parse_worker_devices(line.decode("utf-8", errors="ignore"))
+                if devices is None:
+                    continue
+                snapshots += 1
+                await sync.apply(devices)
+            except Exception as exc:
+                log_event("loop.error", loop="camera_watch", error=str(exc))
+    finally:
+        await _stop_watcher(process)
+    await stderr.drain(timeout=1)
+    log_event("cameras.watch_ended", code=process.returncode, snapshots=snapshots, stderr=stderr.text())
+    return snapshots > 0
+
+
+async def _stop_watcher(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+    try:
+        process.terminate()
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(process.wait(), timeout=1)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+def _needs_resync(devices: list[dict[str, Any]]) -> bool:
+    active_ids = {device["camera_id"] for device in devices}
+    if set(CAMERA_CACHE) != active_ids:
+        return True
+    online_ids = {row["camera_id"] for row in list_cameras() if row.get("status") == "online"}
+    return online_ids != active_ids
 
 
 def _refresh_cache(devices: list[dict[str, Any]]) -> None:
@@ -104,28 +225,17 @@ def _build_camera_payload(row: dict[str, Any]) -> dict[str, Any]:
     }
 
 
-def _scan_camera_devices() -> list[dict[str, Any]]:
-    devices = _scan_camera_devices_worker()
+def _log_scan_result(devices: list[dict[str, Any]]) -> None:
     usb_count = sum(1 for device in devices if device.get("port"))
-    internal_count = len(devices) - usb_count
     log_event(
         "cameras.scan_result",
         source="worker",
         total=len(devices),
         usb=usb_count,
-        internal=internal_count,
+        internal=len(devices) - usb_count,
     )
     if not devices:
         log_event("cameras.scan_empty", source="worker")
-    else:
-        log_event(
-            "cameras.scan_summary",
-            source="worker",
-            total=len(devices),
-            usb=usb_count,
-            internal=internal_count,
-        )
-    return devices
 
 
 def _scan_camera_devices_worker() -> list[dict[str, Any]]:
@@ -135,11 +245,15 @@ def _scan_camera_devices_worker() -> list[dict[str, Any]]:
     output = _run_worker(command + ["--list"])
     if not output:
         return []
+    return _parse_worker_devices(output) or []
+
+
+def _parse_worker_devices(output: str) -> Optional[list[dict[str, Any]]]:
     try:
         data = json.loads(output)
     except json.JSONDecodeError as exc:
         log_event("cameras.worker_bad_json", error=str(exc))
-        return []
+        return None
     if isinstance(data, dict):
         data = [data]
     devices: list[dict[str, Any]] = []
@@ -182,13 +296,11 @@ def _resolve_worker_command() -> Optional[list[str]]:
     if CAMERA_WORKER_PATH:
         path = Path(CAMERA_WORKER_PATH)
         if path.exists():
-            log_event("cameras.worker_path", path=str(path))
             return [str(path)]
         log_event("cameras.worker_missing", path=str(path))
         return None
     for candidate in CAMERA_WORKER_CANDIDATES:
         if candidate.exists():
-            log_event("cameras.worker_found", path=str(candidate))
             return [str(candidate)]
     log_event(
         "cameras.worker_missing",
@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import time
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
 
 from fastapi import HTTPException
@@ -10,12 +11,16 @@ from starlette.responses import Response, StreamingResponse
 
 from .config import (
     DEFAULT_PHOTO_INTERVAL_MINUTES,
+    PHOTO_CAPTURE_GROUP_WINDOW_SEC,
     PHOTOS_DIR,
     POLL_INTERVALS,
     log_event,
 )
-from .camera_worker_manager import get_camera_worker_manager
+from .camera_worker_manager import MJPEG_BOUNDARY, CameraFrame, get_camera_worker_manager
 from .db import get_camera, get_setup, list_setups
+from .photo_derivatives import get_photo_derivatives
+from .photo_index import photo_relative_path, photo_url, record_photo
+from .photo_writer import get_photo_writer
 from .utils.paths import resolve_under, validate_identifier
 from .scheduler import run_periodic
 
@@ -29,51 +34,77 @@ async def stream_camera(setup_id: str) -> StreamingResponse:
     async def frame_generator():
         try:
             while True:
-                frame_bytes = await queue.get()
-                if frame_bytes is None:
+                frame = await queue.get()
+                if frame is None:
                     break
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n"
-                    + frame_bytes
-                    + b"\r\n"
-                )
+                yield frame.multipart_chunk()
         finally:
             await manager.unsubscribe(device_id, queue)
 
     return StreamingResponse(
         frame_generator(),
-        media_type="multipart/x-mixed-replace; boundary=frame",
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
     )
 
 
 async def snapshot_camera(setup_id: str) -> Response:
     camera = _get_camera_for_setup(setup_id)
     device_id = _get_camera_device_id(camera)
-    frame_bytes = await get_camera_worker_manager().get_frame(device_id, timeout_sec=2.5)
-    if frame_bytes is None:
+    frame = await get_camera_worker_manager().get_frame(device_id, timeout_sec=2.5)
+    if frame is None:
         raise HTTPException(status_code=502, detail="camera frame unavailable")
-    return Response(content=frame_bytes, media_type="image/jpeg")
+    return Response(content=frame.payload, media_type="image/jpeg")
 
 
 async def capture_photo_now(setup_id: str, reason: str = "manual") -> dict:
     camera = _get_camera_for_setup(setup_id)
     device_id = _get_camera_device_id(camera)
-    frame_bytes = await get_camera_worker_manager().get_frame(device_id, timeout_sec=2.5)
-    if frame_bytes is None:
-        raise HTTPException(status_code=502, detail="camera capture failed")
-    result = _save_frame(setup_id, camera, frame_bytes)
-    if not result:
+    frame = await get_camera_worker_manager().get_frame(device_id, timeout_sec=2.5)
+    if frame is None:
         raise HTTPException(status_code=502, detail="camera capture failed")
+    result, _ = await _save_frame(setup_id, camera, frame)
     log_event("camera.capture", setup_id=setup_id, camera_id=camera["camera_id"], reason=reason)
     return {"ok": True, "photo": result}
 
 
+async def capture_shared_photo(setup_ids: list[str], reason: str = "interval") -> dict[str, bool]:
+    """Grab one frame and store it for all given setups, which share one camera.
+
+    The first photo is written, the others are hard links to it.
+    """
+    camera = _get_camera_for_setup(setup_ids[0])
+    device_id = _get_camera_device_id(camera)
+    frame = await get_camera_worker_manager().get_frame(device_id, timeout_sec=2.5)
+    if frame is None:
+        raise HTTPException(status_code=502, detail="camera capture failed")
+    saved: dict[str, bool] = {}
+    source: Optional[Path] = None
+    for setup_id in setup_ids:
+        try:
+            _, path = await _save_frame(setup_id, camera, frame, link_from=source)
+        except HTTPException as exc:
+            log_event("camera.capture_failed", setup_id=setup_id, error=exc.detail)
+            saved[setup_id] = False
+            continue
+        source = source or path
+        saved[setup_id] = True
+    log_event(
+        "camera.capture",
+        setup_ids=[setup_id for setup_id, ok in saved.items() if ok],
+        camera_id=camera["camera_id"],
+        reason=reason,
+    )
+    return saved
+
+
 async def photo_capture_loop() -> None:
     next_due_by_setup: dict[str, int] = {}
 
     async def work() -> None:
         now_ms = int(time.time() * 1000)
+        window_ms = PHOTO_CAPTURE_GROUP_WINDOW_SEC * 1000
+        intervals: dict[str, int] = {}
+        by_camera: dict[str, list[str]] = {}
         for setup in list_setups():
             setup_id = setup["setup_id"]
             camera_id = setup.get("camera_id")
@@ -88,21 +119,25 @@ async def photo_capture_loop() -> None:
             if setup_id not in next_due_by_setup:
                 next_due_by_setup[setup_id] = now_ms + interval_ms
                 continue
-            next_due = next_due_by_setup.get(setup_id, 0)
-            if now_ms < next_due:
+            intervals[setup_id] = interval_ms
+            by_camera.setdefault(camera_id, []).append(setup_id)
+        groups = []
+        for setup_ids in by_camera.values():
+            if not any(now_ms >= next_due_by_setup[setup_id] for setup_id in setup_ids):
                 continue
-            try:
-                await capture_photo_now(setup_id, reason="interval")
-            except HTTPException:
-                next_due = next_due + interval_ms
+            # Setups due shortly afterwards take the same frame instead of a second grab.
+            groups.append([setup_id for setup_id in setup_ids if next_due_by_setup[setup_id] - now_ms <= window_ms])
+        results = await asyncio.gather(
+            *(capture_shared_photo(setup_ids) for setup_ids in groups), return_exceptions=True
+        )
+        for setup_ids, result in zip(groups, results):
+            if isinstance(result, BaseException) and not isinstance(result, HTTPException):
+                log_event("loop.error", loop="photo_capture", error=str(result))
+            for setup_id in setup_ids:
+                next_due = next_due_by_setup[setup_id] + intervals[setup_id]
                 if next_due <= now_ms:
-                    next_due = now_ms + interval_ms
+                    next_due = now_ms + intervals[setup_id]
                 next_due_by_setup[setup_id] = next_due
-                continue
-            next_due = next_due + interval_ms
-            if next_due <= now_ms:
-                next_due = now_ms + interval_ms
-            next_due_by_setup[setup_id] = next_due
 
     await run_periodic(
         "photo_capture",
@@ -143,17 +178,28 @@ def _get_camera_device_id(camera: dict) -> str:
     return device_id
 
 
-def _save_frame(setup_id: str, camera: dict, frame_bytes: bytes) -> Optional[dict]:
+async def _save_frame(
+    setup_id: str,
+    camera: dict,
+    frame: CameraFrame,
+    link_from: Optional[Path] = None,
+) -> tuple[dict, Path]:
     safe_setup_id = validate_identifier(setup_id, "setup_id")
-    ts = int(time.time() * 1000)
+    # The worker's capture timestamp is authoritative; cached frames may be up to
+    # CAMERA_FRAME_MAX_AGE_SEC old when they are saved.
+    ts = int(frame.captured_time() * 1000)
     stamp = datetime.fromtimestamp(ts / 1000).strftime("%Y-%m-%d_%H-%M-%S")
-    folder = resolve_under(PHOTOS_DIR, safe_setup_id)
-    folder.mkdir(parents=True, exist_ok=True)
     filename = f"{safe_setup_id}_{stamp}.jpg"
-    path = folder / filename
-    path.write_bytes(frame_bytes)
-    return {
+    path = resolve_under(PHOTOS_DIR, photo_relative_path(safe_setup_id, filename))
+    if link_from:
+        await get_photo_writer().link(link_from, path, frame.payload)
+    else:
+        await get_photo_writer().write(path, frame.payload)
+    relative_path = record_photo(safe_setup_id, camera.get("camera_id"), ts, path, len(frame.payload))
+    get_photo_derivatives().schedule(path)
+    result = {
         "ts": ts,
-        "path": f"/data/photos/{safe_setup_id}/{filename}",
+        "path": photo_url(relative_path),
         "cameraId": camera.get("camera_id"),
     }
+    return result, path
@@ -1,58 +1,185 @@
 from __future__ import annotations
 
 import asyncio
-import subprocess
+import json
+import struct
 import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Optional
 
 from fastapi import HTTPException
 
 from .config import (
+    CAMERA_DEMAND_LEASE_SEC,
+    CAMERA_CAPTURE_JPEG_QUALITY,
+    CAMERA_FRAME_MAX_AGE_SEC,
+    CAMERA_PREVIEW_JPEG_QUALITY,
+    CAMERA_PREVIEW_WIDTH,
+    CAMERA_WORKER_IDLE_LINGER_SEC,
     CAMERA_WORKER_CANDIDATES,
     CAMERA_WORKER_MAX_PER_DEVICE,
     CAMERA_WORKER_MAX_TOTAL,
     CAMERA_WORKER_PATH,
+    LIVE_MAX_FPS,
+    LIVE_MIN_FPS,
     log_event,
 )
+from .pubsub import CLIENT_ID, get_pubsub, is_acquisition_owner
+from .utils.latency import LatencyStats
+from .worker_stderr import WorkerStderr
 
+CAMERA_DEMAND_TOPIC = "camera/demand"
 WORKER_MAGIC = b"FRAM"
 WORKER_HEADER_LEN = 32
 WORKER_VERSION = 1
+# Optional header extension: u32 id of the settings message the frame was encoded with.
+WORKER_HEADER_CONFIG_LEN = 36
+PROFILE_PREVIEW = "preview"
+PROFILE_CAPTURE = "capture"
+# Relayed frames on the pub/sub frames topic: full/preview marker, seq, capture time (ms).
+_RELAY_HEADER = struct.Struct("<cQQ")
+_RELAY_FULL = b"F"
+_RELAY_PREVIEW = b"P"
+MJPEG_BOUNDARY = "frame"
+_MJPEG_PART_HEADER = f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n\r\n".encode("ascii")
+
+
+@dataclass(eq=False)
+class CameraFrame:
+    """One JPEG frame shared by reference between all subscribers of a device."""
+    payload: bytes
+    received_at: float = field(default_factory=time.time)
+    seq: Optional[int] = None
+    captured_at: Optional[float] = None
+    config_id: Optional[int] = None
+    preview: bool = False
+    _multipart: Optional[bytes] = field(default=None, repr=False)
+
+    def multipart_chunk(self) -> bytes:
+        """MJPEG part for this frame, rendered once and reused by every viewer."""
+        if self._multipart is None:
+            self._multipart = b"".join((_MJPEG_PART_HEADER, self.payload, b"\r\n"))
+        return self._multipart
+
+    def age_sec(self) -> float:
+        return time.time() - self.captured_time()
+
+    def captured_time(self) -> float:
+        """Capture time reported by the worker, falling back to the receive time."""
+        return self.captured_at if self.captured_at is not None else self.received_at
+
+
+@dataclass
+class FrameStats:
+    """Per-device delivery metrics based on the worker's sequence numbers and timestamps."""
+    last_seq: Optional[int] = None
+    worker_dropped: int = 0
+    subscriber_dropped: int = 0
+    latency: LatencyStats = field(default_factory=LatencyStats)
+
+    def record_frame(self, frame: CameraFrame, now: float) -> None:
+        if frame.seq is not None:
+            if self.last_seq is not None and frame.seq > self.last_seq + 1:
+                self.worker_dropped += frame.seq - self.last_seq - 1
+            self.last_seq = frame.seq
+        if frame.captured_at is not None:
+            self.latency.record(max(0.0, (now - frame.captured_at) * 1000))
+
+    def to_dict(self) -> dict:
+        return {
+            "lastSeq": self.last_seq,
+            "workerDropped": self.worker_dropped,
+            "subscriberDropped": self.subscriber_dropped,
+            **self.latency.to_dict(),
+        }
+
+
+@dataclass(frozen=True)
+class WorkerSettings:
+    """Encoding target sent to the worker as one JSON line on stdin."""
+    fps: int
+    width: int
+    quality: float
+
+    @property
+    def full_quality(self) -> bool:
+        return self.width == 0 and self.quality >= CAMERA_CAPTURE_JPEG_QUALITY
+
+
+CAPTURE_SETTINGS = WorkerSettings(fps=LIVE_MAX_FPS, width=0, quality=CAMERA_CAPTURE_JPEG_QUALITY)
+PREVIEW_SETTINGS = WorkerSettings(fps=LIVE_MAX_FPS, width=CAMERA_PREVIEW_WIDTH, quality=CAMERA_PREVIEW_JPEG_QUALITY)
+IDLE_SETTINGS = WorkerSettings(fps=LIVE_MIN_FPS, width=0, quality=CAMERA_CAPTURE_JPEG_QUALITY)
+
+
+def desired_worker_settings(subscribers: int, captures: int) -> WorkerSettings:
+    """Captures need full frames; previews get capped size; idle workers run slowly at full quality."""
+    if captures:
+        return CAPTURE_SETTINGS
+    if subscribers:
+        return PREVIEW_SETTINGS
+    return IDLE_SETTINGS
 
 
 @dataclass
 class WorkerState:
     device_id: str
-    process: subprocess.Popen[bytes]
+    process: asyncio.subprocess.Process
     task: asyncio.Task[None]
-    subscribers: set[asyncio.Queue[Optional[bytes]]] = field(default_factory=set)
+    loop: asyncio.AbstractEventLoop
+    stderr: WorkerStderr
+    subscribers: set[asyncio.Queue[Optional[CameraFrame]]] = field(default_factory=set)
     last_access: float = field(default_factory=time.time)
     last_error: Optional[str] = None
     frames_sent: int = 0
+    idle_handle: Optional[asyncio.TimerHandle] = None
+    captures: set[asyncio.Queue[Optional[CameraFrame]]] = field(default_factory=set)
+    settings: Optional[WorkerSettings] = None
+    config_id: int = 0
+    # First settings id from which frames are full quality; None while previews are requested.
+    full_since: Optional[int] = None
+    stats: FrameStats = field(default_factory=FrameStats)
 
 
 class CameraWorkerManager:
-    """Manages one camera worker per device and shared frame distribution."""
+    """Manages one camera worker per device and shared frame distribution.
+
+    Workers without subscribers keep running for ``CAMERA_WORKER_IDLE_LINGER_SEC`` so
+    that periodic snapshots and photos hit a warm camera. The newest frame per device is
+    cached and served directly by ``get_frame`` while it is fresh.
+    """
     def __init__(self) -> None:
         self._lock = threading.Lock()
         self._async_lock = asyncio.Lock()
         self._workers: dict[str, WorkerState] = {}
+        self._latest_frames: dict[str, CameraFrame] = {}
 
-    async def subscribe(self, device_id: str) -> asyncio.Queue[Optional[bytes]]:
+    async def subscribe(
+        self, device_id: str, profile: str = PROFILE_PREVIEW
+    ) -> asyncio.Queue[Optional[CameraFrame]]:
         async with self._async_lock:
             with self._lock:
                 state = self._workers.get(device_id)
-                if not state:
-                    state = self._start_worker(device_id)
-                queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=1)
+                if state and state.task.done():
+                    # Worker exited while lingering; start a fresh one.
+                    self._workers.pop(device_id, None)
+                    state = None
+            if not state:
+                state = await self._start_worker(device_id)
+            with self._lock:
+                queue: asyncio.Queue[Optional[CameraFrame]] = asyncio.Queue(maxsize=1)
                 state.subscribers.add(queue)
+                if profile == PROFILE_CAPTURE:
+                    state.captures.add(queue)
                 state.last_access = time.time()
-                return queue
+                if state.idle_handle:
+                    state.idle_handle.cancel()
+                    state.idle_handle = None
+            self._apply_settings(state)
+            return queue
 
-    async def unsubscribe(self, device_id: str, queue: asyncio.Queue[Optional[bytes]]) -> None:
+    async def unsubscribe(self, device_id: str, queue: asyncio.Queue[Optional[CameraFrame]]) -> None:
         state: Optional[WorkerState] = None
         async with self._async_lock:
             with self._lock:
@@ -60,15 +187,28 @@ class CameraWorkerManager:
                 if not state:
                     return
                 state.subscribers.discard(queue)
+                state.captures.discard(queue)
                 state.last_access = time.time()
-                if state.subscribers:
-                    return
-                self._workers.pop(device_id, None)
+                keep_running = bool(state.subscribers) or (
+                    CAMERA_WORKER_IDLE_LINGER_SEC > 0 and not state.task.done()
+                )
+                if keep_running and not state.subscribers and state.idle_handle is None:
+                    state.idle_handle = state.loop.call_later(
+                        CAMERA_WORKER_IDLE_LINGER_SEC, self._stop_idle_worker, state
+                    )
+                if not keep_running:
+                    self._workers.pop(device_id, None)
+            if keep_running:
+                self._apply_settings(state)
+                return
         if state:
             self._stop_worker_state(state, reason="last-subscriber-left")
 
-    async def get_frame(self, device_id: str, timeout_sec: float = 2.5) -> Optional[bytes]:
-        queue = await self.subscribe(device_id)
+    async def get_frame(self, device_id: str, timeout_sec: float = 2.5) -> Optional[CameraFrame]:
+        cached = self._latest_frames.get(device_id)
+        if cached and not cached.preview and cached.age_sec() <= CAMERA_FRAME_MAX_AGE_SEC:
+            return cached
+        queue = await self.subscribe(device_id, profile=PROFILE_CAPTURE)
         try:
             frame = await asyncio.wait_for(queue.get(), timeout=timeout_sec)
             return frame
@@ -80,6 +220,7 @@ class CameraWorkerManager:
     def stop_workers_for_device(self, device_id: str) -> None:
         with self._lock:
             state = self._workers.pop(device_id, None)
+            self._latest_frames.pop(device_id, None)
         if state:
             self._stop_worker_state(state, reason="stop-device")
 
@@ -87,12 +228,14 @@ class CameraWorkerManager:
         with self._lock:
             states = list(self._workers.values())
             self._workers.clear()
+            self._latest_frames.clear()
         for state in states:
             self._stop_worker_state(state, reason="reset")
 
     def get_health(self) -> dict:
         with self._lock:
             workers = list(self._workers.values())
+            latest = dict(self._latest_frames)
         details = [
             {
                 "deviceId": state.device_id,
@@ -100,6 +243,12 @@ class CameraWorkerManager:
                 "framesSent": state.frames_sent,
                 "lastAccess": int(state.last_access * 1000),
                 "lastError": state.last_error,
+                "idle": state.idle_handle is not None,
+                "latestFrameAgeMs": _frame_age_ms(latest.get(state.device_id)),
+                "settings": asdict(state.settings) if state.settings else None,
+                **state.stats.to_dict(),
+                "stderrLines": state.stderr.total_lines,
+                "stderrTail": state.stderr.tail(10),
             }
             for state in workers
         ]
@@ -109,17 +258,41 @@ class CameraWorkerManager:
             "subscriberCount": sum(item["subscribers"] for item in details),
         }
 
-    def _start_worker(self, device_id: str) -> WorkerState:
-        if self._count_workers() >= CAMERA_WORKER_MAX_TOTAL:
-            log_event("camera.worker_limit_total", active=self._count_workers())
+    async def _start_worker(self, device_id: str) -> WorkerState:
+        with self._lock:
+            evicted = self._pop_idle_worker() if self._count_workers() >= CAMERA_WORKER_MAX_TOTAL else None
+            active = self._count_workers()
+            active_for_device = self._count_workers_for_device(device_id)
+        if evicted:
+            self._stop_worker_state(evicted, reason="evicted")
+        if active >= CAMERA_WORKER_MAX_TOTAL:
+            log_event("camera.worker_limit_total", active=active)
             raise HTTPException(status_code=429, detail="camera worker limit reached")
-        if self._count_workers_for_device(device_id) >= CAMERA_WORKER_MAX_PER_DEVICE:
-            log_event("camera.worker_limit_device", device_id=device_id, active=1)
+        if active_for_device >= CAMERA_WORKER_MAX_PER_DEVICE:
+            log_event("camera.worker_limit_device", device_id=device_id, active=active_for_device)
             raise HTTPException(status_code=429, detail="camera worker limit reached")
-        process = self._open_worker_process(device_id)
-        task = asyncio.create_task(self._pump_frames(device_id, process))
-        state = WorkerState(device_id=device_id, process=process, task=task)
-        self._workers[device_id] = state
+        process = await self._open_worker_process(device_id)
+        stderr = WorkerStderr("camera.worker_stderr", device_id=device_id)
+        stderr.start(process.stderr)
+        task = asyncio.create_task(self._pump_frames(device_id, process, stderr))
+        state = WorkerState(
+            device_id=device_id,
+            process=process,
+            task=task,
+            loop=asyncio.get_running_loop(),
+            stderr=stderr,
+        )
+        with self._lock:
+            self._workers[device_id] = state
+        return state
+
+    def _pop_idle_worker(self) -> Optional[WorkerState]:
+        """Remove the lingering worker without subscribers that was used least recently."""
+        idle = [state for state in self._workers.values() if not state.subscribers]
+        if not idle:
+            return None
+        state = min(idle, key=lambda item: item.last_access)
+        self._workers.pop(state.device_id, None)
         return state
 
     def _count_workers(self) -> int:
@@ -128,7 +301,7 @@ class CameraWorkerManager:
     def _count_workers_for_device(self, device_id: str) -> int:
         return 1 if device_id in self._workers else 0
 
-    def _open_worker_process(self, device_id: str) -> subprocess.Popen[bytes]:
+    async def _open_worker_process(self, device_id: str) -> asyncio.subprocess.Process:
         if not device_id:
             raise HTTPException(status_code=404, detail="camera device id missing")
         command = _resolve_worker_command()
@@ -136,19 +309,24 @@ class CameraWorkerManager:
             raise HTTPException(status_code=503, detail="camera worker unavailable")
         log_event("camera.worker_start", device_id=device_id)
         try:
-            return subprocess.Popen(
-                command + ["--device", device_id],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            return await asyncio.create_subprocess_exec(
+                *command,
+                "--device",
+                device_id,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
         except Exception as exc:
             log_event("camera.worker_spawn_failed", error=str(exc))
             raise HTTPException(status_code=503, detail="camera worker failed to start") from exc
 
-    async def _pump_frames(self, device_id: str, process: subprocess.Popen[bytes]) -> None:
+    async def _pump_frames(
+        self, device_id: str, process: asyncio.subprocess.Process, stderr: WorkerStderr
+    ) -> None:
         try:
             while True:
-                frame = await asyncio.to_thread(_read_worker_frame_bytes, process)
+                frame = await _read_worker_frame(process, stderr)
                 if frame is None:
                     self._set_worker_error(device_id, "frame unavailable")
                     await self._notify_end(device_id)
@@ -161,24 +339,25 @@ class CameraWorkerManager:
             self._set_worker_error(device_id, str(exc))
             await self._notify_end(device_id)
 
-    async def _broadcast_frame(self, device_id: str, frame: bytes) -> None:
+    async def _broadcast_frame(self, device_id: str, frame: CameraFrame) -> None:
         with self._lock:
             state = self._workers.get(device_id)
             if not state:
                 return
-            subscribers = list(state.subscribers)
+            if frame.config_id is not None:
+                frame.preview = state.full_since is None or frame.config_id < state.full_since
+            # Capture subscribers wait for a frame encoded with full quality settings.
+            subscribers = [
+                queue for queue in state.subscribers if not (frame.preview and queue in state.captures)
+            ]
             state.last_access = time.time()
             state.frames_sent += 1
-        for queue in subscribers:
-            if queue.full():
-                try:
-                    queue.get_nowait()
-                except asyncio.QueueEmpty:
-                    pass
-            try:
-                queue.put_nowait(frame)
-            except asyncio.QueueFull:
-                pass
+            state.stats.record_frame(frame, state.last_access)
+            self._latest_frames[device_id] = frame
+        dropped = sum(1 for queue in subscribers if not _offer_frame(queue, frame))
+        if dropped:
+            with self._lock:
+                state.stats.subscriber_dropped += dropped
 
     async def _notify_end(self, device_id: str) -> None:
         with self._lock:
@@ -186,6 +365,11 @@ class CameraWorkerManager:
             if not state:
                 return
             subscribers = list(state.subscribers)
+            if not subscribers:
+                self._workers.pop(device_id, None)
+                if state.idle_handle:
+                    state.idle_handle.cancel()
+                    state.idle_handle = None
         for queue in subscribers:
             try:
                 queue.put_nowait(None)
@@ -198,17 +382,55 @@ class CameraWorkerManager:
             if state:
                 state.last_error = error
 
+    def _apply_settings(self, state: WorkerState) -> None:
+        with self._lock:
+            settings = desired_worker_settings(len(state.subscribers), len(state.captures))
+            if settings == state.settings:
+                return
+            stdin = state.process.stdin
+            if stdin is None or stdin.is_closing():
+                return
+            state.config_id += 1
+            message = {"id": state.config_id, **asdict(settings)}
+            try:
+                stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+            except (ConnectionError, RuntimeError) as exc:
+                log_event("camera.worker_control_failed", device_id=state.device_id, error=str(exc))
+                return
+            if not settings.full_quality:
+                state.full_since = None
+            elif state.full_since is None:
+                state.full_since = state.config_id
+            state.settings = settings
+        log_event("camera.worker_settings", device_id=state.device_id, config_id=state.config_id, **asdict(settings))
+
+    def _stop_idle_worker(self, state: WorkerState) -> None:
+        with self._lock:
+            state.idle_handle = None
+            if state.subscribers or self._workers.get(state.device_id) is not state:
+                return
+            self._workers.pop(state.device_id, None)
+        self._stop_worker_state(state, reason="idle")
+
     def _stop_worker_state(self, state: WorkerState, reason: str) -> None:
         log_event("camera.worker_stop", device_id=state.device_id, reason=reason)
+        try:
+            running_loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is state.loop:
+            self._stop_worker_on_loop(state)
+        elif not state.loop.is_closed():
+            state.loop.call_soon_threadsafe(self._stop_worker_on_loop, state)
+
+    def _stop_worker_on_loop(self, state: WorkerState) -> None:
+        if state.idle_handle:
+            state.idle_handle.cancel()
+            state.idle_handle = None
         if not state.task.done():
             state.task.cancel()
-        process = state.process
-        if process.poll() is None:
-            process.terminate()
-            try:
-                process.wait(timeout=1)
-            except Exception:
-                process.kill()
+        if state.process.returncode is None:
+            asyncio.create_task(_terminate_process(state.process))
 
 
 def _resolve_worker_command() -> Optional[list[str]]:
@@ -228,12 +450,16 @@ def _resolve_worker_command() -> Optional[list[str]]:
     return None
 
 
-def _read_worker_frame_bytes(process: subprocess.Popen[bytes]) -> Optional[bytes]:
-    if process.stdout is None:
+async def _read_worker_frame(
+    process: asyncio.subprocess.Process, stderr: Optional[WorkerStderr] = None
+) -> Optional[CameraFrame]:
+    stdout = process.stdout
+    if stdout is None:
         return None
-    header = _read_exact(process, WORKER_HEADER_LEN)
-    if not header:
-        _log_worker_stderr(process, event="camera.worker_stream_ended")
+    try:
+        header = await stdout.readexactly(WORKER_HEADER_LEN)
+    except asyncio.IncompleteReadError:
+        await _log_worker_stderr(stderr, event="camera.worker_stream_ended")
         return None
     if header[:4] != WORKER_MAGIC:
         log_event("camera.worker_bad_magic")
@@ -243,50 +469,277 @@ def _read_worker_frame_bytes(process: subprocess.Popen[bytes]) -> Optional[bytes
         log_event("camera.worker_bad_version", version=version)
         return None
     header_len = int.from_bytes(header[6:8], "little")
-    if header_len > WORKER_HEADER_LEN:
-        _read_exact(process, header_len - WORKER_HEADER_LEN)
+    seq = int.from_bytes(header[8:16], "little")
+    timestamp_ms = int.from_bytes(header[16:24], "little")
     device_len = int.from_bytes(header[24:26], "little")
     mime_len = int.from_bytes(header[26:28], "little")
     payload_len = int.from_bytes(header[28:32], "little")
-    _read_exact(process, device_len)
-    mime = _read_exact(process, mime_len)
-    payload = _read_exact(process, payload_len)
+    config_id: Optional[int] = None
+    try:
+        extra = max(0, header_len - WORKER_HEADER_LEN)
+        if header_len >= WORKER_HEADER_CONFIG_LEN:
+            # The device id and unknown header extensions are not used; read them in one go.
+            rest = await stdout.readexactly(extra + device_len)
+            config_id = int.from_bytes(rest[:4], "little")
+        elif extra + device_len:
+            await stdout.readexactly(extra + device_len)
+        mime = await stdout.readexactly(mime_len) if mime_len else b""
+        payload = await stdout.readexactly(payload_len) if payload_len else b""
+    except asyncio.IncompleteReadError:
+        await _log_worker_stderr(stderr, event="camera.worker_stream_ended")
+        return None
     if not payload:
-        _log_worker_stderr(process, event="camera.worker_empty_frame")
+        await _log_worker_stderr(stderr, event="camera.worker_empty_frame")
         return None
     if mime and mime != b"image/jpeg":
         log_event("camera.worker_unexpected_mime", mime=mime.decode(errors="ignore"))
-    return payload
+    return CameraFrame(
+        payload=payload,
+        seq=seq,
+        captured_at=timestamp_ms / 1000 if timestamp_ms else None,
+        config_id=config_id,
+    )
 
 
-def _read_exact(process: subprocess.Popen[bytes], size: int) -> bytes:
-    if size <= 0 or process.stdout is None:
-        return b""
-    buffer = bytearray()
-    while len(buffer) < size:
-        chunk = process.stdout.read(size - len(buffer))
-        if not chunk:
-            break
-        buffer.extend(chunk)
-    return bytes(buffer)
+async def _log_worker_stderr(stderr: Optional[WorkerStderr], event: str) -> None:
+    if stderr is None:
+        log_event(event)
+        return
+    # An exiting worker closes stderr right after stdout; wait briefly for its last lines.
+    await stderr.drain(timeout=1)
+    log_event(event, stderr=stderr.text())
 
 
-def _log_worker_stderr(process: subprocess.Popen[bytes], event: str) -> None:
-    if process.stderr is None:
-        log_event(event)
+async def _terminate_process(process: asyncio.subprocess.Process) -> None:
+    try:
+        process.terminate()
+    except ProcessLookupError:
         return
     try:
-        error = process.stderr.read().decode(errors="ignore").strip()
-    except Exception:
-        error = ""
-    log_event(event, stderr=error)
+        await asyncio.wait_for(process.wait(), timeout=1)
+    except asyncio.TimeoutError:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            return
+        await process.wait()
+
+
+def _frame_age_ms(frame: Optional[CameraFrame]) -> Optional[int]:
+    if frame is None:
+        return None
+    return int(frame.age_sec() * 1000)
+
+
+def camera_frames_topic(device_id: str) -> str:
+    return f"frames/{device_id}"
+
+
+@dataclass
+class RemoteDeviceState:
+    device_id: str
+    source: asyncio.Queue[bytes]
+    task: Optional[asyncio.Task[None]] = None
+    subscribers: set[asyncio.Queue[Optional[CameraFrame]]] = field(default_factory=set)
+    last_access: float = field(default_factory=time.time)
+    frames_received: int = 0
+    idle_handle: Optional[asyncio.TimerHandle] = None
+    captures: set[asyncio.Queue[Optional[CameraFrame]]] = field(default_factory=set)
+    stats: FrameStats = field(default_factory=FrameStats)
+
+
+class RemoteCameraFrameSource:
+    """Receives camera frames from the acquisition owner instead of spawning workers."""
+    def __init__(self) -> None:
+        self._devices: dict[str, RemoteDeviceState] = {}
+        self._latest_frames: dict[str, CameraFrame] = {}
+
+    async def subscribe(
+        self, device_id: str, profile: str = PROFILE_PREVIEW
+    ) -> asyncio.Queue[Optional[CameraFrame]]:
+        if not device_id:
+            raise HTTPException(status_code=404, detail="camera device id missing")
+        state = self._devices.get(device_id)
+        if not state:
+            source = get_pubsub().subscribe(camera_frames_topic(device_id), maxsize=1)
+            state = RemoteDeviceState(device_id=device_id, source=source)
+            state.task = asyncio.create_task(self._pump_frames(state))
+            self._devices[device_id] = state
+        queue: asyncio.Queue[Optional[CameraFrame]] = asyncio.Queue(maxsize=1)
+        state.subscribers.add(queue)
+        if profile == PROFILE_CAPTURE:
+            state.captures.add(queue)
+        _publish_demand(device_id, active=True, capture=bool(state.captures))
+        state.last_access = time.time()
+        if state.idle_handle:
+            state.idle_handle.cancel()
+            state.idle_handle = None
+        return queue
+
+    async def unsubscribe(self, device_id: str, queue: asyncio.Queue[Optional[CameraFrame]]) -> None:
+        state = self._devices.get(device_id)
+        if not state:
+            return
+        capture = bool(state.captures)
+        state.subscribers.discard(queue)
+        state.captures.discard(queue)
+        state.last_access = time.time()
+        if capture and not state.captures:
+            _publish_demand(device_id, active=True, capture=False)
+        if state.subscribers:
+            return
+        if CAMERA_WORKER_IDLE_LINGER_SEC > 0:
+            if state.idle_handle is None:
+                state.idle_handle = asyncio.get_running_loop().call_later(
+                    CAMERA_WORKER_IDLE_LINGER_SEC, self._drop_idle_device, state
+                )
+            return
+        self._drop_device(device_id)
+
+    async def get_frame(self, device_id: str, timeout_sec: float = 2.5) -> Optional[CameraFrame]:
+        cached = self._latest_frames.get(device_id)
+        if cached and not cached.preview and cached.age_sec() <= CAMERA_FRAME_MAX_AGE_SEC:
+            return cached
+        queue = await self.subscribe(device_id, profile=PROFILE_CAPTURE)
+        try:
+            return await asyncio.wait_for(queue.get(), timeout=timeout_sec)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            await self.unsubscribe(device_id, queue)
+
+    def stop_workers_for_device(self, device_id: str) -> None:
+        self._drop_device(device_id)
+
+    def reset_runtime(self) -> None:
+        for device_id in list(self._devices.keys()):
+            self._drop_device(device_id)
+        self._latest_frames.clear()
+
+    def get_health(self) -> dict:
+        details = [
+            {
+                "deviceId": state.device_id,
+                "subscribers": len(state.subscribers),
+                "framesSent": state.frames_received,
+                "lastAccess": int(state.last_access * 1000),
+                "lastError": None,
+                "idle": state.idle_handle is not None,
+                "latestFrameAgeMs": _frame_age_ms(self._latest_frames.get(state.device_id)),
+                "remote": True,
+                **state.stats.to_dict(),
+            }
+            for state in self._devices.values()
+        ]
+        return {
+            "workers": details,
+            "workerCount": len(details),
+            "subscriberCount": sum(item["subscribers"] for item in details),
+        }
+
+    def _drop_idle_device(self, state: RemoteDeviceState) -> None:
+        state.idle_handle = None
+        if state.subscribers or self._devices.get(state.device_id) is not state:
+            return
+        self._drop_device(state.device_id)
+
+    def _drop_device(self, device_id: str) -> None:
+        state = self._devices.pop(device_id, None)
+        self._latest_frames.pop(device_id, None)
+        if not state:
+            return
+        if state.idle_handle:
+            state.idle_handle.cancel()
+            state.idle_handle = None
+        if state.task:
+            state.task.cancel()
+        get_pubsub().unsubscribe(camera_frames_topic(device_id), state.source)
+        _publish_demand(device_id, active=False)
+        for queue in state.subscribers:
+            _offer_frame(queue, None)
+
+    async def _pump_frames(self, state: RemoteDeviceState) -> None:
+        renew_sec = CAMERA_DEMAND_LEASE_SEC / 3
+        while True:
+            try:
+                frame = await asyncio.wait_for(state.source.get(), timeout=renew_sec)
+            except asyncio.TimeoutError:
+                _publish_demand(state.device_id, active=True, capture=bool(state.captures))
+                continue
+            state.frames_received += 1
+            state.last_access = time.time()
+            if state.frames_received % 50 == 0:
+                _publish_demand(state.device_id, active=True, capture=bool(state.captures))
+            shared = decode_relay_frame(frame)
+            if shared:
+                state.stats.record_frame(shared, state.last_access)
+                self._latest_frames[state.device_id] = shared
+            else:
+                self._latest_frames.pop(state.device_id, None)
+            for queue in list(state.subscribers):
+                if shared and shared.preview and queue in state.captures:
+                    continue
+                if not _offer_frame(queue, shared):
+                    state.stats.subscriber_dropped += 1
+
+
+def encode_relay_frame(frame: CameraFrame) -> bytes:
+    header = _RELAY_HEADER.pack(
+        _RELAY_PREVIEW if frame.preview else _RELAY_FULL,
+        frame.seq or 0,
+        int(frame.captured_time() * 1000),
+    )
+    return b"".join((header, frame.payload))
+
+
+def decode_relay_frame(raw: bytes) -> Optional[CameraFrame]:
+    if len(raw) <= _RELAY_HEADER.size:
+        return None
+    marker, seq, captured_ms = _RELAY_HEADER.unpack_from(raw)
+    return CameraFrame(
+        payload=raw[_RELAY_HEADER.size:],
+        seq=seq or None,
+        captured_at=captured_ms / 1000,
+        preview=marker == _RELAY_PREVIEW,
+    )
+
+
+def _publish_demand(device_id: str, active: bool, capture: bool = False) -> None:
+    payload = {"deviceId": device_id, "client": CLIENT_ID, "active": active, "capture": capture}
+    get_pubsub().publish(CAMERA_DEMAND_TOPIC, json.dumps(payload).encode("utf-8"))
+
+
+def _offer_frame(queue: asyncio.Queue[Optional[CameraFrame]], frame: Optional[CameraFrame]) -> bool:
+    """Put ``frame`` into ``queue``, replacing an undelivered one; False if a frame was dropped."""
+    delivered = True
+    if queue.full():
+        try:
+            queue.get_nowait()
+            delivered = False
+        except asyncio.QueueEmpty:
+            pass
+    try:
+        queue.put_nowait(frame)
+    except asyncio.QueueFull:
+        return False
+    return delivered
 
 
 _MANAGER: Optional[CameraWorkerManager] = None
+_REMOTE_SOURCE: Optional[RemoteCameraFrameSource] = None
 
 
-def get_camera_worker_manager() -> CameraWorkerManager:
+def get_local_camera_worker_manager() -> CameraWorkerManager:
     global _MANAGER
     if not _MANAGER:
         _MANAGER = CameraWorkerManager()
     return _MANAGER
+
+
+def get_camera_worker_manager() -> CameraWorkerManager | RemoteCameraFrameSource:
+    global _REMOTE_SOURCE
+    if is_acquisition_owner():
+        return get_local_camera_worker_manager()
+    if not _REMOTE_SOURCE:
+        _REMOTE_SOURCE = RemoteCameraFrameSource()
+    return _REMOTE_SOURCE
@@ -9,6 +9,9 @@ PROJECT_DIR = BASE_DIR.parent
 DATA_DIR = PROJECT_DIR / "data"
 PHOTOS_DIR = DATA_DIR / "photos"
 DB_PATH = DATA_DIR / "sensorhub.db"
+EXPORTS_DIR = DATA_DIR / "exports"
+# Written after the first full photo index reconciliation; later starts skip the folder scan.
+PHOTO_INDEX_MARKER = DATA_DIR / "photo-index.done"
 DEFAULT_VALUE_INTERVAL_MINUTES = 30
 DEFAULT_PHOTO_INTERVAL_MINUTES = 720
 
@@ -60,6 +63,13 @@ CAMERA_WORKER_TIMEOUT_SEC = 10
 CAMERA_WORKER_PATH = os.getenv("CAMERA_WORKER_PATH", "")
 CAMERA_WORKER_MAX_PER_DEVICE = int(os.getenv("CAMERA_WORKER_MAX_PER_DEVICE", "1"))
 CAMERA_WORKER_MAX_TOTAL = int(os.getenv("CAMERA_WORKER_MAX_TOTAL", "6"))
+CAMERA_WORKER_IDLE_LINGER_SEC = _get_env_float("CAMERA_WORKER_IDLE_LINGER_SEC", 30)
+CAMERA_WORKER_STDERR_LINES = 50
+CAMERA_WORKER_STDERR_LOG_PER_MIN = 20
+CAMERA_FRAME_MAX_AGE_SEC = _get_env_float("CAMERA_FRAME_MAX_AGE_SEC", 1)
+CAMERA_PREVIEW_WIDTH = int(os.getenv("CAMERA_PREVIEW_WIDTH", "960"))
+CAMERA_PREVIEW_JPEG_QUALITY = _get_env_float("CAMERA_PREVIEW_JPEG_QUALITY", 0.7)
+CAMERA_CAPTURE_JPEG_QUALITY = 0.92
 CAMERA_WORKER_CANDIDATES = [
     PROJECT_DIR
     / "sensorhub-backend"
@@ -84,7 +94,41 @@ SERIAL_HANDSHAKE_TIMEOUT_SEC = 4.0
 LIVE_MIN_FPS = 5
 LIVE_MAX_FPS = 10
 LIVE_POLL_INTERVAL_SEC = POLL_INTERVALS.live_poll_sec
+LIVE_CLIENT_QUEUE_SIZE = int(os.getenv("LIVE_CLIENT_QUEUE_SIZE", "64"))
+LIVE_SEND_TIMEOUT_SEC = _get_env_float("LIVE_SEND_TIMEOUT_SEC", 5)
+LIVE_REPLAY_SIZE = int(os.getenv("LIVE_REPLAY_SIZE", "60"))
+LIVE_SSE_LOG_SIZE = int(os.getenv("LIVE_SSE_LOG_SIZE", "1000"))
+LIVE_SSE_KEEPALIVE_SEC = _get_env_float("LIVE_SSE_KEEPALIVE_SEC", 15)
+
+SENSORHUB_ROLE = os.getenv("SENSORHUB_ROLE", "standalone").strip().lower()
+if SENSORHUB_ROLE not in ("standalone", "owner", "api"):
+    raise ValueError(f"invalid SENSORHUB_ROLE: {SENSORHUB_ROLE}")
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "inprocess").strip().lower()
+if PUBSUB_BACKEND not in ("inprocess", "socket"):
+    raise ValueError(f"invalid PUBSUB_BACKEND: {PUBSUB_BACKEND}")
+# owner and api workers only see each other through the broker; a standalone process has nobody to talk to.
+if (PUBSUB_BACKEND == "socket") != (SENSORHUB_ROLE != "standalone"):
+    raise ValueError(f"SENSORHUB_ROLE={SENSORHUB_ROLE} does not work with PUBSUB_BACKEND={PUBSUB_BACKEND}")
+PUBSUB_BROKER_HOST = os.getenv("PUBSUB_BROKER_HOST", "127.0.0.1")
+PUBSUB_BROKER_PORT = int(os.getenv("PUBSUB_BROKER_PORT", "8765"))
+PUBSUB_MAX_BUFFER_BYTES = int(os.getenv("PUBSUB_MAX_BUFFER_BYTES", str(8 * 1024 * 1024)))
+CAMERA_DEMAND_LEASE_SEC = 15
 PHOTO_CAPTURE_POLL_INTERVAL_SEC = POLL_INTERVALS.photo_capture_poll_sec
+# Setups on the same camera due within this window share one frame.
+PHOTO_CAPTURE_GROUP_WINDOW_SEC = 5
+PHOTO_WRITER_THREADS = int(os.getenv("PHOTO_WRITER_THREADS", "2"))
+PHOTO_WRITER_QUEUE_SIZE = int(os.getenv("PHOTO_WRITER_QUEUE_SIZE", "16"))
+PHOTO_FSYNC = os.getenv("PHOTO_FSYNC", "file").strip().lower()
+if PHOTO_FSYNC not in ("none", "file", "full"):
+    raise ValueError(f"invalid PHOTO_FSYNC: {PHOTO_FSYNC}")
+PHOTO_DERIVATIVE_PROCESSES = int(os.getenv("PHOTO_DERIVATIVE_PROCESSES", "1"))
+# Longest edge in pixels per derivative size.
+PHOTO_DERIVATIVE_SIZES = {"small": 320, "medium": 1024}
+PHOTO_DERIVATIVE_JPEG_QUALITY = 80
+EXPORT_JOB_PROCESSES = int(os.getenv("EXPORT_JOB_PROCESSES", "2"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Finished jobs kept for status queries; their archives stay in the cache independently.
+EXPORT_JOB_HISTORY = 50
 
 def ensure_dirs() -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -11,6 +11,7 @@ from typing import Any, Iterable, Optional
 from .config import DB_PATH, DEFAULT_PHOTO_INTERVAL_MINUTES, DEFAULT_VALUE_INTERVAL_MINUTES, ensure_dirs
 
 _thread_local = threading.local()
+READING_COLUMNS = ("id", "setup_id", "node_id", "ts", "ph", "ec", "temp", "status_json")
 
 
 def _now_ms() -> int:
@@ -76,6 +77,19 @@ def init_db(reset: bool = False) -> None:
                 created_at INTEGER NOT NULL,
                 updated_at INTEGER NOT NULL
             );
+            CREATE TABLE IF NOT EXISTS photos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                setup_id TEXT NOT NULL,
+                camera_id TEXT,
+                ts INTEGER NOT NULL,
+                path TEXT NOT NULL UNIQUE,
+                size_bytes INTEGER,
+                created_at INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_photos_setup_ts ON photos (setup_id, ts);
+            CREATE INDEX IF NOT EXISTS idx_readings_setup_ts ON readings (setup_id, ts);
+            CREATE INDEX IF NOT EXISTS idx_readings_setup_id ON readings (setup_id, id);
+            CREATE INDEX IF NOT EXISTS idx_photos_setup_id ON photos (setup_id, id);
             """
         )
         _ensure_schema(conn)
@@ -85,7 +99,7 @@ def reset_db_contents() -> None:
     close_connections()
     with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
         conn.execute("PRAGMA foreign_keys=OFF;")
-        for table in ("readings", "setups", "nodes", "cameras", "calibration"):
+        for table in ("readings", "setups", "nodes", "cameras", "calibration", "photos"):
             conn.execute(f"DROP TABLE IF EXISTS {table}")
         try:
             conn.execute("DELETE FROM sqlite_sequence")
@@ -343,16 +357,23 @@ def insert_reading(
         )
 
 
-def list_readings(setup_id: str, limit: int = 500) -> list[dict[str, Any]]:
+def list_readings(
+    setup_id: str,
+    limit: int = 500,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+) -> list[dict[str, Any]]:
     with _get_conn() as conn:
         rows = conn.execute(
             """
             SELECT * FROM readings
             WHERE setup_id = ?
+              AND (? IS NULL OR ts >= ?)
+              AND (? IS NULL OR ts <= ?)
             ORDER BY ts DESC
             LIMIT ?
             """,
-            (setup_id, limit),
+            (setup_id, since, since, until, until, limit),
         ).fetchall()
     return [dict(row) for row in rows]
 
@@ -370,15 +391,160 @@ def list_all_readings(setup_id: str) -> list[dict[str, Any]]:
     return [dict(row) for row in rows]
 
 
-def iter_readings(setup_id: str, batch_size: int = 1000) -> Iterable[dict[str, Any]]:
+def iter_readings(
+    setup_id: str,
+    batch_size: int = 1000,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+) -> Iterable[dict[str, Any]]:
+    """Readings newest first, fetched in keyset-paginated batches.
+
+    Every batch is its own short query, so no read transaction stays open while a
+    slow client consumes a streamed export. The time window is part of the index
+    range, so small windows stay cheap on large tables.
+    """
+    upper = until
+    last_id: Optional[int] = None
+    while True:
+        clauses, params = _ts_range_clauses(setup_id, since, upper)
+        if last_id is not None:
+            clauses.append("(ts < ? OR id < ?)")
+            params.extend((upper, last_id))
+        with _get_conn() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT * FROM readings
+                WHERE {" AND ".join(clauses)}
+                ORDER BY ts DESC, id DESC
+                LIMIT ?
+                """,
+                (*params, batch_size),
+            ).fetchall()
+        for row in rows:
+            yield dict(row)
+        if len(rows) < batch_size:
+            return
+        upper, last_id = rows[-1]["ts"], rows[-1]["id"]
+
+
+def iter_reading_batches(
+    setup_id: str,
+    columns: list[str],
+    batch_size: int = 5000,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+) -> Iterable[list[tuple]]:
+    """Like ``iter_readings``, but yields batches of plain tuples holding only ``columns``.
+
+    Skips the ``sqlite3.Row`` and the dict built per row, which dominate large exports.
+    """
+    if any(name not in READING_COLUMNS for name in columns):
+        raise ValueError(f"unsupported reading columns: {columns}")
+    select = list(columns) + [name for name in ("ts", "id") if name not in columns]
+    ts_index, id_index = select.index("ts"), select.index("id")
+    width = len(columns)
+    upper = until
+    last_id: Optional[int] = None
+    while True:
+        clauses, params = _ts_range_clauses(setup_id, since, upper)
+        if last_id is not None:
+            clauses.append("(ts < ? OR id < ?)")
+            params.extend((upper, last_id))
+        with _get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(
+                f"""
+                SELECT {", ".join(select)} FROM readings
+                WHERE {" AND ".join(clauses)}
+                ORDER BY ts DESC, id DESC
+                LIMIT ?
+                """,
+                (*params, batch_size),
+            ).fetchall()
+        if rows:
+            yield rows if width == len(select) else [row[:width] for row in rows]
+        if len(rows) < batch_size:
+            return
+        upper, last_id = rows[-1][ts_index], rows[-1][id_index]
+
+
+def iter_readings_downsampled(
+    setup_id: str,
+    bucket_ms: int,
+    batch_size: int = 1000,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+) -> Iterable[dict[str, Any]]:
+    """One row per ``bucket_ms`` window, newest first, with averaged measurements.
+
+    ``ts`` is the bucket start; ``id``, ``node_id`` and ``status_json`` come from the
+    newest reading in the bucket (SQLite bare columns next to ``MAX(id)``). Each batch
+    groups only the ts range of its ``batch_size`` buckets, so every reading is read once.
+    """
+    upper = _max_reading_ts(setup_id, since, until)
+    while upper is not None:
+        lower = (upper // bucket_ms - batch_size + 1) * bucket_ms
+        clauses, params = _ts_range_clauses(setup_id, lower if since is None else max(lower, since), upper)
+        with _get_conn() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT (ts / ?) * ? AS bucket, MAX(id) AS id, setup_id, node_id, status_json,
+                       AVG(ph) AS ph, AVG(ec) AS ec, AVG(temp) AS temp, COUNT(*) AS samples
+                FROM readings
+                WHERE {" AND ".join(clauses)}
+                GROUP BY bucket
+                ORDER BY bucket DESC
+                """,
+                (bucket_ms, bucket_ms, *params),
+            ).fetchall()
+        for row in rows:
+            reading = dict(row)
+            reading["ts"] = reading.pop("bucket")
+            yield reading
+        if since is not None and lower <= since:
+            return
+        # Skips empty stretches between readings instead of walking them window by window.
+        upper = _max_reading_ts(setup_id, since, lower - 1)
+
+
+def _max_reading_ts(setup_id: str, since: Optional[int], until: Optional[int]) -> Optional[int]:
+    clauses, params = _ts_range_clauses(setup_id, since, until)
+    with _get_conn() as conn:
+        row = conn.execute(f"SELECT MAX(ts) FROM readings WHERE {' AND '.join(clauses)}", params).fetchone()
+    return row[0]
+
+
+def _ts_range_clauses(
+    setup_id: str, since: Optional[int], until: Optional[int]
+) -> tuple[list[str], list[Any]]:
+    clauses = ["setup_id = ?"]
+    params: list[Any] = [setup_id]
+    if since is not None:
+        clauses.append("ts >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("ts <= ?")
+        params.append(until)
+    return clauses, params
+
+
+def iter_photos(
+    setup_id: str,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    batch_size: int = 1000,
+) -> Iterable[dict[str, Any]]:
     with _get_conn() as conn:
         cursor = conn.execute(
             """
-            SELECT * FROM readings
+            SELECT * FROM photos
             WHERE setup_id = ?
-            ORDER BY ts DESC
+              AND (? IS NULL OR ts >= ?)
+              AND (? IS NULL OR ts <= ?)
+            ORDER BY ts ASC
             """,
-            (setup_id,),
+            (setup_id, since, since, until, until),
         )
         while True:
             batch = cursor.fetchmany(batch_size)
@@ -388,6 +554,49 @@ def iter_readings(setup_id: str, batch_size: int = 1000) -> Iterable[dict[str, A
                 yield dict(row)
 
 
+def get_export_marks(setup_ids: list[str]) -> dict[str, tuple[int, int]]:
+    """Highest reading and photo id per setup, 0 if there are none."""
+    marks: dict[str, tuple[int, int]] = {}
+    with _get_conn() as conn:
+        for setup_id in setup_ids:
+            reading = conn.execute("SELECT MAX(id) FROM readings WHERE setup_id = ?", (setup_id,)).fetchone()
+            photo = conn.execute("SELECT MAX(id) FROM photos WHERE setup_id = ?", (setup_id,)).fetchone()
+            marks[setup_id] = (int(reading[0] or 0), int(photo[0] or 0))
+    return marks
+
+
+def iter_rows_after(
+    table: str,
+    setup_id: str,
+    after_id: int,
+    upto_id: int,
+    batch_size: int = 1000,
+) -> Iterable[dict[str, Any]]:
+    """Rows of ``readings`` or ``photos`` with ``after_id < id <= upto_id``, oldest first.
+
+    Ids are AUTOINCREMENT and writes are serialized, so an id watermark never skips
+    a row that commits later. Cost depends on the rows in the range only.
+    """
+    if table not in ("readings", "photos"):
+        raise ValueError(f"unsupported table: {table}")
+    while after_id < upto_id:
+        with _get_conn() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT * FROM {table}
+                WHERE setup_id = ? AND id > ? AND id <= ?
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (setup_id, after_id, upto_id, batch_size),
+            ).fetchall()
+        for row in rows:
+            yield dict(row)
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1]["id"]
+
+
 def delete_readings_by_setup(setup_id: str) -> None:
     with _get_conn() as conn:
         conn.execute("DELETE FROM readings WHERE setup_id = ?", (setup_id,))
@@ -497,3 +706,97 @@ def mark_cameras_offline(active_ids: set[str]) -> None:
                     "UPDATE cameras SET status = ?, updated_at = ? WHERE camera_id = ?",
                     ("offline", _now_ms(), camera_id),
                 )
+
+
+def insert_photo(
+    setup_id: str,
+    camera_id: Optional[str],
+    ts: int,
+    path: str,
+    size_bytes: Optional[int],
+) -> None:
+    with _get_conn() as conn:
+        conn.execute(
+            """
+            INSERT INTO photos (setup_id, camera_id, ts, path, size_bytes, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                camera_id=excluded.camera_id,
+                ts=excluded.ts,
+                size_bytes=excluded.size_bytes
+            """,
+            (setup_id, camera_id, ts, path, size_bytes, _now_ms()),
+        )
+
+
+def insert_photos(rows: list[tuple[str, Optional[str], int, str, Optional[int]]]) -> None:
+    created_at = _now_ms()
+    with _get_conn() as conn:
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO photos (setup_id, camera_id, ts, path, size_bytes, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [row + (created_at,) for row in rows],
+        )
+
+
+def list_photos(
+    setup_id: str,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    with _get_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT * FROM photos
+            WHERE setup_id = ?
+              AND (? IS NULL OR ts >= ?)
+              AND (? IS NULL OR ts <= ?)
+            ORDER BY ts DESC
+            LIMIT ? OFFSET ?
+            """,
+            (setup_id, since, since, until, until, -1 if limit is None else limit, offset),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_photo(photo_id: int) -> Optional[dict[str, Any]]:
+    with _get_conn() as conn:
+        row = conn.execute("SELECT * FROM photos WHERE id = ?", (photo_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_photo_paths() -> set[str]:
+    with _get_conn() as conn:
+        rows = conn.execute("SELECT path FROM photos").fetchall()
+    return {row["path"] for row in rows}
+
+
+def delete_photos_by_paths(paths: list[str]) -> None:
+    with _get_conn() as conn:
+        conn.executemany("DELETE FROM photos WHERE path = ?", [(path,) for path in paths])
+
+
+def delete_photos_by_setup(setup_id: str) -> None:
+    with _get_conn() as conn:
+        conn.execute("DELETE FROM photos WHERE setup_id = ?", (setup_id,))
+
+
+def count_photos(setup_id: str) -> int:
+    with _get_conn() as conn:
+        row = conn.execute("SELECT COUNT(*) FROM photos WHERE setup_id = ?", (setup_id,)).fetchone()
+    return int(row[0])
+
+
+def rename_photo_path(old_path: str, new_path: str) -> bool:
+    """Point the row of ``old_path`` at ``new_path``; if that is indexed already, drop the stale row."""
+    with _get_conn() as conn:
+        try:
+            cursor = conn.execute("UPDATE photos SET path = ? WHERE path = ?", (new_path, old_path))
+        except sqlite3.IntegrityError:
+            conn.execute("DELETE FROM photos WHERE path = ?", (old_path,))
+            return False
+    return cursor.rowcount > 0
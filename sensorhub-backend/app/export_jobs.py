@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from .config import EXPORT_CACHE_MAX_BYTES, EXPORT_JOB_HISTORY, EXPORT_JOB_PROCESSES, EXPORTS_DIR, log_event
+from .db import get_export_marks, list_setups
+from .exports import ExportRequest, write_export_part
+from .realtime_updates import publish_export_job
+from .utils.zip_stream import append_zip_entries
+
+# Part of the fingerprint; bump it when the archive layout changes so old
+# artifacts are no longer served from the cache.
+EXPORT_ARTIFACT_VERSION = 1
+_TMP_PREFIX = ".tmp-"
+_STATE_DIR = ".jobs"
+_STALE_TMP_SEC = 24 * 3600
+# A running job rewrites its state file this often; one not refreshed for
+# _STALE_STATE_SEC belongs to an API worker that stopped.
+_HEARTBEAT_SEC = 10
+_STALE_STATE_SEC = 60
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+@dataclass(eq=False)
+class ExportJob:
+    job_id: str
+    request: ExportRequest
+    fingerprint: str
+    artifact: Path
+    setups: list[dict]
+    status: str = "queued"
+    done: int = 0
+    cached: bool = False
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    created_at: int = field(default_factory=_now_ms)
+    finished_at: Optional[int] = None
+    task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "jobId": self.job_id,
+            "status": self.status,
+            "progress": {"done": self.done, "total": len(self.setups)},
+            "cached": self.cached,
+            "format": self.request.fmt,
+            "setupIds": [setup["setup_id"] for setup in self.setups],
+            "fingerprint": self.fingerprint,
+            "sizeBytes": self.size_bytes,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+class ExportJobs:
+    """Runs exports in the background and keeps finished archives as a cache.
+
+    Each setup is read, encoded and compressed into a ZIP part of its own in a
+    process pool; the parts are then joined without recompressing. Archives are
+    stored under a fingerprint of the request and the data it covers, so an
+    identical export of unchanged data is answered without running again.
+
+    Job state is written to ``<cache_dir>/.jobs/<job_id>.json`` on every change, so
+    any API worker can answer status and download requests for it. The file names
+    the owning process and is refreshed every ``_HEARTBEAT_SEC``; a queued or running
+    job whose owner is gone is reported, and rewritten, as failed.
+    """
+    def __init__(
+        self,
+        processes: int = EXPORT_JOB_PROCESSES,
+        cache_dir: Path = EXPORTS_DIR,
+        cache_max_bytes: int = EXPORT_CACHE_MAX_BYTES,
+    ) -> None:
+        self._processes = max(1, processes)
+        self._cache_dir = cache_dir
+        self._cache_max_bytes = cache_max_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: OrderedDict[str, ExportJob] = OrderedDict()
+        self._completed = 0
+        self._failed = 0
+        self._cache_hits = 0
+        self._remove_stale_temp()
+        for path in self._state_files():
+            self._settle_state(path)
+
+    async def submit(self, request: ExportRequest) -> dict[str, Any]:
+        """Start a job, or return the running job or cached archive for the same data."""
+        selected, fingerprint = await asyncio.to_thread(_plan_export, request)
+        for job in self._jobs.values():
+            if job.fingerprint == fingerprint and job.active:
+                return job.to_dict()
+        job = ExportJob(
+            job_id=uuid.uuid4().hex[:12],
+            request=request,
+            fingerprint=fingerprint,
+            artifact=self._cache_dir / f"{fingerprint}.zip",
+            setups=selected,
+        )
+        # Registered before the next await so a concurrent identical submit finds it.
+        self._jobs[job.job_id] = job
+        cached_size = await asyncio.to_thread(_touch_artifact, job.artifact)
+        if cached_size is not None:
+            job.status = "done"
+            job.cached = True
+            job.done = len(selected)
+            job.size_bytes = cached_size
+            job.finished_at = job.created_at
+            self._cache_hits += 1
+        else:
+            job.task = asyncio.create_task(self._run(job))
+        self._forget_finished()
+        await asyncio.to_thread(self._store, job)
+        await asyncio.to_thread(self._prune_state_files)
+        log_event("exports.job_submitted", job_id=job.job_id, setups=len(selected), cached=job.cached)
+        return job.to_dict()
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job:
+            return job.to_dict()
+        if not job_id.isalnum():
+            return None
+        return self._settle_state(self._cache_dir / _STATE_DIR / f"{job_id}.json")
+
+    def list_jobs(self) -> list[dict[str, Any]]:
+        """Jobs of all API workers, newest first."""
+        states = [self._settle_state(path) for path in self._state_files()]
+        return sorted((state for state in states if state), key=lambda state: state["createdAt"], reverse=True)
+
+    def artifact_for(self, state: dict[str, Any]) -> Optional[Path]:
+        """Path of a finished job's archive, or None if it was evicted since."""
+        artifact = self._cache_dir / f"{state['fingerprint']}.zip"
+        try:
+            os.utime(artifact)
+        except OSError:
+            return None
+        return artifact
+
+    def clear_cache(self) -> None:
+        for path in self._cached_artifacts():
+            path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        for job in self._jobs.values():
+            if job.task and not job.task.done():
+                job.task.cancel()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_health(self) -> dict:
+        artifacts = self._cached_artifacts()
+        return {
+            "processes": self._processes,
+            "running": sum(1 for job in self._jobs.values() if job.active),
+            "completed": self._completed,
+            "failed": self._failed,
+            "cacheHits": self._cache_hits,
+            "cacheFiles": len(artifacts),
+            "cacheBytes": sum(_file_size(path) for path in artifacts),
+        }
+
+    async def _run(self, job: ExportJob) -> None:
+        started = time.monotonic()
+        work_dir = self._cache_dir / f"{_TMP_PREFIX}{job.job_id}"
+        futures: list[asyncio.Future[None]] = []
+        job.status = "running"
+        await self._publish(job)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            work_dir.mkdir(parents=True, exist_ok=True)
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            parts = [work_dir / f"{index}.zip" for index in range(len(job.setups))]
+            futures = [
+                loop.run_in_executor(
+                    executor, write_export_part, job.request, setup["setup_id"], setup["name"], str(part)
+                )
+                for setup, part in zip(job.setups, parts)
+            ]
+            for future in asyncio.as_completed(futures):
+                await future
+                job.done += 1
+                await self._publish(job)
+            job.size_bytes = await asyncio.to_thread(_join_parts, parts, job.artifact)
+            job.status = "done"
+            self._completed += 1
+            log_event(
+                "exports.job_done",
+                job_id=job.job_id,
+                setups=len(job.setups),
+                size_bytes=job.size_bytes,
+                duration_ms=int((time.monotonic() - started) * 1000),
+            )
+            await asyncio.to_thread(self._evict, job.artifact)
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "cancelled"
+            raise
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc) or type(exc).__name__
+            self._failed += 1
+            log_event("exports.job_failed", job_id=job.job_id, error=job.error)
+        finally:
+            heartbeat.cancel()
+            for future in futures:
+                future.cancel()
+            job.finished_at = _now_ms()
+            job.task = None
+            await asyncio.to_thread(shutil.rmtree, work_dir, ignore_errors=True)
+            await self._publish(job)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if not self._executor:
+            # Spawned, not forked: a forked child would inherit the calling
+            # thread's SQLite connection from db._thread_local.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _publish(self, job: ExportJob) -> None:
+        await asyncio.to_thread(self._store, job)
+        publish_export_job(job.to_dict())
+
+    async def _heartbeat(self, job: ExportJob) -> None:
+        while True:
+            await asyncio.sleep(_HEARTBEAT_SEC)
+            await asyncio.to_thread(self._store, job)
+
+    def _store(self, job: ExportJob) -> None:
+        path = self._cache_dir / _STATE_DIR / f"{job.job_id}.json"
+        state = {**job.to_dict(), "ownerPid": os.getpid(), "heartbeatAt": _now_ms()}
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _write_state(path, state)
+        except OSError as exc:
+            log_event("exports.job_state_failed", job_id=job.job_id, error=str(exc))
+
+    def _settle_state(self, path: Path) -> Optional[dict[str, Any]]:
+        """Read a job state file; a queued or running job whose owner is gone becomes failed."""
+        state = _read_state(path)
+        if not state or state.get("status") not in ("queued", "running") or state.get("jobId") in self._jobs:
+            return _public_state(state)
+        owner = state.get("ownerPid")
+        fresh = _now_ms() - (state.get("heartbeatAt") or 0) < _STALE_STATE_SEC * 1000
+        if fresh and owner != os.getpid() and _pid_alive(owner):
+            return _public_state(state)
+        state.update(status="failed", error="export worker stopped", finishedAt=_now_ms())
+        try:
+            _write_state(path, state)
+        except OSError:
+            pass
+        log_event("exports.job_orphaned", job_id=state.get("jobId"), owner_pid=owner)
+        return _public_state(state)
+
+    def _forget_finished(self) -> None:
+        for job_id in [job_id for job_id, known in self._jobs.items() if not known.active]:
+            if len(self._jobs) <= EXPORT_JOB_HISTORY:
+                break
+            self._jobs.pop(job_id, None)
+
+    def _prune_state_files(self) -> None:
+        files = sorted(self._state_files(), key=_file_mtime)
+        for path in files[: max(0, len(files) - EXPORT_JOB_HISTORY)]:
+            path.unlink(missing_ok=True)
+
+    def _state_files(self) -> list[Path]:
+        state_dir = self._cache_dir / _STATE_DIR
+        if not state_dir.exists():
+            return []
+        return [path for path in state_dir.glob("*.json") if not path.name.startswith(".")]
+
+    def _evict(self, keep: Path) -> None:
+        """Drop the least recently used archives until the cache fits its budget."""
+        artifacts = sorted(self._cached_artifacts(), key=_file_mtime)
+        total = sum(_file_size(path) for path in artifacts)
+        for path in artifacts:
+            if total <= self._cache_max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= _file_size(path)
+            path.unlink(missing_ok=True)
+            log_event("exports.cache_evicted", fingerprint=path.stem)
+
+    def _cached_artifacts(self) -> list[Path]:
+        if not self._cache_dir.exists():
+            return []
+        return [path for path in self._cache_dir.glob("*.zip") if not path.name.startswith(".")]
+
+    def _remove_stale_temp(self) -> None:
+        # Left over when the backend stopped during a job. Other API processes may
+        # be writing their own, so only old ones are removed.
+        if not self._cache_dir.exists():
+            return
+        cutoff = time.time() - _STALE_TMP_SEC
+        for path in self._cache_dir.iterdir():
+            if path.name.startswith(_TMP_PREFIX) or path.name.endswith(".tmp"):
+                if _file_mtime(path) >= cutoff:
+                    continue
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink(missing_ok=True)
+
+
+def _plan_export(request: ExportRequest) -> tuple[list[dict], str]:
+    setups = list_setups()
+    if request.setup_ids:
+        wanted = set(request.setup_ids)
+        setups = [setup for setup in setups if setup["setup_id"] in wanted]
+    selected = [{"setup_id": setup["setup_id"], "name": setup.get("name") or setup["setup_id"]} for setup in setups]
+    return selected, export_fingerprint(request, selected)
+
+
+def _touch_artifact(artifact: Path) -> Optional[int]:
+    """Size of a cached archive after marking it recently used, or None if there is none."""
+    try:
+        os.utime(artifact)
+        return artifact.stat().st_size
+    except OSError:
+        return None
+
+
+def export_fingerprint(request: ExportRequest, setups: list[dict]) -> str:
+    """Hash of the export parameters and the data version of every selected setup.
+
+    Readings are only appended, so the highest reading id identifies the data of a
+    setup; its name is part of ``meta.txt``.
+    """
+    marks = get_export_marks([setup["setup_id"] for setup in setups])
+    payload = {
+        "v": EXPORT_ARTIFACT_VERSION,
+        "since": request.since,
+        "until": request.until,
+        "columns": request.columns,
+        "every": request.every_ms,
+        "format": request.fmt,
+        "setups": [[setup["setup_id"], setup["name"], marks[setup["setup_id"]][0]] for setup in setups],
+    }
+    return hashlib.sha256(json.dumps(payload, separators=(",", ":")).encode("utf-8")).hexdigest()[:32]
+
+
+def _join_parts(parts: list[Path], target: Path) -> int:
+    temp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with zipfile.ZipFile(temp_path, "w") as archive:
+            for part in parts:
+                append_zip_entries(archive, part)
+        os.replace(temp_path, target)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return target.stat().st_size
+
+
+def _read_state(path: Path) -> Optional[dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(path: Path, state: dict[str, Any]) -> None:
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        temp_path.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(temp_path, path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _public_state(state: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+    if state is None:
+        return None
+    return {key: value for key, value in state.items() if key not in ("ownerPid", "heartbeatAt")}
+
+
+def _pid_alive(pid: Any) -> bool:
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    if os.name != "posix":
+        # os.kill(pid, 0) would terminate the process on Windows; rely on the heartbeat there.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _file_mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+_EXPORT_JOBS: Optional[ExportJobs] = None
+
+
+def get_export_jobs() -> ExportJobs:
+    global _EXPORT_JOBS
+    if not _EXPORT_JOBS:
+        _EXPORT_JOBS = ExportJobs()
+    return _EXPORT_JOBS
+
+
+def close_export_jobs() -> None:
+    global _EXPORT_JOBS
+    if _EXPORT_JOBS:
+        _EXPORT_JOBS.close()
+        _EXPORT_JOBS = None
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import base64
+import json
+import struct
+import zipfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from fastapi import HTTPException
+
+from .config import PHOTOS_DIR
+from .db import (
+    READING_COLUMNS,
+    get_export_marks,
+    get_setup,
+    iter_reading_batches,
+    iter_readings,
+    iter_readings_downsampled,
+    iter_rows_after,
+    list_setups,
+)
+from .utils.csv_export import iter_csv_batches, iter_csv_chunks
+from .utils.datetime_utils import TsIsoFormatter, iter_readings_with_iso
+from .utils.paths import resolve_under
+from .utils.zip_stream import ZIP_CHUNK_BYTES, ZipStreamWriter, iter_zip_entry
+
+EXPORT_FORMATS = {"csv": "csv", "ndjson": "ndjson", "columnar": "shcb"}
+DEFAULT_EXPORT_COLUMNS = ["id", "setup_id", "node_id", "ts_iso", "ph", "ec", "temp", "status_json"]
+# Column type codes of the columnar format: int64, float64, UTF-8 string.
+EXPORT_COLUMN_TYPES = {
+    "id": "i",
+    "setup_id": "s",
+    "node_id": "s",
+    "ts": "i",
+    "ts_iso": "s",
+    "ph": "f",
+    "ec": "f",
+    "temp": "f",
+    "status_json": "s",
+    "samples": "i",
+}
+COLUMNAR_MAGIC = b"SHCB"
+COLUMNAR_VERSION = 1
+COLUMNAR_BLOCK_ROWS = 4096
+_INT_NULL = -(2**63)
+_STR_NULL = 0xFFFFFFFF
+# Database column read for a computed export column on the tuple-based CSV path.
+_CSV_TUPLE_SOURCES = {"ts_iso": "ts"}
+PHOTO_EXPORT_COLUMNS = ["id", "camera_id", "ts", "path", "size_bytes"]
+WATERMARK_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ExportRequest:
+    setup_ids: list[str] = field(default_factory=list)
+    since: Optional[int] = None
+    until: Optional[int] = None
+    columns: list[str] = field(default_factory=lambda: list(DEFAULT_EXPORT_COLUMNS))
+    every_ms: Optional[int] = None
+    fmt: str = "csv"
+
+
+def build_export_request(
+    setup_ids: list[str],
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    columns: Optional[str] = None,
+    every_ms: Optional[int] = None,
+    fmt: str = "csv",
+) -> ExportRequest:
+    """Validate export parameters; an empty ``setup_ids`` selects all setups."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="invalid format")
+    selected = [name.strip() for name in columns.split(",") if name.strip()] if columns else []
+    if any(name not in EXPORT_COLUMN_TYPES for name in selected):
+        raise HTTPException(status_code=400, detail="invalid column")
+    if since is not None and until is not None and since > until:
+        raise HTTPException(status_code=400, detail="invalid time range")
+    for setup_id in setup_ids:
+        if not get_setup(setup_id):
+            raise HTTPException(status_code=404, detail="setup not found")
+    return ExportRequest(
+        setup_ids=list(dict.fromkeys(setup_ids)),
+        since=since,
+        until=until,
+        columns=selected or list(DEFAULT_EXPORT_COLUMNS),
+        every_ms=every_ms,
+        fmt=fmt,
+    )
+
+
+@dataclass(frozen=True)
+class DeltaExport:
+    """Rows with ids between ``start`` and ``end`` (per setup: reading id, photo id)."""
+    request: ExportRequest
+    setup_ids: list[str]
+    start: dict[str, tuple[int, int]]
+    end: dict[str, tuple[int, int]]
+    photo_files: bool = True
+
+    @property
+    def watermark(self) -> str:
+        return encode_watermark(self.end)
+
+
+def encode_watermark(marks: dict[str, tuple[int, int]]) -> str:
+    payload = {"v": WATERMARK_VERSION, "setups": {setup_id: list(mark) for setup_id, mark in sorted(marks.items())}}
+    encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return encoded.decode("ascii").rstrip("=")
+
+
+def decode_watermark(token: Optional[str]) -> dict[str, tuple[int, int]]:
+    if not token:
+        return {}
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if payload.get("v") != WATERMARK_VERSION:
+            raise ValueError("unsupported watermark version")
+        return {str(setup_id): (int(reading), int(photo)) for setup_id, (reading, photo) in payload["setups"].items()}
+    except (ValueError, TypeError, KeyError, AttributeError) as exc:
+        raise HTTPException(status_code=400, detail="invalid watermark") from exc
+
+
+def build_delta_export(
+    setup_ids: list[str],
+    watermark: Optional[str] = None,
+    columns: Optional[str] = None,
+    fmt: str = "csv",
+    photo_files: bool = True,
+) -> DeltaExport:
+    """Fix the end of the delta now, so rows written during the download go into the next one.
+
+    Setups missing from ``watermark`` start from the beginning; marks of setups that
+    are not selected are carried over unchanged.
+    """
+    request = build_export_request(setup_ids, columns=columns, fmt=fmt)
+    start = decode_watermark(watermark)
+    existing = [setup["setup_id"] for setup in list_setups()]
+    selected = request.setup_ids or existing
+    end = {setup_id: mark for setup_id, mark in start.items() if setup_id in existing}
+    for setup_id, (reading, photo) in get_export_marks(selected).items():
+        previous = start.get(setup_id, (0, 0))
+        end[setup_id] = (max(reading, previous[0]), max(photo, previous[1]))
+    return DeltaExport(request=request, setup_ids=selected, start=start, end=end, photo_files=photo_files)
+
+
+def iter_delta_zip(delta: DeltaExport) -> Iterator[bytes]:
+    """Yield the delta archive: new readings, photo index rows and photo files per setup.
+
+    Photo files keep their date folders below ``setups/<id>/photos/``; ``watermark.txt``
+    holds the token for the next call.
+    """
+    request = delta.request
+    archive = ZipStreamWriter()
+    extension = EXPORT_FORMATS[request.fmt]
+    for setup_id in delta.setup_ids:
+        after_reading, after_photo = delta.start.get(setup_id, (0, 0))
+        upto_reading, upto_photo = delta.end[setup_id]
+        readings = iter_rows_after("readings", setup_id, after_reading, upto_reading)
+        if "ts_iso" in request.columns:
+            readings = iter_readings_with_iso(readings)
+        yield from iter_zip_entry(
+            archive,
+            f"setups/{setup_id}/readings.{extension}",
+            encode_readings(readings, request.columns, request.fmt),
+        )
+        yield from iter_zip_entry(
+            archive,
+            f"setups/{setup_id}/photos.csv",
+            iter_csv_chunks(iter_rows_after("photos", setup_id, after_photo, upto_photo), PHOTO_EXPORT_COLUMNS),
+        )
+        if delta.photo_files:
+            for photo in iter_rows_after("photos", setup_id, after_photo, upto_photo):
+                yield from _iter_photo_entry(archive, setup_id, photo["path"])
+    archive.zip.writestr("watermark.txt", f"{delta.watermark}\n")
+    yield archive.close()
+
+
+def _iter_photo_entry(archive: ZipStreamWriter, setup_id: str, relative_path: str) -> Iterator[bytes]:
+    try:
+        handle = resolve_under(PHOTOS_DIR, relative_path).open("rb")
+    except (OSError, HTTPException):
+        # Deleted since it was indexed; the row in photos.csv still records it.
+        return
+    with handle:
+        yield from iter_zip_entry(
+            archive,
+            f"setups/{setup_id}/photos/{relative_path.removeprefix(f'{setup_id}/')}",
+            iter(lambda: handle.read(ZIP_CHUNK_BYTES), b""),
+            compress_type=zipfile.ZIP_STORED,
+        )
+
+
+def iter_export_zip(request: ExportRequest) -> Iterator[bytes]:
+    """Yield the export archive: ``setups/<id>/readings.<ext>`` and ``meta.txt`` per setup."""
+    setups = list_setups()
+    if request.setup_ids:
+        wanted = set(request.setup_ids)
+        setups = [setup for setup in setups if setup["setup_id"] in wanted]
+    archive = ZipStreamWriter()
+    extension = EXPORT_FORMATS[request.fmt]
+    for setup in setups:
+        setup_id = setup["setup_id"]
+        setup_name = setup.get("name") or setup_id
+        yield from iter_zip_entry(
+            archive,
+            f"setups/{setup_id}/readings.{extension}",
+            encode_setup_readings(setup_id, request),
+        )
+        archive.zip.writestr(f"setups/{setup_id}/meta.txt", f"name={setup_name}\n")
+    yield archive.close()
+
+
+def encode_setup_readings(setup_id: str, request: ExportRequest) -> Iterator[bytes]:
+    """Encoded readings file of one setup; raw CSV takes the tuple-based path."""
+    sources = [_CSV_TUPLE_SOURCES.get(name, name) for name in request.columns]
+    if request.fmt == "csv" and not request.every_ms and all(name in READING_COLUMNS for name in sources):
+        return _iter_csv_tuples(setup_id, request, sources)
+    return encode_readings(iter_setup_readings(setup_id, request), request.columns, request.fmt)
+
+
+def encode_readings(rows: Iterable[dict], columns: list[str], fmt: str) -> Iterator[bytes]:
+    if fmt == "ndjson":
+        return _iter_ndjson(rows, columns)
+    if fmt == "columnar":
+        return _iter_columnar(rows, columns)
+    return iter_csv_chunks(rows, columns)
+
+
+def write_export_part(request: ExportRequest, setup_id: str, setup_name: str, path: str) -> None:
+    """Write the entries of one setup to a ZIP of its own; runs in an export job process."""
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        name = f"setups/{setup_id}/readings.{EXPORT_FORMATS[request.fmt]}"
+        with archive.open(name, "w", force_zip64=True) as handle:
+            for chunk in encode_setup_readings(setup_id, request):
+                handle.write(chunk)
+        archive.writestr(f"setups/{setup_id}/meta.txt", f"name={setup_name}\n")
+
+
+def iter_setup_readings(setup_id: str, request: ExportRequest) -> Iterable[dict]:
+    if request.every_ms:
+        rows = iter_readings_downsampled(setup_id, request.every_ms, since=request.since, until=request.until)
+    else:
+        rows = iter_readings(setup_id, since=request.since, until=request.until)
+    if "ts_iso" in request.columns:
+        rows = iter_readings_with_iso(rows)
+    return rows
+
+
+def _iter_csv_tuples(setup_id: str, request: ExportRequest, sources: list[str]) -> Iterator[bytes]:
+    batches: Iterable[list] = iter_reading_batches(setup_id, sources, since=request.since, until=request.until)
+    iso_columns = [index for index, name in enumerate(request.columns) if name == "ts_iso"]
+    if iso_columns:
+        batches = _with_ts_iso(batches, iso_columns)
+    return iter_csv_batches(batches, request.columns)
+
+
+def _with_ts_iso(batches: Iterable[list[tuple]], positions: list[int]) -> Iterator[list]:
+    format_ts = TsIsoFormatter()
+    if len(positions) == 1:
+        index = positions[0]
+        for batch in batches:
+            yield [(*row[:index], format_ts(row[index]), *row[index + 1 :]) for row in batch]
+        return
+    for batch in batches:
+        rows = []
+        for row in batch:
+            values = list(row)
+            for index in positions:
+                values[index] = format_ts(values[index])
+            rows.append(values)
+        yield rows
+
+
+def _iter_ndjson(rows: Iterable[dict], columns: list[str], batch_rows: int = 1000) -> Iterator[bytes]:
+    lines: list[str] = []
+    for row in rows:
+        lines.append(json.dumps({name: row.get(name) for name in columns}, separators=(",", ":")))
+        if len(lines) >= batch_rows:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines.clear()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _iter_columnar(rows: Iterable[dict], columns: list[str]) -> Iterator[bytes]:
+    """Compact columnar binary format, see docs/protocols.md ("Columnar Export")."""
+    types = [EXPORT_COLUMN_TYPES[name] for name in columns]
+    header = [struct.pack("<4sHH", COLUMNAR_MAGIC, COLUMNAR_VERSION, len(columns))]
+    for name, code in zip(columns, types):
+        encoded = name.encode("ascii")
+        header.append(struct.pack("<cB", code.encode("ascii"), len(encoded)) + encoded)
+    yield b"".join(header)
+    block: list[dict] = []
+    for row in rows:
+        block.append(row)
+        if len(block) >= COLUMNAR_BLOCK_ROWS:
+            yield _columnar_block(block, columns, types)
+            block = []
+    if block:
+        yield _columnar_block(block, columns, types)
+    yield struct.pack("<I", 0)
+
+
+def _columnar_block(block: list[dict], columns: list[str], types: list[str]) -> bytes:
+    count = len(block)
+    parts = [struct.pack("<I", count)]
+    for name, code in zip(columns, types):
+        values: list[Any] = [row.get(name) for row in block]
+        if code == "i":
+            parts.append(struct.pack(f"<{count}q", *(_INT_NULL if value is None else int(value) for value in values)))
+        elif code == "f":
+            parts.append(struct.pack(f"<{count}d", *(float("nan") if value is None else float(value) for value in values)))
+        else:
+            encoded = [None if value is None else str(value).encode("utf-8") for value in values]
+            parts.append(struct.pack(f"<{count}I", *(_STR_NULL if item is None else len(item) for item in encoded)))
+            parts.append(b"".join(item for item in encoded if item))
+    return b"".join(parts)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import LIVE_SSE_KEEPALIVE_SEC, LIVE_SSE_LOG_SIZE
+
+SSE_RETRY_MS = 2000
+
+
+@dataclass(frozen=True)
+class LiveEvent:
+    event_id: int
+    msg_type: str
+    setup_id: Optional[str]
+    data: str
+
+
+class LiveEventLog:
+    """Bounded log of live events with monotonically increasing ids for SSE resume.
+
+    Every API worker keeps its own log, so SSE ids carry a per-process prefix; an id
+    from another process or one that is no longer buffered can only be answered with ``gap``.
+    """
+    def __init__(self, maxlen: int = LIVE_SSE_LOG_SIZE) -> None:
+        self._events: deque[LiveEvent] = deque(maxlen=maxlen)
+        self._instance = uuid.uuid4().hex[:8]
+        self._next_id = 0
+        self._waiters: set[asyncio.Event] = set()
+
+    def append(self, msg_type: str, setup_id: Optional[str], data: str) -> LiveEvent:
+        self._next_id += 1
+        event = LiveEvent(event_id=self._next_id, msg_type=msg_type, setup_id=setup_id, data=data)
+        self._events.append(event)
+        for waiter in self._waiters:
+            waiter.set()
+        return event
+
+    def clear(self) -> None:
+        self._events.clear()
+
+    def format_id(self, event_id: int) -> str:
+        return f"{self._instance}-{event_id}"
+
+    def resume_cursor(self, last_event_id: str) -> Optional[int]:
+        """Numeric id to resume after, or None if events after ``last_event_id`` are no longer buffered."""
+        instance, _, number = last_event_id.partition("-")
+        if instance != self._instance or not number.isdigit() or not self._events:
+            return None
+        event_id = int(number)
+        # The event just before the oldest buffered one is still resumable: nothing after it was lost.
+        if not self._events[0].event_id - 1 <= event_id <= self._events[-1].event_id:
+            return None
+        return event_id
+
+    def stream_count(self) -> int:
+        return len(self._waiters)
+
+    async def stream(
+        self,
+        setup_ids: set[str],
+        last_event_id: Optional[str] = None,
+        min_interval_sec: float = 0,
+    ) -> AsyncIterator[str]:
+        """Yield SSE chunks for the given setups plus global events.
+
+        Without a resumable ``last_event_id`` the stream starts with the newest buffered
+        event per type and setup, after a ``gap`` event if an id was given. With
+        ``min_interval_sec`` only the newest event per type and setup is sent once per interval.
+        """
+        waiter = asyncio.Event()
+        self._waiters.add(waiter)
+        resume = self.resume_cursor(last_event_id) if last_event_id else None
+        cursor = resume if resume is not None else 0
+        coalesce = resume is None or min_interval_sec > 0
+        try:
+            if last_event_id and resume is None:
+                yield _format_event(None, "gap", '{"t":"gap"}')
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while True:
+                waiter.clear()
+                pending = [
+                    event
+                    for event in self._events
+                    if event.event_id > cursor and (event.setup_id is None or event.setup_id in setup_ids)
+                ]
+                if pending:
+                    cursor = pending[-1].event_id
+                    if coalesce:
+                        pending = _latest_per_key(pending)
+                    coalesce = min_interval_sec > 0
+                    for event in pending:
+                        yield _format_event(self.format_id(event.event_id), event.msg_type, event.data)
+                    if min_interval_sec > 0:
+                        await asyncio.sleep(min_interval_sec)
+                        continue
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=LIVE_SSE_KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self._waiters.discard(waiter)
+
+
+def _latest_per_key(events: list[LiveEvent]) -> list[LiveEvent]:
+    latest: dict[tuple[str, Optional[str]], LiveEvent] = {}
+    for event in events:
+        if event.msg_type == "reset":
+            latest[(f"reset:{event.event_id}", None)] = event
+        else:
+            latest[(event.msg_type, event.setup_id)] = event
+    return sorted(latest.values(), key=lambda event: event.event_id)
+
+
+def _format_event(event_id: Optional[str], msg_type: str, data: str) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {msg_type}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
@@ -2,11 +2,11 @@ from __future__ import annotations
 
 import asyncio
 import platform
-from typing import Any
+from collections.abc import Coroutine
+from typing import Any, Optional
 
-from fastapi import FastAPI, WebSocket
-from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Query, Request, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api import router as api_router
@@ -15,14 +15,22 @@ from .config import (
     CSRF_TOKEN,
     CSRF_TRUSTED_ORIGINS,
     DATA_DIR,
+    SENSORHUB_ROLE,
     ensure_dirs,
     log_event,
 )
 from .db import close_connections, init_db, list_setups
 from .realtime_updates import LiveManager, readings_capture_loop, register_live_manager as register_ws_manager
+from .reading_bus import reading_acquisition_loop, reading_publish_loop, reading_relay_loop
+from .acquisition import camera_demand_loop, control_loop
+from .pubsub import get_pubsub, is_acquisition_owner, is_distributed
 from .nodes import node_discovery_loop
 from .camera_devices import camera_discovery_loop, register_live_manager
 from .camera_streaming import photo_capture_loop, snapshot_camera, stream_camera
+from .export_jobs import close_export_jobs, get_export_jobs
+from .photo_derivatives import close_photo_derivatives
+from .photo_index import PhotoStaticFiles, startup_photo_index
+from .photo_writer import close_photo_writer
 from .scheduler import LoopRegistry
 
 
@@ -34,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Export-Watermark"],
 )
 
 
@@ -53,7 +62,7 @@ async def csrf_protect(request, call_next):
     return await call_next(request)
 
 app.include_router(api_router)
-app.mount("/data", StaticFiles(directory=DATA_DIR), name="data")
+app.mount("/data", PhotoStaticFiles(directory=DATA_DIR), name="data")
 
 live_manager = LiveManager()
 register_ws_manager(live_manager)
@@ -83,10 +92,26 @@ async def on_startup() -> None:
     register_live_manager(live_manager)
     _set_windows_keep_awake(True)
     app.state.loop_registry = LoopRegistry()
-    app.state.node_task = app.state.loop_registry.start("node_discovery", node_discovery_loop())
-    app.state.readings_task = app.state.loop_registry.start("readings_capture", readings_capture_loop())
-    app.state.camera_task = app.state.loop_registry.start("camera_discovery", camera_discovery_loop())
-    app.state.photo_task = app.state.loop_registry.start("photo_capture", photo_capture_loop())
+    app.state.pubsub = get_pubsub()
+    await app.state.pubsub.start()
+    loops: dict[str, Coroutine[Any, Any, None]] = {"live_updates": live_manager.run()}
+    if is_acquisition_owner():
+        loops["node_discovery"] = node_discovery_loop()
+        loops["reading_acquisition"] = reading_acquisition_loop()
+        loops["readings_capture"] = readings_capture_loop()
+        loops["camera_discovery"] = camera_discovery_loop()
+        loops["photo_capture"] = photo_capture_loop()
+        loops["photo_reconcile"] = asyncio.to_thread(startup_photo_index)
+    if is_distributed():
+        loops["live_events"] = live_manager.run_events()
+        if is_acquisition_owner():
+            loops["reading_publish"] = reading_publish_loop()
+            loops["camera_demand"] = camera_demand_loop()
+            loops["control"] = control_loop()
+        else:
+            loops["reading_relay"] = reading_relay_loop()
+    for name, coro in loops.items():
+        app.state.loop_registry.start(name, coro)
     setups = list_setups()
     loop_setups = [
         {
@@ -100,7 +125,8 @@ async def on_startup() -> None:
     ]
     log_event(
         "loops.started",
-        loops=["node_discovery", "readings_capture", "camera_discovery", "photo_capture"],
+        role=SENSORHUB_ROLE,
+        loops=list(loops.keys()),
         setups=loop_setups,
     )
     for setup in loop_setups:
@@ -120,27 +146,59 @@ async def on_shutdown() -> None:
     loop_registry = getattr(app.state, "loop_registry", None)
     if loop_registry:
         loop_registry.stop_all()
+    pubsub = getattr(app.state, "pubsub", None)
+    if pubsub:
+        await pubsub.stop()
+    close_photo_writer()
+    close_photo_derivatives()
+    close_export_jobs()
     close_connections()
 
 
 @app.websocket("/api/live")
 async def live_ws(ws: WebSocket) -> None:
     await ws.accept()
+    await live_manager.connect(ws)
     try:
         while True:
             data = await ws.receive_json()
             msg_type = data.get("t")
             setup_id = data.get("setupId")
             if msg_type == "sub" and setup_id:
-                await live_manager.subscribe(setup_id, ws)
+                since = data.get("since")
+                await live_manager.subscribe(setup_id, ws, since=since if isinstance(since, int) else None)
+            elif msg_type == "sub" and data.get("jobId"):
+                job = await asyncio.to_thread(get_export_jobs().get, str(data["jobId"]))
+                if job:
+                    await live_manager.watch_job(job["jobId"], ws, job)
+                else:
+                    live_manager.send(ws, {"t": "error", "jobId": data["jobId"], "msg": "export job missing"})
+            elif msg_type == "hello":
+                await live_manager.configure(ws, encoding=data.get("enc"), deltas=bool(data.get("deltas")))
             elif msg_type == "unsub" and setup_id:
                 await live_manager.unsubscribe(setup_id, ws)
             else:
-                await ws.send_json({"t": "error", "msg": "unknown message"})
+                live_manager.send(ws, {"t": "error", "msg": "unknown message"})
     except Exception:
         await live_manager.remove_ws(ws)
 
 
+@app.get("/api/live/events")
+async def live_events(
+    request: Request,
+    setupId: list[str] = Query(default=[]),
+    interval: float = Query(default=0, ge=0, le=3600),
+    lastEventId: Optional[str] = None,
+) -> StreamingResponse:
+    last_event_id = request.headers.get("last-event-id") or lastEventId
+    stream = live_manager.events.stream(set(setupId), last_event_id=last_event_id, min_interval_sec=interval)
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/api/setups/{setup_id}/camera/stream")
 async def camera_stream(setup_id: str) -> Any:
     return await stream_camera(setup_id)
@@ -48,6 +48,15 @@ class CameraUpdate(BaseModel):
     alias: Optional[str] = Field(default=None, min_length=1, max_length=100)
 
 
+class ExportJobCreate(BaseModel):
+    setupIds: list[str] = Field(default_factory=list)
+    from_: Optional[int] = Field(default=None, alias="from")
+    to: Optional[int] = None
+    columns: Optional[str] = None
+    every: Optional[int] = Field(default=None, ge=1000)
+    format: str = "csv"
+
+
 class Reading(BaseModel):
     ts: int
     ph: float
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import math
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+from .config import (
+    PHOTO_DERIVATIVE_JPEG_QUALITY,
+    PHOTO_DERIVATIVE_PROCESSES,
+    PHOTO_DERIVATIVE_SIZES,
+    log_event,
+)
+
+
+def derivative_path(path: Path, size: str) -> Path:
+    """``<stem>.<size>.jpg`` next to the original photo."""
+    return path.with_name(f"{path.stem}.{size}.jpg")
+
+
+class PhotoDerivatives:
+    """Renders the small and medium variants of saved photos in a process pool.
+
+    JPEG decoding and resizing is CPU bound and would stall the event loop or the
+    photo writer threads. Without Pillow the pipeline is disabled and callers get
+    the original photo.
+    """
+    def __init__(self, processes: int = PHOTO_DERIVATIVE_PROCESSES) -> None:
+        self._processes = processes
+        self._enabled = processes > 0 and importlib.util.find_spec("PIL") is not None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: dict[Path, asyncio.Future[None]] = {}
+        self._rendered = 0
+        self._failed = 0
+        if processes > 0 and not self._enabled:
+            log_event("photos.derivatives_disabled", reason="Pillow not installed")
+
+    def schedule(self, path: Path) -> None:
+        if self._enabled:
+            self._submit(path)
+
+    async def get(self, path: Path, size: str) -> Path:
+        """Return the derivative of ``path``, rendering it first if it does not exist yet."""
+        target = derivative_path(path, size)
+        if target.exists() or not self._enabled:
+            return target if target.exists() else path
+        try:
+            await asyncio.shield(self._submit(path))
+        except Exception:
+            return path
+        return target if target.exists() else path
+
+    def close(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_health(self) -> dict:
+        return {
+            "enabled": self._enabled,
+            "processes": self._processes,
+            "pending": len(self._inflight),
+            "rendered": self._rendered,
+            "failed": self._failed,
+        }
+
+    def _submit(self, path: Path) -> asyncio.Future[None]:
+        future = self._inflight.get(path)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._get_executor(),
+                render_derivatives,
+                str(path),
+                PHOTO_DERIVATIVE_SIZES,
+                PHOTO_DERIVATIVE_JPEG_QUALITY,
+            )
+            self._inflight[path] = future
+            future.add_done_callback(lambda done: self._finish(path, done))
+        return future
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if not self._executor:
+            # Spawned, not forked: the photo writer threads and the event loop hold
+            # locks and SQLite connections a forked child would inherit.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _finish(self, path: Path, future: asyncio.Future[None]) -> None:
+        self._inflight.pop(path, None)
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if isinstance(exc, BrokenProcessPool) and self._executor:
+            # A pool process died (e.g. OOM-killed); drop the pool so the next photo gets a new one.
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            log_event("photos.derivatives_pool_broken", error=str(exc))
+        if exc:
+            self._failed += 1
+            log_event("photos.derivatives_failed", path=str(path), error=str(exc))
+        else:
+            self._rendered += 1
+
+
+def render_derivatives(source: str, sizes: dict[str, int], quality: int) -> None:
+    """Write all derivatives of one photo; runs in a pool process."""
+    from PIL import Image
+
+    source_path = Path(source)
+    with Image.open(source_path) as image:
+        # Let the JPEG decoder downscale by up to 1/8 while decoding instead of
+        # decoding the full frame and shrinking it afterwards.
+        ratio = max(sizes.values()) / max(image.size)
+        if ratio < 1:
+            image.draft("RGB", (math.ceil(image.width * ratio), math.ceil(image.height * ratio)))
+        variant = image.convert("RGB") if image.mode not in ("RGB", "L") else image.copy()
+    # Largest first, so each smaller variant is resized from the previous one.
+    for size, edge in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+        variant.thumbnail((edge, edge), reducing_gap=2.0)
+        target = derivative_path(source_path, size)
+        temp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            variant.save(temp_path, format="JPEG", quality=quality, optimize=True)
+            os.replace(temp_path, target)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+
+_DERIVATIVES: Optional[PhotoDerivatives] = None
+
+
+def get_photo_derivatives() -> PhotoDerivatives:
+    global _DERIVATIVES
+    if not _DERIVATIVES:
+        _DERIVATIVES = PhotoDerivatives()
+    return _DERIVATIVES
+
+
+def close_photo_derivatives() -> None:
+    global _DERIVATIVES
+    if _DERIVATIVES:
+        _DERIVATIVES.close()
+        _DERIVATIVES = None
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import filecmp
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path, PurePath
+from typing import Optional
+
+from starlette.staticfiles import StaticFiles
+
+from .config import PHOTO_DERIVATIVE_SIZES, PHOTO_INDEX_MARKER, PHOTOS_DIR, log_event
+from .db import (
+    delete_photos_by_paths,
+    insert_photo,
+    insert_photos,
+    list_photo_paths,
+    list_setups,
+    rename_photo_path,
+)
+from .photo_derivatives import derivative_path
+
+PHOTOS_URL_PREFIX = "/data/photos"
+_TRASH_PREFIX = ".deleted-"
+_PHOTO_NAME = re.compile(
+    r"^(?P<setup>[A-Za-z0-9_-]+)_(?P<stamp>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.jpg$",
+    re.IGNORECASE,
+)
+
+
+def photo_url(relative_path: str) -> str:
+    return f"{PHOTOS_URL_PREFIX}/{relative_path}"
+
+
+def photo_relative_path(setup_id: str, filename: str) -> str:
+    """Storage path below PHOTOS_DIR: ``<setup>/<yyyy>/<mm>/<dd>/<file>``.
+
+    The shard is taken from the stamp in the file name, so a flat URL can always be
+    mapped to the sharded file without a database lookup.
+    """
+    match = _PHOTO_NAME.match(filename)
+    if not match:
+        return f"{setup_id}/{filename}"
+    stamp = match.group("stamp")
+    return f"{setup_id}/{stamp[0:4]}/{stamp[5:7]}/{stamp[8:10]}/{filename}"
+
+
+def record_photo(setup_id: str, camera_id: Optional[str], ts: int, path: Path, size_bytes: int) -> str:
+    relative_path = path.relative_to(PHOTOS_DIR.resolve()).as_posix()
+    insert_photo(setup_id, camera_id, ts, relative_path, size_bytes)
+    return relative_path
+
+
+class PhotoStaticFiles(StaticFiles):
+    """StaticFiles for DATA_DIR that also serves flat photo URLs from their date shard."""
+    def lookup_path(self, path: str) -> tuple[str, Optional[os.stat_result]]:
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is None:
+            parts = PurePath(path).parts
+            if len(parts) == 3 and parts[0] == "photos":
+                sharded = photo_relative_path(parts[1], parts[2])
+                if sharded != f"{parts[1]}/{parts[2]}":
+                    return super().lookup_path(os.path.join("photos", *sharded.split("/")))
+        return full_path, stat_result
+
+
+def remove_photo_folder(setup_id: str, folder: Path) -> None:
+    """Rename the folder out of the way and delete it on a background thread.
+
+    Large setups hold many thousand files; removing them must not block the request.
+    """
+    trash = PHOTOS_DIR / f"{_TRASH_PREFIX}{setup_id}-{uuid.uuid4().hex[:8]}"
+    try:
+        folder.rename(trash)
+    except OSError:
+        shutil.rmtree(folder, ignore_errors=True)
+        return
+    threading.Thread(
+        target=shutil.rmtree,
+        args=(trash,),
+        kwargs={"ignore_errors": True},
+        name="photo-folder-delete",
+        daemon=True,
+    ).start()
+
+
+def migrate_flat_photos(batch_size: int = 500, dry_run: bool = False) -> dict:
+    """Move up to ``batch_size`` photos from ``<setup>/<file>`` into their date shard.
+
+    Safe while the backend runs: the file is moved first, then its index row. In
+    between, ``PhotoStaticFiles`` already resolves the old URL to the new location.
+    A flat file whose target already exists with other content is left in place and
+    counted in ``conflicts``, not in ``remaining``.
+    """
+    moved = 0
+    remaining = 0
+    conflicts = 0
+    if PHOTOS_DIR.exists():
+        for setup_dir in PHOTOS_DIR.iterdir():
+            if not setup_dir.is_dir() or setup_dir.name.startswith(_TRASH_PREFIX):
+                continue
+            with os.scandir(setup_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file() or not _PHOTO_NAME.match(entry.name):
+                        continue
+                    if moved >= batch_size or dry_run:
+                        remaining += 1
+                        continue
+                    old_path = f"{setup_dir.name}/{entry.name}"
+                    new_path = photo_relative_path(setup_dir.name, entry.name)
+                    target = PHOTOS_DIR / new_path
+                    if target.exists():
+                        # Never overwrite: only a byte-identical leftover of an earlier run is dropped.
+                        if not filecmp.cmp(entry.path, target, shallow=False):
+                            conflicts += 1
+                            log_event("photos.migrate_conflict", path=old_path, target=new_path)
+                            continue
+                        os.remove(entry.path)
+                        for size in PHOTO_DERIVATIVE_SIZES:
+                            derivative_path(Path(entry.path), size).unlink(missing_ok=True)
+                    else:
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        os.replace(entry.path, target)
+                        for size in PHOTO_DERIVATIVE_SIZES:
+                            derivative = derivative_path(Path(entry.path), size)
+                            if derivative.exists():
+                                os.replace(derivative, derivative_path(target, size))
+                    rename_photo_path(old_path, new_path)
+                    moved += 1
+    result = {"moved": moved, "remaining": remaining, "conflicts": conflicts}
+    if moved:
+        log_event("photos.migrated", **result)
+    return result
+
+
+def startup_photo_index() -> Optional[dict]:
+    """Owner start: drop leftover trash folders and reconcile until that has succeeded once.
+
+    Later starts skip the full folder scan; run scripts/reconcile-photo-index.py after
+    copying photos in by hand.
+    """
+    remove_photo_trash()
+    if PHOTO_INDEX_MARKER.exists():
+        return None
+    return reconcile_photo_index()
+
+
+def remove_photo_trash() -> None:
+    """Delete folders left over when the backend stopped during a background delete."""
+    if not PHOTOS_DIR.exists():
+        return
+    for entry in PHOTOS_DIR.iterdir():
+        if entry.is_dir() and entry.name.startswith(_TRASH_PREFIX):
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def reconcile_photo_index() -> dict:
+    """Bring the photos table in line with the files under PHOTOS_DIR.
+
+    Indexes photos written before the table existed or copied in by hand and drops
+    rows whose file is gone. Writes PHOTO_INDEX_MARKER when done.
+    """
+    indexed = list_photo_paths()
+    cameras = {row["setup_id"]: row.get("camera_id") for row in list_setups()}
+    found: set[str] = set()
+    missing: list[tuple[str, Optional[str], int, str, Optional[int]]] = []
+    if PHOTOS_DIR.exists():
+        for setup_dir in PHOTOS_DIR.iterdir():
+            if not setup_dir.is_dir() or setup_dir.name.startswith(_TRASH_PREFIX):
+                continue
+            setup_id = setup_dir.name
+            for entry in setup_dir.rglob("*.jpg"):
+                match = _PHOTO_NAME.match(entry.name)
+                if not match or match.group("setup") != setup_id or not entry.is_file():
+                    continue
+                relative_path = entry.relative_to(PHOTOS_DIR).as_posix()
+                found.add(relative_path)
+                if relative_path in indexed:
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                ts = _ts_from_stamp(match.group("stamp")) or int(stat.st_mtime * 1000)
+                missing.append((setup_id, cameras.get(setup_id), ts, relative_path, stat.st_size))
+    stale = sorted(indexed - found)
+    if missing:
+        insert_photos(missing)
+    if stale:
+        delete_photos_by_paths(stale)
+    result = {"indexed": len(found), "added": len(missing), "removed": len(stale)}
+    PHOTO_INDEX_MARKER.parent.mkdir(parents=True, exist_ok=True)
+    PHOTO_INDEX_MARKER.write_text(json.dumps({**result, "ts": int(time.time() * 1000)}), encoding="utf-8")
+    log_event("photos.reconciled", **result)
+    return result
+
+
+def _ts_from_stamp(stamp: str) -> Optional[int]:
+    # File names carry local time with second resolution, see camera_streaming._save_frame.
+    try:
+        return int(datetime.strptime(stamp, "%Y-%m-%d_%H-%M-%S").timestamp() * 1000)
+    except ValueError:
+        return None
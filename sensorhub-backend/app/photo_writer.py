@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException
+
+from .config import PHOTO_FSYNC, PHOTO_WRITER_QUEUE_SIZE, PHOTO_WRITER_THREADS, log_event
+from .utils.latency import LatencyStats
+
+
+class PhotoWriter:
+    """Writes photo files on a small thread pool so slow disks never block the event loop.
+
+    Files are written to a temporary name next to the target and renamed atomically.
+    ``PHOTO_FSYNC`` selects the durability: ``none``, ``file`` (fsync the file) or
+    ``full`` (additionally fsync the directory after the rename, POSIX only).
+    """
+    def __init__(
+        self,
+        threads: int = PHOTO_WRITER_THREADS,
+        queue_size: int = PHOTO_WRITER_QUEUE_SIZE,
+        fsync: str = PHOTO_FSYNC,
+    ) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="photo-writer")
+        self._queue_size = queue_size
+        self._fsync = fsync
+        self._pending = 0
+        self._written = 0
+        self._failed = 0
+        self._rejected = 0
+        self._linked = 0
+        self._bytes = 0
+        self._latency = LatencyStats()
+
+    async def write(self, path: Path, data: bytes) -> None:
+        if self._pending >= self._queue_size:
+            self._rejected += 1
+            log_event("photos.write_rejected", path=str(path), pending=self._pending)
+            raise HTTPException(status_code=503, detail="photo writer busy")
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, _write_atomic, path, data, self._fsync
+            )
+        except OSError as exc:
+            self._failed += 1
+            log_event("photos.write_failed", path=str(path), error=str(exc))
+            raise HTTPException(status_code=500, detail="photo write failed") from exc
+        finally:
+            self._pending -= 1
+        self._record(time.perf_counter() - started, len(data))
+
+    async def link(self, source: Path, path: Path, data: bytes) -> None:
+        """Store ``path`` as a hard link to the already written ``source``.
+
+        Falls back to writing ``data`` when the file system cannot link (FAT, other volume).
+        """
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, _link_atomic, source, path, self._fsync
+            )
+        except OSError as exc:
+            log_event("photos.link_fallback", path=str(path), error=str(exc))
+            await self.write(path, data)
+            return
+        self._linked += 1
+
+    def close(self) -> None:
+        # Waits for queued writes so photos taken right before shutdown are not lost.
+        self._executor.shutdown(wait=True)
+
+    def get_health(self) -> dict:
+        return {
+            "fsync": self._fsync,
+            "pending": self._pending,
+            "written": self._written,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "linked": self._linked,
+            "bytes": self._bytes,
+            **self._latency.to_dict(),
+        }
+
+    def _record(self, elapsed_sec: float, size: int) -> None:
+        self._written += 1
+        self._bytes += size
+        self._latency.record(elapsed_sec * 1000)
+
+
+def _write_atomic(path: Path, data: bytes, fsync: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(temp_path, "wb") as handle:
+            handle.write(data)
+            if fsync in ("file", "full"):
+                handle.flush()
+                os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+        raise
+    if fsync == "full":
+        _fsync_dir(path.parent)
+
+
+def _link_atomic(source: Path, path: Path, fsync: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        os.link(source, temp_path)
+        os.replace(temp_path, path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+        raise
+    if fsync == "full":
+        _fsync_dir(path.parent)
+
+
+def _fsync_dir(path: Path) -> None:
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+_WRITER: Optional[PhotoWriter] = None
+
+
+def get_photo_writer() -> PhotoWriter:
+    global _WRITER
+    if not _WRITER:
+        _WRITER = PhotoWriter()
+    return _WRITER
+
+
+def close_photo_writer() -> None:
+    global _WRITER
+    if _WRITER:
+        _WRITER.close()
+        _WRITER = None
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import struct
+import uuid
+from typing import Optional
+
+from .config import (
+    PUBSUB_BACKEND,
+    PUBSUB_BROKER_HOST,
+    PUBSUB_BROKER_PORT,
+    PUBSUB_MAX_BUFFER_BYTES,
+    SENSORHUB_ROLE,
+    log_event,
+)
+
+PUBSUB_QUEUE_SIZE = 64
+_MSG_HEADER = struct.Struct("!cHI")
+_KIND_PUBLISH = b"P"
+_KIND_SUBSCRIBE = b"S"
+_KIND_UNSUBSCRIBE = b"U"
+_RECONNECT_DELAY_SEC = 1.0
+CLIENT_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class InProcessPubSub:
+    """Topic based fan-out inside one process; also the base for the socket backends."""
+    def __init__(self) -> None:
+        self._topics: dict[str, set[asyncio.Queue[bytes]]] = {}
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        self._topics.clear()
+
+    def subscribe(self, topic: str, maxsize: int = PUBSUB_QUEUE_SIZE) -> asyncio.Queue[bytes]:
+        queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=maxsize)
+        self._topics.setdefault(topic, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue[bytes]) -> None:
+        queues = self._topics.get(topic)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            self._topics.pop(topic, None)
+
+    def publish(self, topic: str, payload: bytes) -> None:
+        self._deliver_local(topic, payload)
+
+    def get_health(self) -> dict:
+        return {
+            "backend": "inprocess",
+            "topics": len(self._topics),
+            "subscribers": sum(len(queues) for queues in self._topics.values()),
+        }
+
+    def _deliver_local(self, topic: str, payload: bytes) -> None:
+        for queue in list(self._topics.get(topic, ())):
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                pass
+
+
+class BrokerPubSub(InProcessPubSub):
+    """In-process pub/sub that also serves remote subscribers over a local TCP socket."""
+    def __init__(self, host: str, port: int) -> None:
+        super().__init__()
+        self._host = host
+        self._port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._remote: dict[str, set[asyncio.StreamWriter]] = {}
+        self._dropped = 0
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_client, self._host, self._port)
+        log_event("pubsub.broker_started", host=self._host, port=self._port)
+
+    async def stop(self) -> None:
+        for writers in self._remote.values():
+            for writer in writers:
+                writer.close()
+        self._remote.clear()
+        if self._server:
+            self._server.close()
+            self._server = None
+        await super().stop()
+
+    def publish(self, topic: str, payload: bytes) -> None:
+        self._deliver_local(topic, payload)
+        writers = self._remote.get(topic)
+        if not writers:
+            return
+        message = _encode_message(_KIND_PUBLISH, topic, payload)
+        for writer in list(writers):
+            if writer.transport.get_write_buffer_size() > PUBSUB_MAX_BUFFER_BYTES:
+                self._dropped += 1
+                continue
+            writer.write(message)
+
+    def get_health(self) -> dict:
+        connections = {writer for writers in self._remote.values() for writer in writers}
+        return {
+            "backend": "broker",
+            "topics": len(self._topics),
+            "subscribers": sum(len(queues) for queues in self._topics.values()),
+            "remoteConnections": len(connections),
+            "dropped": self._dropped,
+        }
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        topics: set[str] = set()
+        try:
+            while True:
+                kind, topic, payload = await _read_message(reader)
+                if kind == _KIND_SUBSCRIBE:
+                    topics.add(topic)
+                    self._remote.setdefault(topic, set()).add(writer)
+                elif kind == _KIND_UNSUBSCRIBE:
+                    topics.discard(topic)
+                    self._discard_remote(topic, writer)
+                elif kind == _KIND_PUBLISH:
+                    self.publish(topic, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as exc:
+            log_event("pubsub.broker_client_error", error=str(exc))
+        finally:
+            for topic in topics:
+                self._discard_remote(topic, writer)
+            writer.close()
+
+    def _discard_remote(self, topic: str, writer: asyncio.StreamWriter) -> None:
+        writers = self._remote.get(topic)
+        if writers is None:
+            return
+        writers.discard(writer)
+        if not writers:
+            self._remote.pop(topic, None)
+
+
+class SocketPubSub(InProcessPubSub):
+    """Client of a BrokerPubSub; local subscribers are fed from the broker connection."""
+    def __init__(self, host: str, port: int) -> None:
+        super().__init__()
+        self._host = host
+        self._port = port
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._dropped = 0
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        await super().stop()
+
+    def subscribe(self, topic: str, maxsize: int = PUBSUB_QUEUE_SIZE) -> asyncio.Queue[bytes]:
+        first = topic not in self._topics
+        queue = super().subscribe(topic, maxsize=maxsize)
+        if first:
+            self._send(_KIND_SUBSCRIBE, topic)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue[bytes]) -> None:
+        super().unsubscribe(topic, queue)
+        if topic not in self._topics:
+            self._send(_KIND_UNSUBSCRIBE, topic)
+
+    def publish(self, topic: str, payload: bytes) -> None:
+        if not self._send(_KIND_PUBLISH, topic, payload):
+            self._dropped += 1
+
+    def get_health(self) -> dict:
+        return {
+            "backend": "socket",
+            "connected": self._writer is not None,
+            "topics": len(self._topics),
+            "subscribers": sum(len(queues) for queues in self._topics.values()),
+            "dropped": self._dropped,
+        }
+
+    def _send(self, kind: bytes, topic: str, payload: bytes = b"") -> bool:
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            return False
+        if kind == _KIND_PUBLISH and writer.transport.get_write_buffer_size() > PUBSUB_MAX_BUFFER_BYTES:
+            return False
+        writer.write(_encode_message(kind, topic, payload))
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self._host, self._port)
+            except OSError as exc:
+                log_event("pubsub.connect_failed", host=self._host, port=self._port, error=str(exc))
+                await asyncio.sleep(_RECONNECT_DELAY_SEC)
+                continue
+            self._writer = writer
+            log_event("pubsub.connected", host=self._host, port=self._port)
+            for topic in list(self._topics.keys()):
+                self._send(_KIND_SUBSCRIBE, topic)
+            try:
+                while True:
+                    kind, topic, payload = await _read_message(reader)
+                    if kind == _KIND_PUBLISH:
+                        self._deliver_local(topic, payload)
+            except (asyncio.IncompleteReadError, ConnectionError) as exc:
+                log_event("pubsub.disconnected", error=str(exc) or type(exc).__name__)
+            finally:
+                self._writer = None
+                writer.close()
+            await asyncio.sleep(_RECONNECT_DELAY_SEC)
+
+
+def _encode_message(kind: bytes, topic: str, payload: bytes) -> bytes:
+    topic_bytes = topic.encode("utf-8")
+    return _MSG_HEADER.pack(kind, len(topic_bytes), len(payload)) + topic_bytes + payload
+
+
+async def _read_message(reader: asyncio.StreamReader) -> tuple[bytes, str, bytes]:
+    header = await reader.readexactly(_MSG_HEADER.size)
+    kind, topic_len, payload_len = _MSG_HEADER.unpack(header)
+    topic = (await reader.readexactly(topic_len)).decode("utf-8")
+    payload = await reader.readexactly(payload_len) if payload_len else b""
+    return kind, topic, payload
+
+
+_PUBSUB: Optional[InProcessPubSub] = None
+
+
+def get_pubsub() -> InProcessPubSub:
+    global _PUBSUB
+    if not _PUBSUB:
+        if PUBSUB_BACKEND == "socket" and SENSORHUB_ROLE == "owner":
+            _PUBSUB = BrokerPubSub(PUBSUB_BROKER_HOST, PUBSUB_BROKER_PORT)
+        elif PUBSUB_BACKEND == "socket":
+            _PUBSUB = SocketPubSub(PUBSUB_BROKER_HOST, PUBSUB_BROKER_PORT)
+        else:
+            _PUBSUB = InProcessPubSub()
+    return _PUBSUB
+
+
+def is_acquisition_owner() -> bool:
+    return SENSORHUB_ROLE in ("standalone", "owner")
+
+
+def is_distributed() -> bool:
+    return SENSORHUB_ROLE != "standalone"
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+from fastapi import HTTPException
+
+from .config import POLL_INTERVALS, log_event
+from .db import list_setups
+from .nodes import fetch_node_reading
+from .pubsub import get_pubsub
+from .scheduler import run_periodic
+
+READING_QUEUE_SIZE = 256
+READINGS_TOPIC = "readings"
+
+
+@dataclass(frozen=True)
+class ReadingEvent:
+    setup_id: str
+    node_id: str
+    reading: dict[str, Any]
+    seq: int = 0
+
+
+class ReadingBus:
+    """Fans out each node reading once to every in-process consumer."""
+    def __init__(self) -> None:
+        self._subscribers: set[asyncio.Queue[ReadingEvent]] = set()
+        # Seeded from the clock so sequence numbers keep growing across restarts.
+        self._seq = int(time.time() * 1000)
+
+    def subscribe(self, maxsize: int = READING_QUEUE_SIZE) -> asyncio.Queue[ReadingEvent]:
+        queue: asyncio.Queue[ReadingEvent] = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[ReadingEvent]) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, event: ReadingEvent) -> ReadingEvent:
+        if not event.seq:
+            self._seq += 1
+            event = replace(event, seq=self._seq)
+        for queue in list(self._subscribers):
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+                log_event("reading_bus.dropped", setup_id=event.setup_id)
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+        return event
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+class ReadingAcquisition:
+    """Runs one polling task per node that is assigned to at least one setup."""
+    def __init__(self, bus: ReadingBus) -> None:
+        self._bus = bus
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._setups_by_node: dict[str, list[str]] = {}
+
+    async def run(self) -> None:
+        async def work() -> None:
+            setups_by_node: dict[str, list[str]] = {}
+            for setup in list_setups():
+                node_id = setup.get("node_id")
+                if node_id:
+                    setups_by_node.setdefault(node_id, []).append(setup["setup_id"])
+            self._setups_by_node = setups_by_node
+            for node_id in list(self._tasks.keys()):
+                if node_id not in setups_by_node:
+                    self._tasks.pop(node_id).cancel()
+                    log_event("reading_acquisition.stop", node_id=node_id)
+            for node_id in setups_by_node:
+                task = self._tasks.get(node_id)
+                if task and not task.done():
+                    continue
+                self._tasks[node_id] = asyncio.create_task(self._poll_node(node_id))
+                log_event("reading_acquisition.start", node_id=node_id)
+
+        try:
+            await run_periodic(
+                "reading_acquisition",
+                lambda: POLL_INTERVALS.live_poll_sec,
+                work,
+                min_sleep_sec=1,
+            )
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            self._tasks.clear()
+
+    async def _poll_node(self, node_id: str) -> None:
+        while True:
+            setup_ids = list(self._setups_by_node.get(node_id, []))
+            if setup_ids:
+                reading = await _fetch_reading(setup_ids[0], node_id)
+                if reading:
+                    for setup_id in setup_ids:
+                        self._bus.publish(ReadingEvent(setup_id=setup_id, node_id=node_id, reading=reading))
+            await asyncio.sleep(max(1, int(POLL_INTERVALS.live_poll_sec)))
+
+
+async def _fetch_reading(setup_id: str, node_id: str) -> Optional[dict[str, Any]]:
+    try:
+        return await fetch_node_reading(setup_id, node_id)
+    except HTTPException:
+        return None
+
+
+_BUS: Optional[ReadingBus] = None
+
+
+def get_reading_bus() -> ReadingBus:
+    global _BUS
+    if not _BUS:
+        _BUS = ReadingBus()
+    return _BUS
+
+
+async def reading_acquisition_loop() -> None:
+    await ReadingAcquisition(get_reading_bus()).run()
+
+
+async def reading_publish_loop() -> None:
+    """Forward locally acquired readings to API workers (owner role)."""
+    bus = get_reading_bus()
+    pubsub = get_pubsub()
+    queue = bus.subscribe()
+    try:
+        while True:
+            event = await queue.get()
+            payload = {
+                "setupId": event.setup_id,
+                "nodeId": event.node_id,
+                "reading": event.reading,
+                "seq": event.seq,
+            }
+            pubsub.publish(READINGS_TOPIC, json.dumps(payload).encode("utf-8"))
+    finally:
+        bus.unsubscribe(queue)
+
+
+async def reading_relay_loop() -> None:
+    """Feed readings published by the acquisition owner into the local bus (api role)."""
+    bus = get_reading_bus()
+    pubsub = get_pubsub()
+    queue = pubsub.subscribe(READINGS_TOPIC, maxsize=READING_QUEUE_SIZE)
+    try:
+        while True:
+            raw = await queue.get()
+            try:
+                data = json.loads(raw)
+                event = ReadingEvent(
+                    setup_id=data["setupId"],
+                    node_id=data["nodeId"],
+                    reading=data["reading"],
+                    seq=int(data.get("seq") or 0),
+                )
+                bus.publish(event)
+            except (ValueError, KeyError, TypeError) as exc:
+                log_event("reading_bus.bad_message", error=str(exc))
+    finally:
+        pubsub.unsubscribe(READINGS_TOPIC, queue)
@@ -2,28 +2,40 @@ from __future__ import annotations
 
 import asyncio
 import json
+import math
+import struct
 import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 from typing import Any, Optional
 
-from fastapi import HTTPException, WebSocket
+from fastapi import WebSocket
 
-from .config import DEFAULT_VALUE_INTERVAL_MINUTES, POLL_INTERVALS
-from .db import get_setup, insert_reading, list_setups
-from .nodes import fetch_node_reading
-from .scheduler import run_periodic
+from .config import (
+    DEFAULT_VALUE_INTERVAL_MINUTES,
+    LIVE_CLIENT_QUEUE_SIZE,
+    LIVE_REPLAY_SIZE,
+    LIVE_SEND_TIMEOUT_SEC,
+    log_event,
+)
+from .db import get_setup, insert_reading
+from .live_events import LiveEventLog
+from .pubsub import get_pubsub, is_distributed
+from .reading_bus import ReadingEvent, get_reading_bus
 
-
-async def _fetch_live_reading(setup_id: str, node_id: Optional[str]) -> Optional[dict[str, Any]]:
-    try:
-        return await fetch_node_reading(setup_id, node_id)
-    except HTTPException:
-        return None
+EVENTS_TOPIC = "events"
+# Binary reading record: kind, setup id length, seq, ts, ph, ec, temp, status length.
+READING_RECORD = struct.Struct("<BHQQfffH")
+READING_RECORD_KIND = 1
+# Outbox key shared by the cameraDevices baseline and its deltas.
+_DEVICE_STATE_KEY = "cameraDevices"
 
 
-def _build_reading_payload(setup_id: str, reading: dict[str, Any]) -> dict[str, Any]:
+def _build_reading_payload(setup_id: str, reading: dict[str, Any], seq: int) -> dict[str, Any]:
     return {
         "t": "reading",
         "setupId": setup_id,
+        "seq": seq,
         "ts": reading["ts"],
         "ph": reading["ph"],
         "ec": reading["ec"],
@@ -32,6 +44,40 @@ def _build_reading_payload(setup_id: str, reading: dict[str, Any]) -> dict[str,
     }
 
 
+def _encode_reading_record(payload: dict[str, Any]) -> bytes:
+    setup_bytes = payload["setupId"].encode("utf-8")
+    status_bytes = ",".join(payload.get("status") or []).encode("utf-8")
+    return (
+        READING_RECORD.pack(
+            READING_RECORD_KIND,
+            len(setup_bytes),
+            payload["seq"],
+            int(payload["ts"]),
+            _record_float(payload.get("ph")),
+            _record_float(payload.get("ec")),
+            _record_float(payload.get("temp")),
+            len(status_bytes),
+        )
+        + setup_bytes
+        + status_bytes
+    )
+
+
+def _record_float(value: Any) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _camera_devices_delta(
+    previous: dict[str, dict[str, Any]],
+    current: dict[str, dict[str, Any]],
+) -> Optional[dict[str, Any]]:
+    upsert = [device for camera_id, device in current.items() if previous.get(camera_id) != device]
+    remove = [camera_id for camera_id in previous if camera_id not in current]
+    if not upsert and not remove:
+        return None
+    return {"t": "cameraDevicesDelta", "upsert": upsert, "remove": remove}
+
+
 LIVE_MANAGER: Optional["LiveManager"] = None
 
 
@@ -40,117 +86,371 @@ def register_live_manager(manager: "LiveManager") -> None:
     LIVE_MANAGER = manager
 
 
+def get_live_health() -> dict:
+    if not LIVE_MANAGER:
+        return {}
+    return LIVE_MANAGER.get_health()
+
+
+def publish_export_job(job: dict[str, Any]) -> None:
+    if LIVE_MANAGER:
+        LIVE_MANAGER.publish_job({"t": "exportJob", **job})
+
+
 async def broadcast_system_reset(reason: str) -> None:
     if LIVE_MANAGER:
+        LIVE_MANAGER.clear_history()
         await LIVE_MANAGER.broadcast_all({"t": "reset", "reason": reason})
 
 
+@dataclass(frozen=True)
+class LiveMessage:
+    """A live message encoded once and shared by all clients that use the same format."""
+    text: str
+    binary: Optional[bytes] = None
+
+
+@dataclass(eq=False)
+class LiveClient:
+    ws: WebSocket
+    setups: set[str] = field(default_factory=set)
+    jobs: set[str] = field(default_factory=set)
+    outbox: OrderedDict[Any, str | bytes] = field(default_factory=OrderedDict)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    writer: Optional[asyncio.Task[None]] = None
+    binary: bool = False
+    deltas: bool = False
+    has_device_baseline: bool = False
+    dropped: int = 0
+    coalesced: int = 0
+
+    def enqueue_message(self, message: LiveMessage, coalesce_key: Optional[str] = None) -> None:
+        if self.binary and message.binary is not None:
+            self.enqueue(message.binary, coalesce_key=coalesce_key)
+        else:
+            self.enqueue(message.text, coalesce_key=coalesce_key)
+
+    def enqueue(self, data: str | bytes, coalesce_key: Optional[str] = None) -> None:
+        """Queue a message; a newer message with the same key replaces a stale one."""
+        if coalesce_key is not None and coalesce_key in self.outbox:
+            self.outbox[coalesce_key] = data
+            self.coalesced += 1
+            return
+        if len(self.outbox) >= LIVE_CLIENT_QUEUE_SIZE:
+            # Device state is never dropped while other messages are queued: deltas only apply on top of it.
+            oldest = next((key for key in self.outbox if key != _DEVICE_STATE_KEY), _DEVICE_STATE_KEY)
+            del self.outbox[oldest]
+            if oldest == _DEVICE_STATE_KEY:
+                self.has_device_baseline = False
+            self.dropped += 1
+        key: Any = coalesce_key if coalesce_key is not None else object()
+        self.outbox[key] = data
+        self.ready.set()
+
+
 class LiveManager:
     def __init__(self) -> None:
+        self._clients: dict[WebSocket, LiveClient] = {}
         self._subscriptions: dict[str, set[WebSocket]] = {}
-        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._job_watchers: dict[str, set[WebSocket]] = {}
+        self._history: dict[str, deque[tuple[int, LiveMessage]]] = {}
+        # Newest seq per setup that fell out of the replay buffer, and the first seq this process saw.
+        self._evicted_seq: dict[str, int] = {}
+        self._first_seq: Optional[int] = None
+        self._camera_devices: Optional[dict[str, dict[str, Any]]] = None
         self._lock = asyncio.Lock()
+        self.events = LiveEventLog()
 
-    async def subscribe(self, setup_id: str, ws: WebSocket) -> None:
+    async def connect(self, ws: WebSocket) -> None:
         async with self._lock:
+            self._ensure_client(ws)
+
+    async def subscribe(self, setup_id: str, ws: WebSocket, since: Optional[int] = None) -> None:
+        """Subscribe and replay buffered readings, only those newer than ``since`` if given."""
+        async with self._lock:
+            client = self._ensure_client(ws)
+            client.setups.add(setup_id)
             self._subscriptions.setdefault(setup_id, set()).add(ws)
-            if setup_id not in self._tasks:
-                self._tasks[setup_id] = asyncio.create_task(self._poll_setup(setup_id))
+            history = list(self._history.get(setup_id, ()))
+            if since is not None:
+                if history and since >= history[-1][0]:
+                    history = []
+                else:
+                    if self._missed_since(setup_id, since):
+                        client.enqueue(json.dumps({"t": "gap", "setupId": setup_id}))
+                    history = [entry for entry in history if entry[0] > since]
+            for _, message in history:
+                client.enqueue_message(message)
+        if not get_setup(setup_id):
+            self.send(ws, {"t": "error", "setupId": setup_id, "msg": "setup missing"})
+
+    def _missed_since(self, setup_id: str, since: int) -> bool:
+        """True if readings newer than ``since`` may exist that the replay buffer no longer holds."""
+        if self._first_seq is None or since < self._first_seq - 1:
+            return True
+        return since < self._evicted_seq.get(setup_id, since)
+
+    async def watch_job(self, job_id: str, ws: WebSocket, snapshot: dict[str, Any]) -> None:
+        """Send the job state now and on every change until it is done or failed."""
+        async with self._lock:
+            client = self._ensure_client(ws)
+            client.enqueue(json.dumps({"t": "exportJob", **snapshot}), coalesce_key=f"exportJob:{job_id}")
+            if snapshot.get("status") in ("done", "failed"):
+                return
+            client.jobs.add(job_id)
+            self._job_watchers.setdefault(job_id, set()).add(ws)
 
     async def unsubscribe(self, setup_id: str, ws: WebSocket) -> None:
         async with self._lock:
-            subscribers = self._subscriptions.get(setup_id)
-            if subscribers and ws in subscribers:
-                subscribers.remove(ws)
-            if not subscribers:
-                self._subscriptions.pop(setup_id, None)
-                task = self._tasks.pop(setup_id, None)
-                if task:
-                    task.cancel()
+            client = self._clients.get(ws)
+            if client:
+                client.setups.discard(setup_id)
+            self._discard_subscription(setup_id, ws)
 
     async def remove_ws(self, ws: WebSocket) -> None:
         async with self._lock:
-            for setup_id, subscribers in list(self._subscriptions.items()):
-                if ws in subscribers:
-                    subscribers.remove(ws)
-                if not subscribers:
-                    self._subscriptions.pop(setup_id, None)
-                    task = self._tasks.pop(setup_id, None)
-                    if task:
-                        task.cancel()
-
-    async def _poll_setup(self, setup_id: str) -> None:
-        while True:
-            setup = get_setup(setup_id)
-            if not setup:
-                await self._broadcast(setup_id, {"t": "error", "setupId": setup_id, "msg": "setup missing"})
-                await asyncio.sleep(2)
-                continue
-            node_id = setup.get("node_id")
-            poll_interval_sec = max(1, int(POLL_INTERVALS.live_poll_sec))
-            reading = await _fetch_live_reading(setup_id, node_id)
-            if reading:
-                await self._broadcast(setup_id, _build_reading_payload(setup_id, reading))
-            await asyncio.sleep(poll_interval_sec)
-
-    async def _broadcast(self, setup_id: str, payload: dict[str, Any]) -> None:
-        subscribers = self._subscriptions.get(setup_id, set())
+            client = self._clients.pop(ws, None)
+            if not client:
+                return
+            for setup_id in client.setups:
+                self._discard_subscription(setup_id, ws)
+            client.setups.clear()
+            for job_id in client.jobs:
+                watchers = self._job_watchers.get(job_id)
+                if watchers is not None:
+                    watchers.discard(ws)
+                    if not watchers:
+                        self._job_watchers.pop(job_id, None)
+            client.jobs.clear()
+        if client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    async def configure(self, ws: WebSocket, encoding: Optional[str], deltas: bool) -> None:
+        """Apply the options a client negotiated with a ``hello`` message."""
+        async with self._lock:
+            client = self._ensure_client(ws)
+            client.binary = encoding == "binary"
+            client.deltas = deltas
+            client.has_device_baseline = False
+            client.enqueue(json.dumps({"t": "hello", "enc": "binary" if client.binary else "json", "deltas": deltas}))
+            if deltas and self._camera_devices is not None:
+                devices = list(self._camera_devices.values())
+                client.enqueue(json.dumps({"t": "cameraDevices", "devices": devices}), coalesce_key=_DEVICE_STATE_KEY)
+                client.has_device_baseline = True
+
+    def send(self, ws: WebSocket, payload: dict[str, Any]) -> None:
+        client = self._clients.get(ws)
+        if client:
+            client.enqueue(json.dumps(payload))
+
+    def clear_history(self) -> None:
+        self._history.clear()
+        self._evicted_seq.clear()
+        self._first_seq = None
+        self.events.clear()
+
+    def get_health(self) -> dict:
+        clients = list(self._clients.values())
+        return {
+            "clientCount": len(clients),
+            "subscriptionCount": sum(len(client.setups) for client in clients),
+            "queued": sum(len(client.outbox) for client in clients),
+            "dropped": sum(client.dropped for client in clients),
+            "coalesced": sum(client.coalesced for client in clients),
+            "replaySetups": len(self._history),
+            "sseStreams": self.events.stream_count(),
+        }
+
+    async def run(self) -> None:
+        """Forward readings from the shared bus to subscribed WebSockets."""
+        bus = get_reading_bus()
+        queue = bus.subscribe()
+        try:
+            while True:
+                event = await queue.get()
+                try:
+                    payload = _build_reading_payload(event.setup_id, event.reading, event.seq)
+                    message = LiveMessage(text=json.dumps(payload), binary=_encode_reading_record(payload))
+                    history = self._history.get(event.setup_id)
+                    if history is None:
+                        history = self._history[event.setup_id] = deque(maxlen=LIVE_REPLAY_SIZE)
+                    if len(history) == history.maxlen:
+                        self._evicted_seq[event.setup_id] = history[0][0]
+                    if self._first_seq is None:
+                        self._first_seq = event.seq
+                    history.append((event.seq, message))
+                    self.events.append(payload["t"], event.setup_id, message.text)
+                    self._broadcast(event.setup_id, payload["t"], message)
+                except Exception as exc:
+                    log_event("loop.error", loop="live_updates", error=str(exc))
+        finally:
+            bus.unsubscribe(queue)
+
+    def _broadcast(self, setup_id: str, msg_type: str, message: LiveMessage) -> None:
+        subscribers = self._subscriptions.get(setup_id)
         if not subscribers:
             return
-        data = json.dumps(payload)
+        coalesce_key = f"{msg_type}:{setup_id}"
         for ws in list(subscribers):
-            try:
-                await ws.send_text(data)
-            except Exception:
-                await self.unsubscribe(setup_id, ws)
+            client = self._clients.get(ws)
+            if client:
+                client.enqueue_message(message, coalesce_key=coalesce_key)
 
     async def broadcast_all(self, payload: dict[str, Any]) -> None:
         data = json.dumps(payload)
-        for setup_id, subscribers in list(self._subscriptions.items()):
-            for ws in list(subscribers):
+        if is_distributed():
+            get_pubsub().publish(EVENTS_TOPIC, data.encode("utf-8"))
+            return
+        self._deliver_all(payload, data)
+
+    def publish_job(self, payload: dict[str, Any]) -> None:
+        data = json.dumps(payload)
+        if is_distributed():
+            get_pubsub().publish(EVENTS_TOPIC, data.encode("utf-8"))
+            return
+        self._deliver_job(payload, data)
+
+    async def run_events(self) -> None:
+        """Deliver device and system events published by any process (distributed roles)."""
+        pubsub = get_pubsub()
+        queue = pubsub.subscribe(EVENTS_TOPIC)
+        try:
+            while True:
+                raw = await queue.get()
                 try:
-                    await ws.send_text(data)
-                except Exception:
-                    await self.unsubscribe(setup_id, ws)
+                    data = raw.decode("utf-8")
+                    self._deliver_all(json.loads(data), data)
+                except ValueError as exc:
+                    log_event("live.bad_event", error=str(exc))
+        finally:
+            pubsub.unsubscribe(EVENTS_TOPIC, queue)
+
+    def _deliver_all(self, payload: dict[str, Any], data: str) -> None:
+        if payload.get("t") == "exportJob":
+            self._deliver_job(payload, data)
+            return
+        self.events.append(payload.get("t") or "event", None, data)
+        if payload.get("t") == "cameraDevices":
+            self._deliver_camera_devices(payload, data)
+            return
+        for client in list(self._clients.values()):
+            client.enqueue(data)
+
+    def _deliver_camera_devices(self, payload: dict[str, Any], data: str) -> None:
+        current = {device.get("cameraId"): device for device in payload.get("devices") or []}
+        delta = _camera_devices_delta(self._camera_devices or {}, current)
+        self._camera_devices = current
+        delta_data = json.dumps(delta) if delta else None
+        for client in list(self._clients.values()):
+            # A queued baseline or delta is replaced by the full list rather than stacking deltas.
+            if client.deltas and client.has_device_baseline and _DEVICE_STATE_KEY not in client.outbox:
+                if delta_data:
+                    client.enqueue(delta_data, coalesce_key=_DEVICE_STATE_KEY)
+                continue
+            client.enqueue(data, coalesce_key=_DEVICE_STATE_KEY)
+            client.has_device_baseline = True
+
+    def _deliver_job(self, payload: dict[str, Any], data: str) -> None:
+        job_id = payload.get("jobId")
+        watchers = self._job_watchers.get(job_id)
+        if not watchers:
+            return
+        finished = payload.get("status") in ("done", "failed")
+        for ws in list(watchers):
+            client = self._clients.get(ws)
+            if not client:
+                continue
+            client.enqueue(data, coalesce_key=f"exportJob:{job_id}")
+            if finished:
+                client.jobs.discard(job_id)
+        if finished:
+            self._job_watchers.pop(job_id, None)
+
+    def _ensure_client(self, ws: WebSocket) -> LiveClient:
+        client = self._clients.get(ws)
+        if not client:
+            client = LiveClient(ws=ws)
+            client.writer = asyncio.create_task(self._write_loop(client))
+            self._clients[ws] = client
+        return client
+
+    def _discard_subscription(self, setup_id: str, ws: WebSocket) -> None:
+        subscribers = self._subscriptions.get(setup_id)
+        if subscribers is None:
+            return
+        subscribers.discard(ws)
+        if not subscribers:
+            self._subscriptions.pop(setup_id, None)
+
+    async def _write_loop(self, client: LiveClient) -> None:
+        try:
+            while True:
+                await client.ready.wait()
+                while client.outbox:
+                    _, data = client.outbox.popitem(last=False)
+                    if isinstance(data, bytes):
+                        send = client.ws.send_bytes(data)
+                    else:
+                        send = client.ws.send_text(data)
+                    await asyncio.wait_for(send, timeout=LIVE_SEND_TIMEOUT_SEC)
+                client.ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            log_event("live.client_dropped", error=str(exc) or type(exc).__name__, dropped=client.dropped)
+            await self.remove_ws(client.ws)
+            try:
+                await client.ws.close()
+            except Exception:
+                pass
 
 
 async def readings_capture_loop() -> None:
+    """Persist bus readings whenever a setup's value interval is due."""
     next_due_by_setup: dict[str, int] = {}
+    bus = get_reading_bus()
+    queue = bus.subscribe()
 
-    async def work() -> None:
+    def persist(event: ReadingEvent) -> None:
+        setup = get_setup(event.setup_id)
+        if not setup or setup.get("node_id") != event.node_id:
+            return
+        setup_id = event.setup_id
         now_ms = int(time.time() * 1000)
-        for setup in list_setups():
-            setup_id = setup["setup_id"]
-            node_id = setup.get("node_id")
-            if not node_id:
-                continue
-            interval_minutes = setup.get("value_interval_minutes")
-            if interval_minutes is None:
-                interval_minutes = DEFAULT_VALUE_INTERVAL_MINUTES
-            if interval_minutes <= 0:
-                continue
-            interval_ms = int(interval_minutes * 60 * 1000)
-            if setup_id not in next_due_by_setup:
-                next_due_by_setup[setup_id] = now_ms + interval_ms
-                continue
-            next_due = next_due_by_setup.get(setup_id, 0)
-            if now_ms < next_due:
-                continue
-            reading = await _fetch_live_reading(setup_id, node_id)
-            if reading:
-                ts = int(reading.get("ts") or now_ms)
-                insert_reading(
-                    setup_id=setup_id,
-                    node_id=node_id,
-                    ts=ts,
-                    ph=reading.get("ph"),
-                    ec=reading.get("ec"),
-                    temp=reading.get("temp"),
-                    status=reading.get("status"),
-                )
-            next_due = next_due + interval_ms
-            if next_due <= now_ms:
-                next_due = now_ms + interval_ms
-            next_due_by_setup[setup_id] = next_due
-
-    await run_periodic("readings_capture", lambda: 1, work, min_sleep_sec=1)
+        interval_minutes = setup.get("value_interval_minutes")
+        if interval_minutes is None:
+            interval_minutes = DEFAULT_VALUE_INTERVAL_MINUTES
+        if interval_minutes <= 0:
+            return
+        interval_ms = int(interval_minutes * 60 * 1000)
+        if setup_id not in next_due_by_setup:
+            next_due_by_setup[setup_id] = now_ms + interval_ms
+            return
+        next_due = next_due_by_setup.get(setup_id, 0)
+        if now_ms < next_due:
+            return
+        reading = event.reading
+        ts = int(reading.get("ts") or now_ms)
+        insert_reading(
+            setup_id=setup_id,
+            node_id=event.node_id,
+            ts=ts,
+            ph=reading.get("ph"),
+            ec=reading.get("ec"),
+            temp=reading.get("temp"),
+            status=reading.get("status"),
+        )
+        next_due = next_due + interval_ms
+        if next_due <= now_ms:
+            next_due = now_ms + interval_ms
+        next_due_by_setup[setup_id] = next_due
+
+    try:
+        while True:
+            event = await queue.get()
+            try:
+                persist(event)
+            except Exception as exc:
+                log_event("loop.error", loop="readings_capture", error=str(exc))
+    finally:
+        bus.unsubscribe(queue)
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import struct
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.responses import StreamingResponse
+
+from .camera_worker_manager import MJPEG_BOUNDARY
+from .config import PHOTOS_DIR
+from .db import get_setup, iter_photos
+from .utils.paths import resolve_under, validate_identifier
+
+TIMELAPSE_FORMATS = ("mjpeg", "avi")
+TIMELAPSE_MAX_FPS = 60
+_PART_HEADER = f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n\r\n".encode("ascii")
+_AVI_MAX_BYTES = 0xFFFFFFFF
+_AVIF_HASINDEX = 0x10
+_AVIIF_KEYFRAME = 0x10
+_AVI_INDEX_BATCH = 4096
+# RIFF header, hdrl list (avih + strl with strh/strf) and the movi list header.
+_AVI_HEADER_LEN = 12 + 200 + 12
+
+
+@dataclass(frozen=True)
+class TimelapseFrame:
+    path: Path
+    size: int
+    ts: int
+
+
+async def stream_timelapse(
+    setup_id: str,
+    fps: float,
+    stride: int = 1,
+    fmt: str = "mjpeg",
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+) -> StreamingResponse:
+    """Stream stored photos as MJPEG or as an AVI download, without re-encoding.
+
+    Only the frame list comes from the photos index up front; the JPEGs are read
+    one at a time while the response is sent.
+    """
+    safe_setup_id = validate_identifier(setup_id, "setup_id")
+    if fmt not in TIMELAPSE_FORMATS:
+        raise HTTPException(status_code=400, detail="invalid format")
+    if not get_setup(safe_setup_id):
+        raise HTTPException(status_code=404, detail="setup not found")
+    frames = await asyncio.to_thread(plan_timelapse, safe_setup_id, stride, since, until)
+    if not frames:
+        raise HTTPException(status_code=404, detail="no photos in range")
+    if fmt == "mjpeg":
+        return StreamingResponse(
+            _iter_mjpeg(frames, fps),
+            media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        )
+    first = await asyncio.to_thread(_read_frame, frames[0])
+    dimensions = _jpeg_dimensions(first)
+    if not dimensions:
+        raise HTTPException(status_code=422, detail="unreadable photo")
+    total = avi_length(frames)
+    if total - 8 > _AVI_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="timelapse too large, narrow the range or raise stride")
+    return StreamingResponse(
+        _iter_avi(frames, fps, *dimensions),
+        media_type="video/x-msvideo",
+        headers={
+            "Content-Length": str(total),
+            "Content-Disposition": f'attachment; filename="{safe_setup_id}-timelapse.avi"',
+        },
+    )
+
+
+def plan_timelapse(
+    setup_id: str,
+    stride: int = 1,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+) -> list[TimelapseFrame]:
+    frames: list[TimelapseFrame] = []
+    for index, row in enumerate(iter_photos(setup_id, since=since, until=until)):
+        if index % stride:
+            continue
+        path = resolve_under(PHOTOS_DIR, row["path"])
+        try:
+            size = path.stat().st_size
+        except OSError:
+            continue
+        frames.append(TimelapseFrame(path=path, size=size, ts=row["ts"]))
+    return frames
+
+
+def avi_length(frames: list[TimelapseFrame]) -> int:
+    movi = sum(8 + frame.size + (frame.size & 1) for frame in frames)
+    return _AVI_HEADER_LEN + movi + 8 + 16 * len(frames)
+
+
+async def _iter_mjpeg(frames: list[TimelapseFrame], fps: float) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    interval = 1 / fps
+    next_at = loop.time()
+    for frame in frames:
+        data = await asyncio.to_thread(_read_frame, frame)
+        if not data:
+            continue
+        delay = next_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # A slow client or disk delays playback instead of bursting to catch up.
+        next_at = max(next_at, loop.time()) + interval
+        yield b"".join((_PART_HEADER, data, b"\r\n"))
+
+
+async def _iter_avi(frames: list[TimelapseFrame], fps: float, width: int, height: int) -> AsyncIterator[bytes]:
+    yield _avi_header(frames, fps, width, height)
+    for frame in frames:
+        data = await asyncio.to_thread(_read_frame, frame)
+        # Sizes are already announced in the header and index; a photo that
+        # changed or vanished since planning is cut or padded to keep the file valid.
+        data = data[: frame.size].ljust(frame.size, b"\x00")
+        yield b"".join((struct.pack("<4sI", b"00dc", frame.size), data, b"\x00" * (frame.size & 1)))
+    yield struct.pack("<4sI", b"idx1", 16 * len(frames))
+    offset = 4
+    for start in range(0, len(frames), _AVI_INDEX_BATCH):
+        entries = []
+        for frame in frames[start : start + _AVI_INDEX_BATCH]:
+            entries.append(struct.pack("<4sIII", b"00dc", _AVIIF_KEYFRAME, offset, frame.size))
+            offset += 8 + frame.size + (frame.size & 1)
+        yield b"".join(entries)
+
+
+def _avi_header(frames: list[TimelapseFrame], fps: float, width: int, height: int) -> bytes:
+    count = len(frames)
+    largest = max(frame.size for frame in frames)
+    movi_len = 4 + sum(8 + frame.size + (frame.size & 1) for frame in frames)
+    rate = round(fps * 1000)
+    avih = struct.pack(
+        "<IIIIIIIIII16x",
+        round(1_000_000 / fps),
+        round(largest * fps),
+        0,
+        _AVIF_HASINDEX,
+        count,
+        0,
+        1,
+        largest,
+        width,
+        height,
+    )
+    strh = struct.pack(
+        "<4s4sIHHIIIIIIIIhhhh",
+        b"vids",
+        b"MJPG",
+        0,
+        0,
+        0,
+        0,
+        1000,
+        rate,
+        0,
+        count,
+        largest,
+        0xFFFFFFFF,
+        0,
+        0,
+        0,
+        width,
+        height,
+    )
+    strf = struct.pack("<IiiHH4sIiiII", 40, width, height, 1, 24, b"MJPG", width * height * 3, 0, 0, 0, 0)
+    strl = b"strl" + _chunk(b"strh", strh) + _chunk(b"strf", strf)
+    hdrl = b"hdrl" + _chunk(b"avih", avih) + _chunk(b"LIST", strl)
+    riff_len = 4 + 8 + len(hdrl) + 8 + movi_len + 8 + 16 * count
+    return b"".join(
+        (
+            struct.pack("<4sI4s", b"RIFF", riff_len, b"AVI "),
+            _chunk(b"LIST", hdrl),
+            struct.pack("<4sI4s", b"LIST", movi_len, b"movi"),
+        )
+    )
+
+
+def _chunk(fourcc: bytes, body: bytes) -> bytes:
+    return struct.pack("<4sI", fourcc, len(body)) + body
+
+
+def _read_frame(frame: TimelapseFrame) -> bytes:
+    try:
+        return frame.path.read_bytes()
+    except OSError:
+        return b""
+
+
+def _jpeg_dimensions(data: bytes) -> Optional[tuple[int, int]]:
+    """Width and height from the first SOF marker of a JPEG."""
+    index = 2
+    while index + 9 <= len(data):
+        if data[index] != 0xFF:
+            return None
+        marker = data[index + 1]
+        if marker == 0xFF:
+            index += 1
+            continue
+        length = struct.unpack(">H", data[index + 2 : index + 4])[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[index + 5 : index + 9])
+            return width, height
+        index += 2 + length
+    return None
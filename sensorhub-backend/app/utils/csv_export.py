@@ -2,19 +2,43 @@ from __future__ import annotations
 
 import csv
 import io
-import zipfile
-from typing import Iterable
+from typing import Iterable, Iterator, Sequence
 
+CSV_BATCH_ROWS = 1000
 
-def write_csv_to_zip_stream(
-    zf: zipfile.ZipFile,
-    name: str,
+
+def iter_csv_chunks(
     rows: Iterable[dict],
     headers: list[str],
-) -> None:
-    with zf.open(name, "w") as handle:
-        with io.TextIOWrapper(handle, encoding="utf-8", newline="") as output:
-            writer = csv.DictWriter(output, fieldnames=headers)
-            writer.writeheader()
-            for row in rows:
-                writer.writerow({key: row.get(key) for key in headers})
+    batch_rows: int = CSV_BATCH_ROWS,
+) -> Iterator[bytes]:
+    """Encode ``rows`` as UTF-8 CSV, one chunk per ``batch_rows`` rows."""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=headers, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % batch_rows == 0:
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue().encode("utf-8")
+
+
+def iter_csv_batches(batches: Iterable[Sequence[Sequence]], headers: list[str]) -> Iterator[bytes]:
+    """Encode batches of row tuples as UTF-8 CSV, one chunk per batch.
+
+    Same output as ``iter_csv_chunks`` without a dict per row.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    for batch in batches:
+        writer.writerows(batch)
+        yield output.getvalue().encode("utf-8")
+        output.seek(0)
+        output.truncate()
+    if output.tell():
+        yield output.getvalue().encode("utf-8")
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Iterable
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+_EPOCH_DATE = date(1970, 1, 1)
+# UTC offsets change at most on quarter hours (UTC), so one lookup per bucket suffices.
+_OFFSET_BUCKET_SEC = 900
+_PREFIX_CACHE_SIZE = 4096
+_SECONDS = [f"{second:02d}" for second in range(60)]
 
 
 def format_ts_iso(ts: int | None) -> str:
@@ -14,3 +20,44 @@ def iter_readings_with_iso(readings: Iterable[dict]) -> Iterable[dict]:
     for reading in readings:
         reading["ts_iso"] = format_ts_iso(reading.get("ts"))
         yield reading
+
+
+class TsIsoFormatter:
+    """``format_ts_iso`` for long runs of timestamps, memoized per second.
+
+    A miss needs no ``datetime`` either: the local UTC offset is cached per quarter
+    hour and the ``YYYY-MM-DD HH:MM:`` prefix per minute.
+    """
+    def __init__(self) -> None:
+        self._second: Optional[int] = None
+        self._text = ""
+        self._offsets: dict[int, int] = {}
+        self._minutes: dict[int, str] = {}
+
+    def __call__(self, ts: int | None) -> str:
+        if not isinstance(ts, int):
+            return ""
+        second = ts // 1000
+        if second != self._second:
+            self._second = second
+            self._text = self._format(second)
+        return self._text
+
+    def _format(self, second: int) -> str:
+        bucket = second // _OFFSET_BUCKET_SEC
+        offset = self._offsets.get(bucket)
+        if offset is None:
+            start = bucket * _OFFSET_BUCKET_SEC
+            local = datetime.fromtimestamp(start)
+            utc = datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None)
+            offset = self._offsets[bucket] = int((local - utc).total_seconds())
+        minute, rest = divmod(second + offset, 60)
+        prefix = self._minutes.get(minute)
+        if prefix is None:
+            if len(self._minutes) >= _PREFIX_CACHE_SIZE:
+                self._minutes.clear()
+            day, minute_of_day = divmod(minute, 1440)
+            hour, minute_of_hour = divmod(minute_of_day, 60)
+            prefix = f"{(_EPOCH_DATE + timedelta(days=day)).isoformat()} {hour:02d}:{minute_of_hour:02d}:"
+            self._minutes[minute] = prefix
+        return prefix + _SECONDS[rest]
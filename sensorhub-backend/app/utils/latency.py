@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+LATENCY_EMA_ALPHA = 0.1
+
+
+@dataclass
+class LatencyStats:
+    """Last, exponentially averaged and maximum latency in milliseconds."""
+    last_ms: Optional[float] = None
+    avg_ms: Optional[float] = None
+    max_ms: float = 0.0
+
+    def record(self, latency_ms: float) -> None:
+        self.last_ms = latency_ms
+        if self.avg_ms is None:
+            self.avg_ms = latency_ms
+        else:
+            self.avg_ms += LATENCY_EMA_ALPHA * (latency_ms - self.avg_ms)
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def to_dict(self) -> dict:
+        return {
+            "latencyMsLast": round_ms(self.last_ms),
+            "latencyMsAvg": round_ms(self.avg_ms),
+            "latencyMsMax": round_ms(self.max_ms),
+        }
+
+
+def round_ms(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import struct
+import time
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+ZIP_CHUNK_BYTES = 64 * 1024
+
+
+class ZipStreamWriter:
+    """Builds a ZIP archive incrementally and hands out the bytes produced so far.
+
+    The writer is its own non-seekable sink, so ``zipfile`` emits every entry with a
+    data descriptor instead of seeking back to patch sizes. Memory use is bounded by
+    what the caller lets accumulate between two ``drain`` calls.
+    """
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED) -> None:
+        self._buffer = bytearray()
+        self._offset = 0
+        self.zip = zipfile.ZipFile(self, "w", compression=compression)
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def close(self) -> bytes:
+        """Write the central directory and return the remaining bytes."""
+        self.zip.close()
+        return self.drain()
+
+
+def iter_zip_entry(
+    archive: ZipStreamWriter,
+    name: str,
+    chunks: Iterable[bytes],
+    chunk_bytes: int = ZIP_CHUNK_BYTES,
+    compress_type: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Write ``chunks`` as one archive entry and yield archive bytes whenever a chunk is full.
+
+    ``compress_type`` overrides the archive default, e.g. ``ZIP_STORED`` for JPEGs.
+    """
+    entry: Union[str, zipfile.ZipInfo] = name
+    if compress_type is not None:
+        entry = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        entry.compress_type = compress_type
+    # Sizes are unknown up front; without ZIP64 an entry over 2 GiB aborts the stream.
+    with archive.zip.open(entry, "w", force_zip64=True) as handle:
+        for chunk in chunks:
+            handle.write(chunk)
+            if archive.pending() >= chunk_bytes:
+                yield archive.drain()
+    yield archive.drain()
+
+
+def append_zip_entries(target: zipfile.ZipFile, source: Path) -> None:
+    """Append all entries of the archive at ``source`` to ``target`` without recompressing.
+
+    ``target`` must write to a seekable file. zipfile has no public raw copy; each
+    entry is registered the way ``ZipFile.open(..., "w")`` does after writing one,
+    and ``target.close()`` then writes the central directory.
+    """
+    with zipfile.ZipFile(source) as archive, source.open("rb") as raw:
+        for info in archive.infolist():
+            if info.flag_bits & 0x08:
+                raise ValueError(f"entry with data descriptor not supported: {info.filename}")
+            raw.seek(info.header_offset)
+            header = raw.read(zipfile.sizeFileHeader)
+            name_len, extra_len = struct.unpack("<HH", header[26:30])
+            remaining = name_len + extra_len + info.compress_size
+            info.header_offset = target.fp.tell()
+            target.fp.write(header)
+            while remaining:
+                chunk = raw.read(min(remaining, ZIP_CHUNK_BYTES))
+                if not chunk:
+                    raise EOFError(f"truncated entry: {info.filename}")
+                target.fp.write(chunk)
+                remaining -= len(chunk)
+            target.filelist.append(info)
+            target.NameToInfo[info.filename] = info
+            target.start_dir = target.fp.tell()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Optional
+
+from .config import CAMERA_WORKER_STDERR_LINES, CAMERA_WORKER_STDERR_LOG_PER_MIN, log_event
+
+_LOG_WINDOW_SEC = 60
+
+
+class WorkerStderr:
+    """Drains a worker's stderr continuously into a bounded ring of recent lines.
+
+    A worker whose stderr is not read blocks once the pipe buffer is full, and its
+    frame output stalls without any error. Each line is logged as ``event``, at most
+    ``log_per_min`` per minute; identical consecutive lines share one ring entry.
+    """
+    def __init__(
+        self,
+        event: str,
+        maxlen: int = CAMERA_WORKER_STDERR_LINES,
+        log_per_min: int = CAMERA_WORKER_STDERR_LOG_PER_MIN,
+        **fields: Any,
+    ) -> None:
+        self._event = event
+        self._fields = fields
+        self._lines: deque[dict] = deque(maxlen=maxlen)
+        self._log_per_min = log_per_min
+        self._window_start = 0.0
+        self._logged = 0
+        self._suppressed = 0
+        self._task: Optional[asyncio.Task[None]] = None
+        self.total_lines = 0
+
+    def start(self, stream: Optional[asyncio.StreamReader]) -> None:
+        if stream is not None:
+            self._task = asyncio.create_task(self._pump(stream))
+
+    async def drain(self, timeout: float = 1.0) -> None:
+        """Wait until stderr is closed, e.g. to log the last lines of an exiting worker."""
+        if self._task is None or self._task.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def tail(self, count: Optional[int] = None) -> list[dict]:
+        lines = list(self._lines)
+        if count is not None:
+            lines = lines[-count:]
+        return [dict(entry) for entry in lines]
+
+    def text(self, count: int = 5) -> str:
+        return "\n".join(
+            entry["line"] if entry["repeat"] == 1 else f"{entry['line']} (x{entry['repeat']})"
+            for entry in self.tail(count)
+        )
+
+    async def _pump(self, stream: asyncio.StreamReader) -> None:
+        while True:
+            try:
+                raw = await stream.readline()
+            except ValueError:
+                # Longer than the stream limit; the reader has already skipped it.
+                self._record("<line too long>")
+                continue
+            if not raw:
+                break
+            self._record(raw.decode("utf-8", errors="replace").rstrip())
+        self._flush_suppressed()
+
+    def _record(self, line: str) -> None:
+        if not line:
+            return
+        now = time.time()
+        self.total_lines += 1
+        last = self._lines[-1] if self._lines else None
+        if last and last["line"] == line:
+            last["repeat"] += 1
+            last["ts"] = int(now * 1000)
+        else:
+            self._lines.append({"ts": int(now * 1000), "line": line, "repeat": 1})
+        if now - self._window_start >= _LOG_WINDOW_SEC:
+            self._flush_suppressed()
+            self._window_start = now
+            self._logged = 0
+        if self._logged < self._log_per_min:
+            self._logged += 1
+            log_event(self._event, line=line, **self._fields)
+        else:
+            self._suppressed += 1
+
+    def _flush_suppressed(self) -> None:
+        if self._suppressed:
+            log_event(f"{self._event}_suppressed", count=self._suppressed, **self._fields)
+            self._suppressed = 0
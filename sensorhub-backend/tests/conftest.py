@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Tests import the backend as ``app`` like uvicorn does from sensorhub-backend/.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Fresh DATA_DIR with an initialised database, patched into every module that imported it."""
+    from app import config, db, exports, photo_index
+
+    photos_dir = tmp_path / "photos"
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(config, "PHOTOS_DIR", photos_dir)
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "sensorhub.db")
+    monkeypatch.setattr(photo_index, "PHOTOS_DIR", photos_dir)
+    monkeypatch.setattr(photo_index, "PHOTO_INDEX_MARKER", tmp_path / "photo-index.done")
+    monkeypatch.setattr(exports, "PHOTOS_DIR", photos_dir)
+    db.close_connections()
+    db.init_db()
+    yield tmp_path
+    db.close_connections()
@@ -0,0 +1,64 @@
+import csv
+import io
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from fastapi import HTTPException
+
+from app import db
+from app.exports import build_delta_export, decode_watermark, encode_watermark, iter_delta_zip
+
+
+def _read_delta(setup_ids: list[str], watermark: Optional[str] = None) -> zipfile.ZipFile:
+    delta = build_delta_export(setup_ids, watermark)
+    return zipfile.ZipFile(io.BytesIO(b"".join(iter_delta_zip(delta))))
+
+
+def _csv_rows(archive: zipfile.ZipFile, name: str) -> list[dict]:
+    return list(csv.DictReader(io.StringIO(archive.read(name).decode("utf-8"))))
+
+
+def _add_photo(data_dir: Path, setup_id: str, relative_path: str, ts: int) -> None:
+    path = data_dir / "photos" / setup_id / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(relative_path.encode("utf-8"))
+    db.insert_photo(setup_id, "cam", ts, f"{setup_id}/{relative_path}", path.stat().st_size)
+
+
+def test_watermark_round_trip() -> None:
+    marks = {"S2": (7, 0), "S1": (12, 3)}
+    token = encode_watermark(marks)
+    assert "=" not in token
+    assert decode_watermark(token) == marks
+    assert decode_watermark(None) == {}
+    with pytest.raises(HTTPException):
+        decode_watermark("not-a-watermark")
+
+
+def test_delta_contains_only_rows_after_watermark(data_dir: Path) -> None:
+    setup_id = db.create_setup("Tank")["setup_id"]
+    db.insert_reading(setup_id, "node", 1000, 7.0, 1.2, 20.0, [])
+    _add_photo(data_dir, setup_id, "2026/03/04/a.jpg", 1000)
+
+    first = _read_delta([setup_id])
+    assert len(_csv_rows(first, f"setups/{setup_id}/readings.csv")) == 1
+    assert f"setups/{setup_id}/photos/2026/03/04/a.jpg" in first.namelist()
+    watermark = first.read("watermark.txt").decode("ascii").strip()
+
+    unchanged = _read_delta([setup_id], watermark)
+    assert _csv_rows(unchanged, f"setups/{setup_id}/readings.csv") == []
+    assert _csv_rows(unchanged, f"setups/{setup_id}/photos.csv") == []
+    assert unchanged.read("watermark.txt").decode("ascii").strip() == watermark
+
+    db.insert_reading(setup_id, "node", 2000, 7.1, 1.3, 21.0, [])
+    _add_photo(data_dir, setup_id, "2026/03/05/b.jpg", 2000)
+    second = _read_delta([setup_id], watermark)
+    readings = _csv_rows(second, f"setups/{setup_id}/readings.csv")
+    assert [row["ph"] for row in readings] == ["7.1"]
+    photos = _csv_rows(second, f"setups/{setup_id}/photos.csv")
+    assert [row["path"] for row in photos] == [f"{setup_id}/2026/03/05/b.jpg"]
+    photo_files = [name for name in second.namelist() if "/photos/" in name]
+    assert photo_files == [f"setups/{setup_id}/photos/2026/03/05/b.jpg"]
+    assert second.read(photo_files[0]) == b"2026/03/05/b.jpg"
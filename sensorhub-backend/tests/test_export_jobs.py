@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from app import db
+from app.export_jobs import _STATE_DIR, ExportJobs, _plan_export
+from app.exports import build_export_request
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+def _write_job_state(cache_dir: Path, job_id: str, owner_pid: int) -> Path:
+    path = cache_dir / _STATE_DIR / f"{job_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    state = {
+        "jobId": job_id,
+        "status": "running",
+        "fingerprint": "f" * 32,
+        "error": None,
+        "createdAt": int(time.time() * 1000),
+        "finishedAt": None,
+        "ownerPid": owner_pid,
+        "heartbeatAt": int(time.time() * 1000),
+    }
+    path.write_text(json.dumps(state), encoding="utf-8")
+    return path
+
+
+def test_job_of_stopped_worker_is_failed(tmp_path: Path) -> None:
+    path = _write_job_state(tmp_path, "orphaned", _dead_pid())
+
+    jobs = ExportJobs(processes=1, cache_dir=tmp_path)
+    state = jobs.get("orphaned")
+    assert state["status"] == "failed"
+    assert state["error"] == "export worker stopped"
+    assert "ownerPid" not in state and "heartbeatAt" not in state
+    assert json.loads(path.read_text(encoding="utf-8"))["status"] == "failed"
+
+
+def test_job_of_live_worker_keeps_running(tmp_path: Path) -> None:
+    _write_job_state(tmp_path, "elsewhere", os.getppid())
+
+    jobs = ExportJobs(processes=1, cache_dir=tmp_path)
+    assert jobs.get("elsewhere")["status"] == "running"
+
+
+def test_new_reading_invalidates_cached_archive(data_dir: Path) -> None:
+    setup_id = db.create_setup("Tank")["setup_id"]
+    db.insert_reading(setup_id, "node", 1000, 7.0, 1.2, 20.0, [])
+    request = build_export_request([setup_id])
+    cache_dir = data_dir / "exports"
+    cache_dir.mkdir()
+    _, fingerprint = _plan_export(request)
+    (cache_dir / f"{fingerprint}.zip").write_bytes(b"cached")
+
+    jobs = ExportJobs(processes=1, cache_dir=cache_dir)
+    job = asyncio.run(jobs.submit(request))
+    assert job["cached"] is True
+    assert job["fingerprint"] == fingerprint
+    assert job["sizeBytes"] == len(b"cached")
+
+    db.insert_reading(setup_id, "node", 2000, 7.1, 1.3, 21.0, [])
+    _, changed = _plan_export(request)
+    assert changed != fingerprint
+    assert not (cache_dir / f"{changed}.zip").exists()
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from app import db
+from app.photo_index import migrate_flat_photos, photo_relative_path
+
+FILENAME_TEMPLATE = "{setup}_2026-03-04_05-06-07.jpg"
+
+
+def _flat_photo(photos_dir: Path, setup_id: str, data: bytes) -> tuple[str, Path]:
+    filename = FILENAME_TEMPLATE.format(setup=setup_id)
+    path = photos_dir / setup_id / filename
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    db.insert_photo(setup_id, "cam", 1000, f"{setup_id}/{filename}", len(data))
+    return filename, path
+
+
+def test_migrate_moves_flat_photo_and_renames_row(data_dir: Path) -> None:
+    setup_id = db.create_setup("Tank")["setup_id"]
+    filename, flat = _flat_photo(data_dir / "photos", setup_id, b"jpeg")
+    new_path = photo_relative_path(setup_id, filename)
+    assert new_path == f"{setup_id}/2026/03/04/{filename}"
+
+    assert migrate_flat_photos() == {"moved": 1, "remaining": 0, "conflicts": 0}
+    assert not flat.exists()
+    assert (data_dir / "photos" / new_path).read_bytes() == b"jpeg"
+    assert db.list_photo_paths() == {new_path}
+
+
+def test_migrate_drops_identical_leftover(data_dir: Path) -> None:
+    setup_id = db.create_setup("Tank")["setup_id"]
+    filename, flat = _flat_photo(data_dir / "photos", setup_id, b"same")
+    new_path = photo_relative_path(setup_id, filename)
+    target = data_dir / "photos" / new_path
+    target.parent.mkdir(parents=True)
+    target.write_bytes(b"same")
+    db.insert_photo(setup_id, "cam", 1000, new_path, 4)
+
+    assert migrate_flat_photos() == {"moved": 1, "remaining": 0, "conflicts": 0}
+    assert not flat.exists()
+    assert target.read_bytes() == b"same"
+    # Both paths were indexed; the stale flat row is dropped instead of failing the rename.
+    assert db.list_photo_paths() == {new_path}
+
+
+def test_migrate_keeps_conflicting_photo(data_dir: Path) -> None:
+    setup_id = db.create_setup("Tank")["setup_id"]
+    filename, flat = _flat_photo(data_dir / "photos", setup_id, b"flat")
+    new_path = photo_relative_path(setup_id, filename)
+    target = data_dir / "photos" / new_path
+    target.parent.mkdir(parents=True)
+    target.write_bytes(b"sharded")
+
+    assert migrate_flat_photos() == {"moved": 0, "remaining": 0, "conflicts": 1}
+    assert flat.read_bytes() == b"flat"
+    assert target.read_bytes() == b"sharded"
+    assert db.list_photo_paths() == {f"{setup_id}/{filename}"}
+
+
+def test_rename_photo_path(data_dir: Path) -> None:
+    setup_id = db.create_setup("Tank")["setup_id"]
+    db.insert_photo(setup_id, "cam", 1000, f"{setup_id}/a.jpg", 1)
+    db.insert_photo(setup_id, "cam", 2000, f"{setup_id}/b.jpg", 1)
+
+    assert db.rename_photo_path(f"{setup_id}/a.jpg", f"{setup_id}/2026/a.jpg") is True
+    assert db.rename_photo_path(f"{setup_id}/a.jpg", f"{setup_id}/2026/a.jpg") is False
+    assert db.rename_photo_path(f"{setup_id}/b.jpg", f"{setup_id}/2026/a.jpg") is False
+    assert db.list_photo_paths() == {f"{setup_id}/2026/a.jpg"}
@@ -0,0 +1,57 @@
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from app.utils.zip_stream import ZIP_CHUNK_BYTES, ZipStreamWriter, append_zip_entries, iter_zip_entry
+
+
+def _write_part(path: Path, entries: dict[str, tuple[bytes, int]]) -> None:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, (data, compress_type) in entries.items():
+            info = zipfile.ZipInfo(name, date_time=(2026, 1, 2, 3, 4, 6))
+            info.compress_type = compress_type
+            # Same as write_export_part: ZIP64 extra field on every entry.
+            with archive.open(info, "w", force_zip64=True) as handle:
+                handle.write(data)
+
+
+def test_append_zip_entries_round_trip(tmp_path: Path) -> None:
+    parts = {
+        tmp_path / "0.zip": {
+            "S1/readings.csv": (b"ts,ph\n" + b"1,7.0\n" * 50_000, zipfile.ZIP_DEFLATED),
+            "S1/meta.txt": (b"name=Tank 1\n", zipfile.ZIP_DEFLATED),
+        },
+        tmp_path / "1.zip": {
+            "S2/readings.csv": (os.urandom(3 * ZIP_CHUNK_BYTES + 17), zipfile.ZIP_DEFLATED),
+            "S2/photos/a.jpg": (os.urandom(1000), zipfile.ZIP_STORED),
+        },
+        tmp_path / "2.zip": {},
+    }
+    for path, entries in parts.items():
+        _write_part(path, entries)
+
+    target = tmp_path / "joined.zip"
+    with zipfile.ZipFile(target, "w") as archive:
+        for path in parts:
+            append_zip_entries(archive, path)
+
+    expected = {name: entry for entries in parts.values() for name, entry in entries.items()}
+    with zipfile.ZipFile(target) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == list(expected)
+        for name, (data, compress_type) in expected.items():
+            assert archive.getinfo(name).compress_type == compress_type
+            assert archive.read(name) == data
+
+
+def test_append_zip_entries_rejects_data_descriptors(tmp_path: Path) -> None:
+    writer = ZipStreamWriter()
+    streamed = b"".join(iter_zip_entry(writer, "S1/readings.csv", [b"ts,ph\n"])) + writer.close()
+    source = tmp_path / "streamed.zip"
+    source.write_bytes(streamed)
+
+    with zipfile.ZipFile(tmp_path / "joined.zip", "w") as archive:
+        with pytest.raises(ValueError, match="data descriptor"):
+            append_zip_entries(archive, source)
@@ -1,7 +1,9 @@
 using System.Buffers.Binary;
 using System.Text.Json;
+using System.Diagnostics;
 using System.Threading;
 using Windows.Devices.Enumeration;
+using Windows.Foundation;
 using Windows.Graphics.Imaging;
 using Windows.Media.Capture;
 using Windows.Media.Capture.Frames;
@@ -14,6 +16,11 @@ internal static class Program
 {
     private const string Magic = "FRAM";
     private const ushort Version = 1;
+    private const double DefaultQuality = 0.92;
+    private static EncodeSettings _settings = new(0, 0, 0, DefaultQuality);
+
+    private sealed record EncodeSettings(uint Id, int Fps, int Width, double Quality);
+
     public static int Main(string[] args)
     {
         try
@@ -30,6 +37,7 @@ internal static class Program
     private static async Task<int> Run(string[] args)
     {
         var list = args.Contains("--list");
+        var watch = args.Contains("--watch");
         var deviceId = GetArgValue(args, "--device");
 
         if (list)
@@ -38,9 +46,15 @@ internal static class Program
             return 0;
         }
 
+        if (watch)
+        {
+            await WatchDevices();
+            return 0;
+        }
+
         if (string.IsNullOrWhiteSpace(deviceId))
         {
-            Console.Error.WriteLine("Usage: camera_worker.exe --list | --device <symbolic_link>");
+            Console.Error.WriteLine("Usage: camera_worker.exe --list | --watch | --device <symbolic_link>");
             return 2;
         }
 
@@ -60,17 +74,23 @@ internal static class Program
         return null;
     }
 
+    private static readonly string[] DeviceProperties =
+    {
+        "System.ItemNameDisplay",
+        "System.Devices.FriendlyName",
+        "System.Devices.DeviceInstanceId",
+        "System.Devices.LocationPaths"
+    };
+
     private static async Task ListDevices()
     {
-        var properties = new[]
-        {
-            "System.ItemNameDisplay",
-            "System.Devices.FriendlyName",
-            "System.Devices.DeviceInstanceId",
-            "System.Devices.LocationPaths"
-        };
+        Console.Out.WriteLine(await SerializeDevices());
+    }
+
+    private static async Task<string> SerializeDevices()
+    {
         var selector = DeviceInformation.GetAqsFilterFromDeviceClass(DeviceClass.VideoCapture);
-        var devices = await DeviceInformation.FindAllAsync(selector, properties);
+        var devices = await DeviceInformation.FindAllAsync(selector, DeviceProperties);
         var payload = devices.Select(d => new
         {
             device_id = d.Id,
@@ -78,8 +98,53 @@ internal static class Program
             port_id = ResolvePortId(d),
             instance_id = ResolveInstanceId(d)
         });
-        var json = JsonSerializer.Serialize(payload);
-        Console.Out.WriteLine(json);
+        return JsonSerializer.Serialize(payload);
+    }
+
+    private static async Task WatchDevices()
+    {
+        // Prints the same JSON as --list, one line per change, until stdin is closed by the backend.
+        var selector = DeviceInformation.GetAqsFilterFromDeviceClass(DeviceClass.VideoCapture);
+        var watcher = DeviceInformation.CreateWatcher(selector, DeviceProperties);
+        var changed = new SemaphoreSlim(0);
+        var enumerated = false;
+        watcher.Added += (_, _) => changed.Release();
+        watcher.Removed += (_, _) => changed.Release();
+        watcher.Updated += (_, _) => changed.Release();
+        watcher.EnumerationCompleted += (_, _) =>
+        {
+            enumerated = true;
+            changed.Release();
+        };
+        var stdinClosed = Task.Run(() => Console.In.ReadToEnd());
+        watcher.Start();
+
+        string? last = null;
+        while (true)
+        {
+            var next = changed.WaitAsync();
+            if (await Task.WhenAny(next, stdinClosed) == stdinClosed)
+            {
+                break;
+            }
+            // Plugging a camera raises several events; report the settled state once.
+            await Task.Delay(250);
+            while (changed.Wait(0))
+            {
+            }
+            if (!enumerated)
+            {
+                continue;
+            }
+            var json = await SerializeDevices();
+            if (json != last)
+            {
+                Console.Out.WriteLine(json);
+                Console.Out.Flush();
+                last = json;
+            }
+        }
+        watcher.Stop();
     }
 
     private static string ResolveFriendlyName(DeviceInformation device)
@@ -153,16 +218,32 @@ internal static class Program
 
         var reader = await capture.CreateFrameReaderAsync(source, MediaEncodingSubtypes.Bgra8);
         var semaphore = new SemaphoreSlim(1, 1);
-        ulong sequence = 0;
+        var clock = Stopwatch.StartNew();
+        // Elapsed time of the last frame accepted by the fps cap; -1 until the first one.
+        var lastFrameMs = -1L;
+        // Every frame accepted by the fps cap takes a sequence number, delivered or not, so the
+        // backend sees frames lost to a busy encoder or a failed encode as gaps (workerDropped).
+        // The cap counts from the last accepted frame, so a busy encoder drops at most the capped rate.
+        long sequence = -1;
+        _ = Task.Run(ReadControl);
 
         reader.FrameArrived += async (_, _) =>
         {
+            var settings = Volatile.Read(ref _settings);
+            if (settings.Fps > 0 && lastFrameMs >= 0 && clock.ElapsedMilliseconds - lastFrameMs < 1000 / settings.Fps)
+            {
+                return;
+            }
+            lastFrameMs = clock.ElapsedMilliseconds;
+            var frameSeq = (ulong)Interlocked.Increment(ref sequence);
             if (!await semaphore.WaitAsync(0))
             {
                 return;
             }
             try
             {
+                // Stamp the frame when it is taken from the camera, not after the encode.
+                var capturedMs = (ulong)DateTimeOffset.UtcNow.ToUnixTimeMilliseconds();
                 using var frame = reader.TryAcquireLatestFrame();
                 if (frame == null)
                 {
@@ -177,12 +258,12 @@ internal static class Program
                 {
                     bitmap = SoftwareBitmap.Convert(bitmap, BitmapPixelFormat.Bgra8);
                 }
-                var jpeg = await EncodeJpeg(bitmap);
+                var jpeg = await EncodeJpeg(bitmap, settings);
                 if (jpeg == null || jpeg.Length == 0)
                 {
                     return;
                 }
-                WriteFrame(deviceId, "image/jpeg", sequence++, (ulong)DateTimeOffset.UtcNow.ToUnixTimeMilliseconds(), jpeg);
+                WriteFrame(deviceId, "image/jpeg", frameSeq, capturedMs, settings.Id, jpeg);
             }
             catch (Exception ex)
             {
@@ -198,11 +279,45 @@ internal static class Program
         await Task.Delay(Timeout.Infinite);
     }
 
-    private static async Task<byte[]?> EncodeJpeg(SoftwareBitmap bitmap)
+    private static async Task ReadControl()
+    {
+        // One JSON object per line: {"id": 3, "fps": 10, "width": 960, "quality": 0.7}; width 0 keeps the native size.
+        string? line;
+        while ((line = await Console.In.ReadLineAsync()) != null)
+        {
+            try
+            {
+                using var doc = JsonDocument.Parse(line);
+                var root = doc.RootElement;
+                var settings = new EncodeSettings(
+                    root.GetProperty("id").GetUInt32(),
+                    root.TryGetProperty("fps", out var fps) ? fps.GetInt32() : 0,
+                    root.TryGetProperty("width", out var width) ? width.GetInt32() : 0,
+                    root.TryGetProperty("quality", out var quality) ? quality.GetDouble() : DefaultQuality);
+                Volatile.Write(ref _settings, settings);
+            }
+            catch (Exception ex)
+            {
+                Console.Error.WriteLine($"control error: {ex.Message}");
+            }
+        }
+    }
+
+    private static async Task<byte[]?> EncodeJpeg(SoftwareBitmap bitmap, EncodeSettings settings)
     {
         using var stream = new InMemoryRandomAccessStream();
-        var encoder = await BitmapEncoder.CreateAsync(BitmapEncoder.JpegEncoderId, stream);
+        var options = new BitmapPropertySet
+        {
+            { "ImageQuality", new BitmapTypedValue(settings.Quality, PropertyType.Single) }
+        };
+        var encoder = await BitmapEncoder.CreateAsync(BitmapEncoder.JpegEncoderId, stream, options);
         encoder.SetSoftwareBitmap(bitmap);
+        if (settings.Width > 0 && bitmap.PixelWidth > settings.Width)
+        {
+            encoder.BitmapTransform.ScaledWidth = (uint)settings.Width;
+            encoder.BitmapTransform.ScaledHeight = (uint)(bitmap.PixelHeight * settings.Width / bitmap.PixelWidth);
+            encoder.BitmapTransform.InterpolationMode = BitmapInterpolationMode.Fant;
+        }
         await encoder.FlushAsync();
 
         var buffer = new byte[stream.Size];
@@ -210,12 +325,13 @@ internal static class Program
         return buffer;
     }
 
-    private static void WriteFrame(string deviceId, string mime, ulong sequence, ulong timestampMs, byte[] payload)
+    private static void WriteFrame(string deviceId, string mime, ulong sequence, ulong timestampMs, uint configId, byte[] payload)
     {
         var deviceBytes = System.Text.Encoding.UTF8.GetBytes(deviceId);
         var mimeBytes = System.Text.Encoding.UTF8.GetBytes(mime);
 
-        var headerLen = 4 + 2 + 2 + 8 + 8 + 2 + 2 + 4;
+        // Base header plus the id of the applied control settings.
+        var headerLen = 4 + 2 + 2 + 8 + 8 + 2 + 2 + 4 + 4;
         Span<byte> header = stackalloc byte[headerLen];
         System.Text.Encoding.ASCII.GetBytes(Magic, header);
         BinaryPrimitives.WriteUInt16LittleEndian(header[4..6], Version);
@@ -225,6 +341,7 @@ internal static class Program
         BinaryPrimitives.WriteUInt16LittleEndian(header[24..26], (ushort)deviceBytes.Length);
         BinaryPrimitives.WriteUInt16LittleEndian(header[26..28], (ushort)mimeBytes.Length);
         BinaryPrimitives.WriteUInt32LittleEndian(header[28..32], (uint)payload.Length);
+        BinaryPrimitives.WriteUInt32LittleEndian(header[32..36], configId);
 
         var output = Console.OpenStandardOutput();
         output.Write(header);
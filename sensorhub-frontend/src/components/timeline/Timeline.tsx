@@ -8,9 +8,13 @@ type TimelineEvent =
   | { type: "reading"; ts: number; reading: StoredReading }
   | { type: "photo"; ts: number; photo: StoredPhoto };
 
-type HistoryResponse = {
-  readings: StoredReading[];
-  photos: StoredPhoto[];
+// Events kept in the timeline; polls only fetch what is newer than the last one.
+const HISTORY_WINDOW = 200;
+
+const mergeById = <T extends { id: number; ts: number }>(current: T[], incoming: T[]) => {
+  const byId = new Map(current.map((item) => [item.id, item]));
+  incoming.forEach((item) => byId.set(item.id, item));
+  return [...byId.values()].sort((a, b) => a.ts - b.ts).slice(-HISTORY_WINDOW);
 };
 
 type Props = {
@@ -31,23 +35,34 @@ const Timeline = ({ setup }: Props) => {
 
   useEffect(() => {
     let mounted = true;
+    let storedReadings: StoredReading[] = [];
+    let storedPhotos: StoredPhoto[] = [];
+    let lastTs: number | undefined;
+    setEvents([]);
     const load = () => {
       setError(null);
-      getHistory(setup.setupId, 200)
-        .then((data) => {
-          const payload = data as HistoryResponse;
+      getHistory(setup.setupId, {
+        limit: HISTORY_WINDOW,
+        photoLimit: HISTORY_WINDOW,
+        from: lastTs,
+      })
+        .then((payload) => {
           if (!mounted) return;
-          const readings = payload.readings.map((reading) => ({
+          storedReadings = mergeById(storedReadings, payload.readings);
+          storedPhotos = mergeById(storedPhotos, payload.photos);
+          const readings = storedReadings.map((reading) => ({
             type: "reading" as const,
             ts: reading.ts,
             reading,
           }));
-          const photos = payload.photos.map((photo) => ({
+          const photos = storedPhotos.map((photo) => ({
             type: "photo" as const,
             ts: photo.ts,
             photo,
           }));
           const merged = [...readings, ...photos].sort((a, b) => a.ts - b.ts);
+          // `from` is inclusive, so the last event comes back once and is merged by id.
+          lastTs = merged[merged.length - 1]?.ts ?? lastTs;
           setEvents(merged);
           const latest = merged[merged.length - 1] ?? null;
           setSelected((current) => {
@@ -321,7 +336,14 @@ const Timeline = ({ setup }: Props) => {
       <div className="timeline-layout">
         <div className="timeline-photo">
           {selectedPhoto ? (
-            <img className="camera-img" src={photoUrl(selectedPhoto.path)} alt="Captured" />
+            <a href={photoUrl(selectedPhoto.path)} target="_blank" rel="noreferrer">
+              <img
+                className="camera-img"
+                src={`${getBackendBaseUrl()}/api/setups/${setup.setupId}/photos/${selectedPhoto.id}?size=medium`}
+                alt="Captured"
+                decoding="async"
+              />
+            </a>
           ) : (
             <div className="timeline-placeholder">No photo selected.</div>
           )}
@@ -44,6 +44,12 @@ const HomePage = ({ onOpenSettings }: Props) => {
       setCameraDevices(msg.devices);
       return;
     }
+    if (msg.t === "gap") {
+      getReading(msg.setupId)
+        .then((reading) => setLiveReadings((prev) => ({ ...prev, [msg.setupId]: reading ?? null })))
+        .catch(() => null);
+      return;
+    }
     if (msg.t === "reset") {
       window.location.reload();
     }
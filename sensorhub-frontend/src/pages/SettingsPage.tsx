@@ -3,11 +3,13 @@ import { useEffect, useState } from "react";
 import {
   deleteCamera,
   deleteNode,
-  exportAllData,
   getCameraDevices,
+  getExportJob,
+  getExportJobDownloadUrl,
   getNodes,
   requestNodeReading,
   setNodeMode,
+  startExportJob,
   updateCameraAlias,
   updateNodeAlias,
 } from "../services/api";
@@ -21,6 +23,7 @@ const SettingsPage = ({ onBack }: Props) => {
   const [nodes, setNodes] = useState<NodeInfo[]>([]);
   const [cameraDevices, setCameraDevices] = useState<CameraDevice[]>([]);
   const [refreshError, setRefreshError] = useState<string | null>(null);
+  const [exportProgress, setExportProgress] = useState<string | null>(null);
   const [selectedNodeId, setSelectedNodeId] = useState<string | null>(null);
   const [selectedCameraId, setSelectedCameraId] = useState<string | null>(null);
   const [nodeState, setNodeState] = useState<
@@ -138,26 +141,28 @@ const SettingsPage = ({ onBack }: Props) => {
   };
 
   const handleExportAll = async () => {
+    // The export runs as a server-side job, so it survives a reload; the
+    // finished archive is downloaded by the browser directly.
     try {
-      const blob = await exportAllData();
-      const now = new Date();
-      const stamp = now
-        .toISOString()
-        .replace(/[:.]/g, "-")
-        .replace("T", "_")
-        .slice(0, 19);
-      const fileName = `sensorhub-export_${stamp}.zip`;
-      const url = window.URL.createObjectURL(blob);
+      let job = await startExportJob();
+      while (job.status === "queued" || job.status === "running") {
+        setExportProgress(`${job.progress.done}/${job.progress.total}`);
+        await new Promise((resolve) => window.setTimeout(resolve, 1000));
+        job = await getExportJob(job.jobId);
+      }
+      if (job.status === "failed") {
+        throw new Error(job.error || "Export failed");
+      }
       const link = document.createElement("a");
-      link.href = url;
-      link.download = fileName;
+      link.href = getExportJobDownloadUrl(job.jobId);
       document.body.appendChild(link);
       link.click();
       link.remove();
-      window.URL.revokeObjectURL(url);
     } catch (error) {
       const message = error instanceof Error ? error.message : "Export failed";
       alert(message);
+    } finally {
+      setExportProgress(null);
     }
   };
 
@@ -272,8 +277,8 @@ const SettingsPage = ({ onBack }: Props) => {
           <button className="button" onClick={onBack}>
             Back
           </button>
-          <button className="button" onClick={handleExportAll}>
-            Export
+          <button className="button" onClick={handleExportAll} disabled={exportProgress !== null}>
+            {exportProgress === null ? "Export" : `Export ${exportProgress}`}
           </button>
         </div>
       </header>
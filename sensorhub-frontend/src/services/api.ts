@@ -1,5 +1,13 @@
 import { getBackendBaseUrl } from "./backend-url";
-import { CameraDevice, NodeInfo, Reading, Setup } from "../types";
+import {
+  CameraDevice,
+  ExportJob,
+  NodeInfo,
+  Reading,
+  Setup,
+  StoredPhoto,
+  StoredReading,
+} from "../types";
 
 const getCsrfHeaders = (): Record<string, string> => {
   const token = localStorage.getItem("sensorhub.csrf");
@@ -170,23 +178,42 @@ export const capturePhoto = async (setupId: string) => {
   return handleResponse(res);
 };
 
-export const getHistory = async (setupId: string, limit = 200) => {
-  const res = await fetch(
-    `${getBackendBaseUrl()}/api/setups/${setupId}/history?limit=${limit}`,
-    {
-      headers: buildHeaders(),
-    }
-  );
+export type HistoryQuery = {
+  limit?: number;
+  // 0 asks for every photo in the range; the backend default is 200.
+  photoLimit?: number;
+  from?: number;
+};
+
+export const getHistory = async (
+  setupId: string,
+  { limit = 200, photoLimit = 200, from }: HistoryQuery = {}
+): Promise<{ readings: StoredReading[]; photos: StoredPhoto[] }> => {
+  const params = new URLSearchParams({ limit: String(limit), photoLimit: String(photoLimit) });
+  if (from !== undefined) {
+    params.set("from", String(from));
+  }
+  const res = await fetch(`${getBackendBaseUrl()}/api/setups/${setupId}/history?${params}`, {
+    headers: buildHeaders(),
+  });
   return handleResponse(res);
 };
 
-export const exportAllData = async (): Promise<Blob> => {
-  const res = await fetch(`${getBackendBaseUrl()}/api/export/all`, {
+export const startExportJob = async (): Promise<ExportJob> => {
+  const res = await fetch(`${getBackendBaseUrl()}/api/export/jobs`, {
+    method: "POST",
+    headers: buildHeaders({ "Content-Type": "application/json" }),
+    body: JSON.stringify({}),
+  });
+  return handleResponse<ExportJob>(res);
+};
+
+export const getExportJob = async (jobId: string): Promise<ExportJob> => {
+  const res = await fetch(`${getBackendBaseUrl()}/api/export/jobs/${jobId}`, {
     headers: buildHeaders(),
   });
-  if (!res.ok) {
-    const text = await res.text();
-    throw new Error(text || `Request failed: ${res.status}`);
-  }
-  return res.blob();
+  return handleResponse<ExportJob>(res);
 };
+
+export const getExportJobDownloadUrl = (jobId: string): string =>
+  `${getBackendBaseUrl()}/api/export/jobs/${jobId}/download`;
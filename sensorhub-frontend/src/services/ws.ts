@@ -1,11 +1,40 @@
 import { getBackendWsBaseUrl } from "./backend-url";
-import { WsClientMsg, WsServerMsg } from "../types";
+import { CameraDevice, WsClientMsg, WsServerMsg } from "../types";
 
 type Status = "connected" | "disconnected" | "connecting";
 type MsgHandler = (msg: WsServerMsg) => void;
 type StatusHandler = (status: Status) => void;
 
 const BACKOFFS = [1000, 2000, 5000, 10000];
+// Mirrors READING_RECORD in sensorhub-backend/app/realtime_updates.py ("<BHQQfffH").
+const READING_RECORD_KIND = 1;
+const READING_RECORD_LEN = 33;
+const textDecoder = new TextDecoder();
+
+function optionalFloat(value: number): number | undefined {
+  return Number.isNaN(value) ? undefined : value;
+}
+
+function decodeReadingRecord(buffer: ArrayBuffer): WsServerMsg {
+  const view = new DataView(buffer);
+  if (buffer.byteLength < READING_RECORD_LEN || view.getUint8(0) !== READING_RECORD_KIND) {
+    return { t: "error", msg: "invalid ws payload" };
+  }
+  const setupLen = view.getUint16(1, true);
+  const statusLen = view.getUint16(31, true);
+  const setupId = textDecoder.decode(new Uint8Array(buffer, READING_RECORD_LEN, setupLen));
+  const status = textDecoder.decode(new Uint8Array(buffer, READING_RECORD_LEN + setupLen, statusLen));
+  return {
+    t: "reading",
+    setupId,
+    seq: Number(view.getBigUint64(3, true)),
+    ts: Number(view.getBigUint64(11, true)),
+    ph: optionalFloat(view.getFloat32(19, true)),
+    ec: optionalFloat(view.getFloat32(23, true)),
+    temp: optionalFloat(view.getFloat32(27, true)),
+    status: status ? status.split(",") : [],
+  };
+}
 
 export class LiveWsClient {
   private socket: WebSocket | null = null;
@@ -13,6 +42,8 @@ export class LiveWsClient {
   private onStatus: StatusHandler;
   private reconnectAttempt = 0;
   private subscriptions = new Set<string>();
+  private lastSeq = new Map<string, number>();
+  private cameraDevices = new Map<string, CameraDevice>();
   private closing = false;
 
   constructor(onMsg: MsgHandler, onStatus: StatusHandler) {
@@ -26,18 +57,44 @@ export class LiveWsClient {
     }
     this.onStatus("connecting");
     this.socket = new WebSocket(`${getBackendWsBaseUrl()}/api/live`);
+    this.socket.binaryType = "arraybuffer";
 
     this.socket.onopen = () => {
       this.reconnectAttempt = 0;
       this.onStatus("connected");
+      this.send({ t: "hello", enc: "binary", deltas: true });
       this.subscriptions.forEach((setupId) => {
-        this.send({ t: "sub", setupId });
+        const since = this.lastSeq.get(setupId);
+        this.send(since === undefined ? { t: "sub", setupId } : { t: "sub", setupId, since });
       });
     };
 
     this.socket.onmessage = (event) => {
       try {
-        const msg = JSON.parse(event.data) as WsServerMsg;
+        const msg =
+          event.data instanceof ArrayBuffer
+            ? decodeReadingRecord(event.data)
+            : (JSON.parse(event.data) as WsServerMsg);
+        if (msg.t === "reading" && msg.seq !== undefined) {
+          this.lastSeq.set(msg.setupId, msg.seq);
+        }
+        if (msg.t === "hello") {
+          return;
+        }
+        if (msg.t === "gap") {
+          // The backend could not replay from our seq; resume without `since` next time
+          // and let the page refetch what it missed.
+          this.lastSeq.delete(msg.setupId);
+        }
+        if (msg.t === "cameraDevices") {
+          this.cameraDevices = new Map(msg.devices.map((device) => [device.cameraId, device]));
+        }
+        if (msg.t === "cameraDevicesDelta") {
+          msg.remove.forEach((cameraId) => this.cameraDevices.delete(cameraId));
+          msg.upsert.forEach((device) => this.cameraDevices.set(device.cameraId, device));
+          this.onMsg({ t: "cameraDevices", devices: Array.from(this.cameraDevices.values()) });
+          return;
+        }
         this.onMsg(msg);
       } catch {
         this.onMsg({ t: "error", msg: "invalid ws payload" });
@@ -71,6 +128,7 @@ export class LiveWsClient {
 
   unsubscribe(setupId: string) {
     this.subscriptions.delete(setupId);
+    this.lastSeq.delete(setupId);
     this.send({ t: "unsub", setupId });
   }
 
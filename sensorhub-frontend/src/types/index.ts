@@ -51,15 +51,36 @@ export type StoredPhoto = {
   camera_id: string;
   ts: number;
   path: string;
+  size_bytes?: number | null;
+};
+
+export type ExportJob = {
+  jobId: string;
+  status: "queued" | "running" | "done" | "failed";
+  progress: { done: number; total: number };
+  cached: boolean;
+  format: string;
+  setupIds: string[];
+  fingerprint: string;
+  sizeBytes: number | null;
+  error: string | null;
+  createdAt: number;
+  finishedAt: number | null;
 };
 
 export type WsClientMsg =
-  | { t: "sub"; setupId: string }
-  | { t: "unsub"; setupId: string };
+  | { t: "hello"; enc?: "json" | "binary"; deltas?: boolean }
+  | { t: "sub"; setupId: string; since?: number }
+  | { t: "unsub"; setupId: string }
+  | { t: "sub"; jobId: string };
 
 export type WsServerMsg =
-  | ({ t: "reading"; setupId: string } & Reading)
+  | ({ t: "reading"; setupId: string; seq?: number } & Reading)
   | { t: "cameraDevices"; devices: CameraDevice[] }
+  | { t: "cameraDevicesDelta"; upsert: CameraDevice[]; remove: string[] }
+  | { t: "hello"; enc: "json" | "binary"; deltas: boolean }
   | { t: "device"; setupId: string; node?: string; camera?: string }
   | { t: "reset"; reason?: string }
-  | { t: "error"; setupId?: string; msg: string };
+  | { t: "gap"; setupId: string }
+  | ({ t: "exportJob" } & ExportJob)
+  | { t: "error"; setupId?: string; jobId?: string; msg: string };